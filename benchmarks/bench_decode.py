@@ -0,0 +1,134 @@
+"""
+Compares the full-resolution decode with the reduced-size decode of the preprocessing stage:
+time per image and peak memory by format, and agreement of the model on the decoded images.
+
+    python benchmarks/bench_decode.py --data photos/ --backend numpy --model Models/cifar10_best_latest.npz
+
+Without --data a corpus of synthetic 12MP photos (JPEG and PNG) is generated. Every decoder
+runs in a fresh interpreter; the peak resident memory of every decode is read from VmHWM (Linux).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.preprocessing import INPUT_SIZE, decode_image
+
+
+def decode_full(f: bytes) -> np.ndarray:
+    """
+    The previous decoder: the whole image is decoded, then resized.
+    """
+    image = Image.open(BytesIO(f))
+    image = image.resize(INPUT_SIZE).convert('RGB')
+    return np.array(image) / 255.0
+
+
+DECODERS = {"full": decode_full, "reduced": decode_image}
+
+
+def synthetic_corpus(directory: str, count: int, size: tuple = (4032, 3024)):
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        # Smooth shapes from an upscaled thumbnail plus sensor-like noise
+        small = Image.fromarray((rng.random((24, 32, 3)) * 255).astype(np.uint8))
+        pixels = np.asarray(small.resize(size, Image.BICUBIC), dtype=np.int16)
+        pixels = pixels + rng.integers(-12, 12, (size[1], size[0], 1), dtype=np.int16)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        if i % 4 == 3:
+            image.save(os.path.join(directory, f"photo{i}.png"), compress_level=1)
+        else:
+            image.save(os.path.join(directory, f"photo{i}.jpg"), quality=90)
+
+
+def memory_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak():
+    # Linux resets the resident set high-water mark (VmHWM) when 5 is written to clear_refs
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+
+def run_decoder(name: str, directory: str, output: str) -> dict:
+    decode = DECODERS[name]
+    results, images = {}, []
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name), "rb") as image_file:
+            f = image_file.read()
+        kind = "jpeg" if Image.open(BytesIO(f)).format == "JPEG" else "other"
+        reset_peak()
+        rss = memory_kb("VmRSS")
+        started = time.perf_counter()
+        images.append(decode(f))
+        elapsed = time.perf_counter() - started
+        result = results.setdefault(kind, {"times": [], "peaks": []})
+        result["times"].append(elapsed)
+        result["peaks"].append((memory_kb("VmHWM") - rss) / 1024)
+    np.save(output, np.array(images, dtype=np.float32))
+    return {kind: {"p50_ms": float(np.percentile(result["times"], 50) * 1000),
+                   "mean_ms": float(np.mean(result["times"]) * 1000),
+                   "peak_mb": float(np.max(result["peaks"]))}
+            for kind, result in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="A folder of photos; a synthetic corpus is generated when omitted")
+    parser.add_argument("--synthetic", type=int, default=12, help="The size of the synthetic corpus")
+    parser.add_argument("--backend", default="numpy")
+    parser.add_argument("--model", default="Models/cifar10_best_latest.npz")
+    parser.add_argument("--worker", nargs=3, metavar=("DECODER", "DATA", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_decoder(*args.worker)))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data = args.data
+        if data is None:
+            data = os.path.join(workdir, "corpus")
+            os.mkdir(data)
+            synthetic_corpus(data, args.synthetic)
+
+        results, decoded = {}, {}
+        for name in DECODERS:
+            output = os.path.join(workdir, f"{name}.npy")
+            stdout = subprocess.run([sys.executable, __file__, "--worker", name, data, output],
+                                    capture_output=True, text=True, check=True).stdout
+            results[name] = json.loads(stdout.strip().splitlines()[-1])
+            decoded[name] = np.load(output)
+
+    print(f"{'decoder':<8} {'format':<6} {'p50 ms':>8} {'mean ms':>8} {'peak MB':>8}")
+    for name, kinds in results.items():
+        for kind, result in sorted(kinds.items()):
+            print(f"{name:<8} {kind:<6} {result['p50_ms']:>8.1f} {result['mean_ms']:>8.1f} {result['peak_mb']:>8.1f}")
+
+    difference = np.abs(decoded["reduced"] - decoded["full"])
+    print(f"\npixel difference: mean {difference.mean():.4f}, max {difference.max():.4f}")
+
+    from src.services.inference import load_predict_fn
+    predict = load_predict_fn(args.backend, args.model)
+    full, reduced = predict(decoded["full"]), predict(decoded["reduced"])
+    agreement = np.mean(full.argmax(axis=1) == reduced.argmax(axis=1))
+    print(f"top-1 agreement ({args.backend}): {agreement:.2%} of {len(full)} images, "
+          f"max probability difference {np.abs(full - reduced).max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
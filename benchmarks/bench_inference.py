@@ -0,0 +1,85 @@
+"""
+Compares the Keras and the NumPy inference backends: load time, resident memory,
+single-image latency and batched throughput. Every backend runs in a fresh interpreter
+so that its memory footprint is measured in isolation.
+
+    python benchmarks/bench_inference.py --keras Models/cifar10_best_latest.h5 --numpy Models/cifar10_best_latest.npz
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_backend(backend: str, path: str, iterations: int, batch_size: int) -> dict:
+    from src.services.inference import load_predict_fn
+
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    predict = load_predict_fn(backend, path)
+    load_time = time.perf_counter() - started
+
+    rng = np.random.default_rng(0)
+    single = rng.random((1, 32, 32, 3), dtype=np.float32)
+    batch = rng.random((batch_size, 32, 32, 3), dtype=np.float32)
+    predict(single)
+    predict(batch)
+
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        predict(single)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(max(iterations // 10, 1)):
+        predict(batch)
+    throughput = max(iterations // 10, 1) * batch_size / (time.perf_counter() - started)
+
+    return {"backend": backend,
+            "load_s": load_time,
+            "rss_mb": rss_mb() - rss_before,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000),
+            "images_per_s": throughput}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keras", default="Models/cifar10_best_latest.h5")
+    parser.add_argument("--numpy", default="Models/cifar10_best_latest.npz")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--worker", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(*args.worker, args.iterations, args.batch_size)))
+        return
+
+    print(f"{'backend':<8} {'load s':>8} {'RSS MB':>8} {'p50 ms':>8} {'p99 ms':>8} {'img/s':>8}")
+    for backend, path in (("keras", args.keras), ("numpy", args.numpy)):
+        output = subprocess.run([sys.executable, __file__, "--worker", backend, path,
+                                 "--iterations", str(args.iterations), "--batch-size", str(args.batch_size)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{backend:<8} {result['load_s']:>8.2f} {result['rss_mb']:>8.0f} {result['p50_ms']:>8.2f} "
+              f"{result['p99_ms']:>8.2f} {result['images_per_s']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
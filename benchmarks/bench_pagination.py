@@ -0,0 +1,75 @@
+"""
+Compares OFFSET pagination with keyset pagination of the prediction history at increasing depths.
+
+    python benchmarks/bench_pagination.py --rows 200000 --limit 20
+
+A temporary SQLite database is filled with predictions and the ix_predictions_prediction_date_id
+index; every page is fetched through the repository functions used by GET /api/predicts/.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.models import Base, Prediction
+from src.repository.predicts import encode_cursor, get_predictions, get_predictions_page
+
+
+async def fill(session_factory, rows: int):
+    start = datetime(2024, 1, 1)
+    batch = 10000
+    async with session_factory() as session:
+        for offset in range(0, rows, batch):
+            values = [{"prediction_date": start + timedelta(seconds=(i // 3)), "filename": f"photo{i}.png",
+                       "url": "", "predicted_label": "cat"} for i in range(offset, min(offset + batch, rows))]
+            await session.execute(insert(Prediction), values)
+        await session.commit()
+
+
+async def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        await fill(session_factory, args.rows)
+
+        print(f"{'page':>8} {'offset ms':>10} {'keyset ms':>10}")
+        async with session_factory() as session:
+            for page in args.pages:
+                offset = page * args.limit
+                if offset >= args.rows:
+                    break
+                # The cursor of a deep page points after the last row of the previous one
+                previous = await get_predictions(1, offset - 1, session) if offset else None
+                cursor = encode_cursor(previous[0]) if previous else None
+                offset_ms = await timed(lambda: get_predictions(args.limit, offset, session), args.repeat)
+                keyset_ms = await timed(lambda: get_predictions_page(args.limit, cursor, session), args.repeat)
+                print(f"{page:>8} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pages", type=int, nargs="+", default=[0, 100, 1000, 9000])
+    asyncio.run(main(parser.parse_args()))
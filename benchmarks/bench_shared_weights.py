@@ -0,0 +1,82 @@
+"""
+Measures the memory of several inference workers running at the same time, with the NumPy
+weights either loaded privately into every worker or memory-mapped and shared between them.
+
+RSS counts shared pages in full in every process, so the proportional set size (PSS), which
+splits every shared page between the processes mapping it, is reported as well; the sum of
+PSS over the workers is what they really cost together.
+
+    python benchmarks/bench_shared_weights.py --workers 4 --numpy Models/cifar10_best_latest.npz
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def memory_mb(pid: str = "self") -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Shared_Dirty:", "Private_Dirty:"):
+                fields[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    # Freshly unpacked weights are still dirty in the page cache, but shared all the same
+    fields["shared"] = fields.pop("shared_clean") + fields.pop("shared_dirty")
+    return fields
+
+
+def run_worker(path: str, mmap: bool):
+    from src.services.inference import load_predict_fn
+
+    baseline = memory_mb()
+    predict = load_predict_fn("numpy", path, mmap)
+    predict(np.random.default_rng(0).random((16, 32, 32, 3), dtype=np.float32))
+    print(json.dumps(baseline), flush=True)
+    # Stay alive until the parent has measured every worker, so that the pages really are shared
+    sys.stdin.read()
+
+
+def run_mode(path: str, mmap: bool, workers: int) -> list[dict]:
+    processes = [subprocess.Popen([sys.executable, __file__, "--worker", path] + (["--mmap"] if mmap else []),
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    baselines = [json.loads(process.stdout.readline()) for process in processes]
+    # Sharing depends on how many processes map a page, so it is measured once all of them are up
+    results = [{"baseline": baseline, "loaded": memory_mb(process.pid)}
+               for baseline, process in zip(baselines, processes)]
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--numpy", default="Models/cifar10_best_latest.npz")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mmap", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.mmap)
+        return
+
+    print(f"{'weights':<8} {'workers':>7} {'RSS MB':>8} {'private MB':>10} {'shared MB':>9} {'total PSS MB':>12}")
+    for mmap in (False, True):
+        results = run_mode(args.numpy, mmap, args.workers)
+        growth = {key: np.mean([r["loaded"][key] - r["baseline"][key] for r in results])
+                  for key in ("rss", "private_dirty", "shared", "pss")}
+        print(f"{'mmap' if mmap else 'private':<8} {args.workers:>7} {growth['rss']:>8.1f} "
+              f"{growth['private_dirty']:>10.1f} {growth['shared']:>9.1f} "
+              f"{growth['pss'] * args.workers:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Measures the cost of test-time augmentation against single-view inference: latency per image,
+sequential throughput, and the same views run as one forward pass each instead of one stacked batch.
+With a folder of labeled images (subfolders 0 to 9) the accuracy of both modes is reported too.
+
+    python benchmarks/bench_tta.py --backend numpy --model Models/cifar10_best_latest.npz --data cifar10/test
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.inference import load_predict_fn
+from src.services.preprocessing import load_image_folder
+from src.services.tta import MAX_VIEWS, augment_views
+
+
+def single(predict, image):
+    return predict(image[np.newaxis].astype(np.float32))[0]
+
+
+def stacked(predict, image, views):
+    return predict(augment_views(image, views)).mean(axis=0)
+
+
+def looped(predict, image, views):
+    return np.mean([predict(view[np.newaxis])[0] for view in augment_views(image, views)], axis=0)
+
+
+def measure(func, images: np.ndarray) -> tuple[list, np.ndarray]:
+    latencies, predictions = [], []
+    for image in images:
+        started = time.perf_counter()
+        predictions.append(func(image))
+        latencies.append(time.perf_counter() - started)
+    return latencies, np.array(predictions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="numpy", choices=["keras", "numpy", "tflite"])
+    parser.add_argument("--model", default="Models/cifar10_best_latest.npz")
+    parser.add_argument("--data", help="A folder of images; random images are used when omitted")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--views", type=int, default=MAX_VIEWS)
+    args = parser.parse_args()
+
+    predict = load_predict_fn(args.backend, args.model)
+    if args.data:
+        images, labels = load_image_folder(args.data, args.count)
+    else:
+        images = np.random.default_rng(0).random((args.count, 32, 32, 3), dtype=np.float32)
+        labels = np.full(args.count, -1)
+    for batch_size in (1, args.views):
+        predict(np.zeros((batch_size, 32, 32, 3), dtype=np.float32))
+
+    started = time.perf_counter()
+    for image in images:
+        augment_views(image, args.views)
+    augment_ms = (time.perf_counter() - started) / len(images) * 1000
+
+    modes = {"single view": lambda image: single(predict, image),
+             f"tta x{args.views}": lambda image: stacked(predict, image, args.views),
+             f"tta x{args.views} looped": lambda image: looped(predict, image, args.views)}
+    print(f"{len(images)} images, {args.backend} backend, views built in {augment_ms:.3f} ms per image")
+    print(f"{'mode':<18} {'p50 ms':>8} {'p99 ms':>8} {'img/s':>8} {'cost':>6} {'accuracy':>9}")
+    baseline = None
+    for name, func in modes.items():
+        latencies, predictions = measure(func, images)
+        throughput = len(images) / sum(latencies)
+        baseline = baseline or throughput
+        labeled = labels >= 0
+        accuracy = np.mean(predictions[labeled].argmax(axis=1) == labels[labeled]) if labeled.any() else None
+        print(f"{name:<18} {np.percentile(latencies, 50) * 1000:>8.2f} {np.percentile(latencies, 99) * 1000:>8.2f} "
+              f"{throughput:>8.0f} {baseline / throughput:>5.1f}x "
+              f"{f'{accuracy:.2%}' if accuracy is not None else '-':>9}")
+
+
+if __name__ == "__main__":
+    main()
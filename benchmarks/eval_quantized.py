@@ -0,0 +1,77 @@
+"""
+Evaluation report for the int8 quantized classifier: accuracy, agreement with the float
+model and single-image p50/p99 latency of every available backend.
+
+    python benchmarks/eval_quantized.py --data cifar10 --samples 2000 --report quantization_report.md
+
+The data is either the CIFAR-10 test set or a local folder with one subfolder per class index.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.inference import load_predict_fn
+from src.services.preprocessing import load_image_folder
+
+
+def load_test_set(source: str, samples: int) -> tuple[np.ndarray, np.ndarray]:
+    if source == "cifar10":
+        from keras.datasets import cifar10
+        _, (x_test, y_test) = cifar10.load_data()
+        return x_test[:samples].astype(np.float32) / 255.0, y_test[:samples, 0]
+    return load_image_folder(source, limit=samples)
+
+
+def evaluate(predict, images: np.ndarray, batch_size: int, latency_runs: int) -> dict:
+    predictions = np.concatenate([predict(images[start:start + batch_size])
+                                  for start in range(0, len(images), batch_size)])
+    latencies = []
+    for image in images[:latency_runs]:
+        started = time.perf_counter()
+        predict(image[np.newaxis])
+        latencies.append(time.perf_counter() - started)
+    return {"classes": predictions.argmax(axis=1),
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keras", default="Models/cifar10_best_latest.h5")
+    parser.add_argument("--tflite", default="Models/cifar10_best_latest_int8.tflite")
+    parser.add_argument("--data", default="cifar10")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--latency-runs", type=int, default=200)
+    parser.add_argument("--report", help="Also write the report to this Markdown file")
+    args = parser.parse_args()
+
+    images, labels = load_test_set(args.data, args.samples)
+    results = {}
+    for backend, path in (("keras float32", ("keras", args.keras)), ("tflite int8", ("tflite", args.tflite))):
+        results[backend] = evaluate(load_predict_fn(*path), images, args.batch_size, args.latency_runs)
+
+    reference = results["keras float32"]["classes"]
+    labeled = labels >= 0
+    lines = [f"Evaluated on {len(images)} images from {args.data}, {int(labeled.sum())} labeled.", "",
+             "| model | accuracy | agreement with float | p50 ms | p99 ms |",
+             "|---|---|---|---|---|"]
+    for backend, result in results.items():
+        accuracy = (result["classes"][labeled] == labels[labeled]).mean() if labeled.any() else float("nan")
+        agreement = (result["classes"] == reference).mean()
+        lines.append(f"| {backend} | {accuracy:.4f} | {agreement:.4f} | {result['p50_ms']:.2f} | {result['p99_ms']:.2f} |")
+    report = "\n".join(lines)
+
+    print(report)
+    if args.report:
+        with open(args.report, "w") as output:
+            output.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
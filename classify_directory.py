@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.database.models import Prediction
+from src.repository.predicts import get_stored_filenames, insert_predictions
+from src.routes.predicts import batch_predictor, class_labels
+from src.services.bulk_classifier import Checkpoint, classify_files, find_images
+from src.services.model_manager import model_manager
+
+COLUMNS = ("path", "predicted_label", "class_index", "score", "error")
+
+
+def result_rows(chunk: list[str], predictions: np.ndarray, errors: list) -> list[dict]:
+    rows = []
+    decoded = iter(predictions)
+    for path, error in zip(chunk, errors):
+        if error is not None:
+            rows.append({"path": path, "predicted_label": None, "class_index": None, "score": None, "error": error})
+            continue
+        prediction = next(decoded)
+        class_index = int(np.argmax(prediction))
+        rows.append({"path": path, "predicted_label": class_labels[class_index], "class_index": class_index,
+                     "score": round(float(prediction[class_index]), 6), "error": None})
+    return rows
+
+
+class ResultFile:
+    """
+    The CSV or NDJSON file of the results, reopened in append mode when a run resumes.
+    """
+
+    def __init__(self, path: str, output_format: str, resume_bytes: int = None):
+        self.format = output_format
+        if resume_bytes is None:
+            self.file = open(path, "w", newline="", encoding="utf-8")
+            if output_format == "csv":
+                csv.writer(self.file).writerow(COLUMNS)
+        else:
+            # Drop the rows written after the last checkpoint
+            self.file = open(path, "r+", newline="", encoding="utf-8")
+            self.file.truncate(resume_bytes)
+            self.file.seek(resume_bytes)
+        self.writer = csv.DictWriter(self.file, COLUMNS) if output_format == "csv" else None
+
+    def write(self, rows: list[dict]):
+        if self.writer is not None:
+            self.writer.writerows(rows)
+        else:
+            self.file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def sync(self) -> int:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+async def store(rows: list[dict], predictions: np.ndarray, prediction_date: datetime, skip_stored: bool = False):
+    """
+    Stores the predictions of a chunk, dated at the start of the run. With ``skip_stored``, for the first
+    chunk of a resumed run, the files this run already stored are left out: the chunk may have been
+    stored before the run stopped, without being checkpointed.
+    """
+    version = model_manager.version
+    rows = [row for row in rows if row["error"] is None]
+    values = [{"prediction_date": prediction_date, "filename": row["path"], "url": "",
+               "predicted_label": row["predicted_label"], "class_index": row["class_index"],
+               "score": row["score"], "model_version": version,
+               "top_k_scores": Prediction.pack_top_k(prediction.tolist(), settings.prediction_stored_top_k)}
+              for row, prediction in zip(rows, predictions)]
+    async with sessionmanager.session() as session:
+        try:
+            if skip_stored:
+                stored = await get_stored_filenames([value["filename"] for value in values], prediction_date,
+                                                    version, session)
+                values = [value for value in values if value["filename"] not in stored]
+            await insert_predictions(values, session)
+        except Exception as err:
+            await session.rollback()
+            raise SystemExit(f"Could not store the predictions ({err}), resume once the database is back")
+
+
+async def main(args):
+    output_format = args.format or ("ndjson" if args.output.endswith((".ndjson", ".jsonl")) else "csv")
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint")
+    resuming = not args.restart and checkpoint.load()
+
+    # Resumed runs keep the date of their predictions, which tells the ones already stored
+    run_date = datetime.fromisoformat(checkpoint.started) if resuming and checkpoint.started else datetime.now()
+    skip_stored = resuming
+
+    paths = find_images(args.root)
+    remaining = checkpoint.remaining(paths) if resuming else paths
+    processed = checkpoint.processed if resuming else 0
+    print(f"{len(paths)} images, {len(remaining)} to classify" + (" (resuming)" if resuming else ""), file=sys.stderr)
+
+    results = ResultFile(args.output, output_format, checkpoint.output_bytes if resuming else None)
+    decode_pool = ProcessPoolExecutor(max_workers=args.decode_workers)
+    started = last_report = time.perf_counter()
+    done = failed = 0
+    try:
+        async for chunk, predictions, errors in classify_files(args.root, remaining, batch_predictor.predict_batch,
+                                                               decode_pool, args.batch_size, args.max_pending):
+            rows = result_rows(chunk, predictions, errors)
+            results.write(rows)
+            if args.database:
+                await store(rows, predictions, run_date, skip_stored)
+                skip_stored = False
+            done += len(chunk)
+            failed += sum(error is not None for error in errors)
+            checkpoint.save(chunk[-1], processed + done, results.sync(), run_date.isoformat())
+
+            now = time.perf_counter()
+            if now - last_report >= args.progress_interval:
+                last_report = now
+                rate = done / (now - started)
+                eta = (len(remaining) - done) / rate if rate else 0
+                print(f"{processed + done}/{len(paths)} images, {rate:.0f} images/s, {failed} failed, "
+                      f"ETA {eta:.0f}s", file=sys.stderr)
+    finally:
+        results.close()
+        decode_pool.shutdown(cancel_futures=True)
+        await batch_predictor.stop()
+
+    elapsed = time.perf_counter() - started
+    print(f"Classified {done} images in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.0f} images/s), "
+          f"{failed} could not be decoded", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify every image of a directory tree without the HTTP API.")
+    parser.add_argument("root", help="The directory of the images")
+    parser.add_argument("--output", required=True, help="The CSV or NDJSON file of the results")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="The format of the results, by extension by default")
+    parser.add_argument("--checkpoint", help="The checkpoint file, the output file with .checkpoint by default")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--database", action="store_true", help="Also store the predictions in the database")
+    parser.add_argument("--batch-size", type=int, default=256, help="The number of images decoded together and run in one forward pass")
+    parser.add_argument("--decode-workers", type=int, default=os.cpu_count(), help="The number of decoding processes")
+    parser.add_argument("--max-pending", type=int, default=4, help="The number of decoded batches waiting for the model")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress reports")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,24 @@
+import argparse
+
+from keras.models import load_model
+
+from src.services.numpy_model import NumpyModel, mmap_directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the Keras CIFAR-10 model for the NumPy inference backend.")
+    parser.add_argument("--source", default="Models/cifar10_best_latest.h5", help="The Keras .h5 model")
+    parser.add_argument("--output", default="Models/cifar10_best_latest.npz", help="The exported .npz file")
+    parser.add_argument("--mmap", action="store_true",
+                        help="Also write the directory of .npy files that workers memory-map and share")
+    args = parser.parse_args()
+
+    model = NumpyModel.from_keras(load_model(args.source))
+    model.save(args.output)
+    if args.mmap:
+        model.save_mmap(mmap_directory(args.output))
+    print(f"Exported {len(model.layers)} layers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.repository.predicts import stream_predictions
+from src.services.export import check_format, export_rows
+
+
+async def main(args):
+    check_format(args.format)
+    output = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    try:
+        async with sessionmanager.session() as session:
+            chunks = stream_predictions(session, args.start, args.end, args.chunk_rows)
+            async for data in export_rows(chunks, args.format):
+                output.write(data)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the prediction history in constant memory.")
+    parser.add_argument("--format", choices=["csv", "ndjson", "parquet"], default="csv",
+                        help="The file format; parquet needs pyarrow")
+    parser.add_argument("--output", default="-", help="The exported file, the standard output by default")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Only export the predictions made from this date")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Only export the predictions made before this date")
+    parser.add_argument("--chunk-rows", type=int, default=settings.export_chunk_rows,
+                        help="The number of rows read from the database at once")
+    asyncio.run(main(parser.parse_args()))
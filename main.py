@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
@@ -10,12 +12,51 @@ from src.routes import picteres
 from src.routes import roles
 from src.routes import comments
 from src.routes import healthchecker
+from src.routes import models
+from src.conf.config import settings
+from src.services.health import health_monitor
+from src.services.image_fetcher import image_fetcher
+from src.services.prediction_writer import prediction_writer
+from src.services.shadow import shadow_evaluator
 
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+
+background_tasks = set()
+
+
+async def load_model():
+    try:
+        await predicts.load_model()
+    except Exception as err:
+        print(f"Model could not be loaded: {err}")
+    await health_monitor.refresh()
+
+
+@app.on_event("startup")
+async def startup():
+    health_monitor.start()
+    predicts.registry_follower.start()
+    # The model loads in the background: the API answers at once and reports ready after the warmup
+    if settings.model_load == "eager":
+        task = asyncio.create_task(load_model())
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await health_monitor.stop()
+    await predicts.registry_follower.stop()
+    await shadow_evaluator.stop()
+    await predicts.batch_predictor.stop()
+    await image_fetcher.close()
+    await prediction_writer.stop()
+
+
 @app.get("/", name='Home', response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request, "message": "Photo App"})
@@ -37,6 +78,7 @@ async def about_us(request: Request):
 
 app.include_router(predicts.router, prefix='/api')
 app.include_router(healthchecker.router, prefix="/api")
+app.include_router(models.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(user_profile.profile_router, prefix="/api")
 app.include_router(roles.router, prefix='/api')
@@ -0,0 +1,39 @@
+"""Add a (prediction_date, id) index for the keyset pagination of predictions
+
+Revision ID: 3f9c2a71d5e8
+Revises: 
+Create Date: 2026-10-17 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a71d5e8'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_predictions_prediction_date_id'
+
+
+def upgrade() -> None:
+    # The tables are created by create_db.py, which already builds the index on new databases
+    if op.get_bind().dialect.name == 'postgresql':
+        # Building the index concurrently does not block the inserts into a large table
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX_NAME, 'predictions', ['prediction_date', 'id'],
+                            postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index(INDEX_NAME, 'predictions', ['prediction_date', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(INDEX_NAME, table_name='predictions', postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(INDEX_NAME, table_name='predictions', if_exists=True)
@@ -0,0 +1,36 @@
+"""Add the hourly prediction counts per label
+
+Revision ID: 8b41d0c6e2a9
+Revises: 3f9c2a71d5e8
+Create Date: 2026-10-17 20:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d0c6e2a9'
+down_revision: Union[str, None] = '3f9c2a71d5e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_db.py already creates the table on new databases;
+    # the counts of the existing predictions are filled by rollup_predictions.py
+    if sa.inspect(op.get_bind()).has_table('prediction_rollups'):
+        return
+    op.create_table(
+        'prediction_rollups',
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('predicted_label', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'predicted_label'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('prediction_rollups')
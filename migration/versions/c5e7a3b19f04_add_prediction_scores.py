@@ -0,0 +1,53 @@
+"""Store the class index, the confidence, the top-k scores and the model version of predictions
+
+Revision ID: c5e7a3b19f04
+Revises: 8b41d0c6e2a9
+Create Date: 2026-10-17 21:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7a3b19f04'
+down_revision: Union[str, None] = '8b41d0c6e2a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_predictions_score'
+COLUMNS = (
+    ('class_index', sa.Integer()),
+    ('score', sa.Float()),
+    ('top_k_scores', sa.LargeBinary()),
+    ('model_version', sa.String(length=16)),
+)
+
+
+def upgrade() -> None:
+    # create_db.py already creates the columns and the index on new databases;
+    # the predictions stored before have no scores and are left out by min_score filters
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('predictions')}
+    for name, column_type in COLUMNS:
+        if name not in existing:
+            op.add_column('predictions', sa.Column(name, column_type, nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Building the index concurrently does not block the inserts into a large table
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX_NAME, 'predictions', ['score'], postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index(INDEX_NAME, 'predictions', ['score'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(INDEX_NAME, table_name='predictions', postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(INDEX_NAME, table_name='predictions', if_exists=True)
+    with op.batch_alter_table('predictions') as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
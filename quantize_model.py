@@ -0,0 +1,35 @@
+import argparse
+
+import numpy as np
+from keras.models import load_model
+
+from src.services.preprocessing import load_image_folder
+from src.services.tflite_model import quantize_keras_model
+
+
+def load_calibration_images(source: str, samples: int) -> np.ndarray:
+    if source == "cifar10":
+        from keras.datasets import cifar10
+        (x_train, _), _ = cifar10.load_data()
+        indices = np.random.default_rng(0).choice(len(x_train), samples, replace=False)
+        return x_train[indices].astype(np.float32) / 255.0
+    images, _ = load_image_folder(source, limit=samples)
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create the int8 quantized version of the CIFAR-10 classifier.")
+    parser.add_argument("--source", default="Models/cifar10_best_latest.h5", help="The Keras .h5 model")
+    parser.add_argument("--output", default="Models/cifar10_best_latest_int8.tflite", help="The quantized model")
+    parser.add_argument("--calibration", default="cifar10",
+                        help="'cifar10' to sample the CIFAR-10 training set, or a folder of images")
+    parser.add_argument("--samples", type=int, default=500, help="The number of calibration images")
+    args = parser.parse_args()
+
+    images = load_calibration_images(args.calibration, args.samples)
+    size = quantize_keras_model(load_model(args.source), images, args.output)
+    print(f"Calibrated on {len(images)} images, wrote {size} bytes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+
+from src.services.model_registry import model_registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add a model artifact to the model registry.")
+    parser.add_argument("source", help="The .h5, .npz or .tflite file, or a directory of memory-mapped weights")
+    parser.add_argument("--name", help="The version name, v1, v2... by default")
+    parser.add_argument("--backend", choices=["keras", "numpy", "tflite"], help="Guessed from the extension by default")
+    parser.add_argument("--description", default="", help="A free description, e.g. the training run")
+    parser.add_argument("--activate", action="store_true",
+                        help="Make it the active version; running workers switch to it within MODEL_REGISTRY_POLL_S")
+    args = parser.parse_args()
+
+    version = model_registry.register(args.source, args.backend, args.name, args.description)
+    if args.activate:
+        model_registry.activate(version.name)
+    print(f"Registered {version.name} ({version.backend}, sha256 {version.sha256[:12]})"
+          + (", active" if args.activate else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import argparse
+import asyncio
+from datetime import datetime
+
+from src.database.db import sessionmanager
+from src.repository.predicts import rebuild_rollups
+
+
+async def main(since: datetime = None):
+    async with sessionmanager.session() as session:
+        rows = await rebuild_rollups(session, since)
+    print(f"Wrote {rows} hourly counts" + (f" since {since.isoformat()}" if since else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the hourly prediction counts served by /api/predicts/stats.")
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                        help="The first hour to recompute, e.g. 2024-05-01T00:00; the whole history by default")
+    args = parser.parse_args()
+    asyncio.run(main(args.since))
@@ -18,10 +18,59 @@ class Settings(BaseSettings):
     mail_server: str
     redis_host: str
     redis_port: int
+    predict_batch_max_size: int = 16
+    predict_batch_max_wait_ms: float = 5.0
+    predict_queue_max_size: int = 256
+    predict_timeout_s: float = 10.0
+    inference_executor: str = "thread"
+    inference_workers: int = 1
+    inference_backend: str = "keras"
+    numpy_model_path: str = "Models/cifar10_best_latest.npz"
+    numpy_model_mmap: bool = False
+    tflite_model_path: str = "Models/cifar10_best_latest_int8.tflite"
+    model_load: str = "eager"
+    model_warmup_batches: int = 2
+    health_check_interval_s: float = 5.0
+    health_check_timeout_s: float = 2.0
+    prediction_cache_max_entries: int = 10000
+    prediction_cache_max_bytes: int = 16 * 1024 * 1024
+    prediction_cache_redis: bool = False
+    prediction_cache_ttl_s: int = 86400
+    phash_enabled: bool = True
+    phash_max_distance: int = 2
+    phash_index_size: int = 4096
+    decode_workers: int = 4
+    batch_max_images: int = 64
+    batch_max_bytes: int = 50 * 1024 * 1024
+    fetch_max_connections: int = 100
+    fetch_max_per_host: int = 4
+    fetch_connect_timeout_s: float = 3.0
+    fetch_read_timeout_s: float = 10.0
+    fetch_max_bytes: int = 10 * 1024 * 1024
+    url_cache_enabled: bool = True
+    url_cache_dir: str = "cache/urls"
+    url_cache_max_bytes: int = 256 * 1024 * 1024
+    prediction_preview: bool = True
+    prediction_preview_size: int = 256
+    prediction_write_behind: bool = True
+    prediction_flush_rows: int = 100
+    prediction_flush_interval_ms: float = 200.0
+    prediction_buffer_max: int = 10000
+    export_chunk_rows: int = 1000
+    prediction_stored_top_k: int = 5
+    model_registry_dir: str = "Models/registry"
+    model_registry_poll_s: float = 5.0
+    shadow_sample_rate: float = 0.0
+    shadow_max_concurrency: int = 2
+    tta_enabled: bool = True
+    tta_views: int = 10
+    tta_latency_budget_ms: float = 100.0
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
+        # The model_* settings are not pydantic internals
+        protected_namespaces = ("settings_",)
 
 
 settings = Settings()
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy import text
 from sqlalchemy.orm import DeclarativeBase
 
 from src.conf.config import settings
@@ -57,6 +58,33 @@ class DatabaseSessionManager:
             await session.close()
 
 
+    def pool_status(self) -> dict:
+        """Return the connection pool counters of the engine.
+
+        Pools without a fixed size, such as the NullPool used for SQLite, report no counters.
+
+        :return: The pool size, checked-out connections and overflow.
+        :rtype: dict
+        """
+        pool = self._engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {"pool": type(pool).__name__}
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        }
+
+    async def ping(self):
+        """Run ``SELECT 1`` on a pooled connection.
+
+        :raises Exception: If the database cannot be reached.
+        """
+        async with self._engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+
 # Create an instance of DatabaseSessionManager with the PostgreSQL URL from settings
 sessionmanager = DatabaseSessionManager(settings.postgres_url)
 
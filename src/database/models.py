@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, Text, String, Boolean, func
+import struct
+
+from sqlalchemy import Column, Integer, Text, String, Boolean, Float, LargeBinary, Index, func
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import DateTime
@@ -12,6 +14,37 @@ class Prediction(Base):
     filename = Column(String, nullable=True)  
     url = Column(String, nullable=True)       
     predicted_label = Column(String)
+    class_index = Column(Integer, nullable=True)
+    score = Column(Float, nullable=True)
+    # The most probable classes, packed as (uint8 class index, float32 probability) pairs
+    top_k_scores = Column(LargeBinary, nullable=True)
+    model_version = Column(String(16), nullable=True)
+
+    # Supports the keyset pagination of the prediction history, newest first,
+    # and the filtering by minimum confidence
+    __table_args__ = (Index("ix_predictions_prediction_date_id", "prediction_date", "id"),
+                      Index("ix_predictions_score", "score"))
+
+    @staticmethod
+    def pack_top_k(probabilities, k: int) -> bytes:
+        """Packs the k most probable classes of a probability vector, 5 bytes per class."""
+        ranked = sorted(range(len(probabilities)), key=lambda i: probabilities[i], reverse=True)[:k]
+        return b"".join(struct.pack("<Bf", i, probabilities[i]) for i in ranked)
+
+    @property
+    def top_k(self) -> list[dict] | None:
+        """The most probable classes, most probable first, unpacked from top_k_scores."""
+        if self.top_k_scores is None:
+            return None
+        return [{"class_index": i, "probability": p} for i, p in struct.iter_unpack("<Bf", self.top_k_scores)]
+
+
+class PredictionRollup(Base):
+    """Model representing the number of predictions of a label in an hour."""
+    __tablename__ = "prediction_rollups"
+    bucket = Column(DateTime, primary_key=True)
+    predicted_label = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
 
 
 class UserRole(Base):
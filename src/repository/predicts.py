@@ -1,17 +1,23 @@
+import base64
+from collections import Counter
 from datetime import datetime
+from typing import AsyncIterator
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, tuple_, delete, insert, func, type_coerce, DateTime
+from sqlalchemy.dialects import postgresql, sqlite
 
-from src.database.models import Prediction
+from src.database.models import Prediction, PredictionRollup
 
 
-async def create_prediction(filename: str, url: str, predicted_label: str, db: AsyncSession) -> Prediction:
+async def create_prediction(filename: str, url: str, predicted_label: str, db: AsyncSession,
+                            **scores) -> Prediction:
     """
     Creates a prediction entry in the database.
 
     :param db: AsyncSession: A connection to the Postgres SQL database.
     :param prediction: PredictionCreate: The prediction data to be stored.
+    :param scores: The optional class_index, score, top_k_scores and model_version of the prediction.
     :return: Prediction: The created prediction object.
     """
     prediction_date = datetime.now()
@@ -19,11 +25,13 @@ async def create_prediction(filename: str, url: str, predicted_label: str, db: A
         prediction_date=prediction_date,
         filename=filename,
         url=url,
-        predicted_label=predicted_label
+        predicted_label=predicted_label,
+        **scores
     )
     
     try:
         db.add(db_prediction)
+        await increment_rollups([{"prediction_date": prediction_date, "predicted_label": predicted_label}], db)
         await db.commit()
         await db.refresh(db_prediction)
         return db_prediction
@@ -31,17 +39,80 @@ async def create_prediction(filename: str, url: str, predicted_label: str, db: A
         return None
 
 
-async def get_predictions(limit: int, offset: int, db: AsyncSession):
+async def create_predictions(predictions: list[dict], db: AsyncSession) -> list[Prediction]:
+    """
+    Creates many prediction entries in the database with a single commit.
+
+    :param predictions: list[dict]: The filename, url and predicted_label of every prediction.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: list[Prediction]: The created prediction objects, or None if the insert failed.
+    """
+    prediction_date = datetime.now()
+    db_predictions = [Prediction(prediction_date=prediction_date, **prediction) for prediction in predictions]
+
+    try:
+        db.add_all(db_predictions)
+        await increment_rollups([{"prediction_date": prediction_date, **prediction} for prediction in predictions], db)
+        await db.commit()
+        return db_predictions
+    except Exception as e:
+        await db.rollback()
+        return None
+
+
+async def insert_predictions(predictions: list[dict], db: AsyncSession) -> int:
+    """
+    Stores many prediction rows with one multi-row INSERT and one commit, without loading them back.
+
+    :param predictions: list[dict]: The prediction_date, filename, url and predicted_label of every prediction.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: int: The number of stored predictions.
+    :raises Exception: The database error; nothing is stored then.
+    """
+    if not predictions:
+        return 0
+    # A multi-row INSERT needs the same columns in every row
+    columns = set().union(*predictions)
+    predictions = [{column: prediction.get(column) for column in columns} for prediction in predictions]
+    await db.execute(insert(Prediction), predictions)
+    await increment_rollups(predictions, db)
+    await db.commit()
+    return len(predictions)
+
+
+async def get_stored_filenames(filenames: list[str], prediction_date: datetime, model_version: str,
+                               db: AsyncSession) -> set[str]:
+    """
+    Finds which of the given files already have a prediction stored at a date by a model version.
+
+    :param filenames: list[str]: The file names to look for.
+    :param prediction_date: datetime: The date of the predictions.
+    :param model_version: str: The version of the model that made them.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: set[str]: The file names that have such a prediction.
+    """
+    if not filenames:
+        return set()
+    query = select(Prediction.filename).where(Prediction.filename.in_(filenames),
+                                              Prediction.prediction_date == prediction_date,
+                                              Prediction.model_version == model_version)
+    return set((await db.execute(query)).scalars())
+
+
+async def get_predictions(limit: int, offset: int, db: AsyncSession, min_score: float = None):
     """
     Retrieves a list of predictions from the database.
 
     :param limit: int: The number of predictions to return.
     :param offset: int: The number of predictions to skip.
     :param db: AsyncSession: A connection to the Postgres SQL database.
+    :param min_score: float: Only return the predictions with at least this confidence, if given.
     :return: list: A list of prediction objects.
     """
-
-    result = await db.execute(select(Prediction).order_by(Prediction.prediction_date.desc()).limit(limit).offset(offset))
+    query = select(Prediction).order_by(Prediction.prediction_date.desc())
+    if min_score is not None:
+        query = query.where(Prediction.score >= min_score)
+    result = await db.execute(query.limit(limit).offset(offset))
     predicts = result.fetchall()
     if predicts:
         pr_dick = []
@@ -50,3 +121,173 @@ async def get_predictions(limit: int, offset: int, db: AsyncSession):
         return pr_dick
     else:
         return None
+
+
+def encode_cursor(prediction: Prediction) -> str:
+    """
+    Builds the opaque cursor pointing after a prediction in the history.
+
+    :param prediction: Prediction: The last prediction of a page.
+    :return: str: The URL-safe cursor.
+    """
+    position = f"{prediction.prediction_date.isoformat()}|{prediction.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Reads a cursor built by encode_cursor.
+
+    :param cursor: str: The cursor.
+    :return: tuple: The prediction date and the id of the last prediction of the previous page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prediction_date, prediction_id = position.split("|")
+        return datetime.fromisoformat(prediction_date), int(prediction_id)
+    except (ValueError, UnicodeDecodeError) as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+
+
+async def get_predictions_page(limit: int, cursor: str | None, db: AsyncSession,
+                               min_score: float = None) -> tuple[list[Prediction], str | None]:
+    """
+    Retrieves a page of the prediction history, newest first, with keyset pagination.
+
+    Pages start after the (prediction_date, id) of the cursor, so the ix_predictions_prediction_date_id
+    index is walked from that position and a deep page costs the same as the first one.
+
+    :param limit: int: The number of predictions to return.
+    :param cursor: str: The cursor returned with the previous page, or None for the first page.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :param min_score: float: Only return the predictions with at least this confidence, if given;
+        predictions stored without a score are left out. Selective thresholds use ix_predictions_score.
+    :return: tuple: The predictions and the cursor of the next page, None on the last page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    query = select(Prediction).order_by(Prediction.prediction_date.desc(), Prediction.id.desc())
+    if min_score is not None:
+        query = query.where(Prediction.score >= min_score)
+    if cursor is not None:
+        query = query.where(tuple_(Prediction.prediction_date, Prediction.id) < decode_cursor(cursor))
+    result = await db.execute(query.limit(limit + 1))
+    predictions = list(result.scalars())
+    if len(predictions) > limit:
+        return predictions[:limit], encode_cursor(predictions[limit - 1])
+    return predictions, None
+
+
+async def stream_predictions(db: AsyncSession, start: datetime = None, end: datetime = None,
+                             chunk_size: int = 1000) -> AsyncIterator[list[tuple]]:
+    """
+    Reads the prediction history in chunks, oldest first, through a server-side cursor.
+
+    Only one chunk of rows is held in memory at a time, whatever the size of the table.
+
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :param start: datetime: Only read the predictions made from this date, if given.
+    :param end: datetime: Only read the predictions made before this date, if given.
+    :param chunk_size: int: The number of rows fetched at once.
+    :return: AsyncIterator: Lists of (id, prediction_date, filename, url, predicted_label, class_index,
+        score, model_version) rows.
+    """
+    query = (select(Prediction.id, Prediction.prediction_date, Prediction.filename, Prediction.url,
+                    Prediction.predicted_label, Prediction.class_index, Prediction.score, Prediction.model_version)
+             .order_by(Prediction.prediction_date, Prediction.id))
+    if start is not None:
+        query = query.where(Prediction.prediction_date >= start)
+    if end is not None:
+        query = query.where(Prediction.prediction_date < end)
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    try:
+        async for rows in result.partitions():
+            yield [tuple(row) for row in rows]
+    finally:
+        await result.close()
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    """
+    Truncates a date to the start of its hour, the bucket of the prediction rollups.
+
+    :param moment: datetime: The date.
+    :return: datetime: The start of the hour.
+    """
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+async def increment_rollups(predictions: list[dict], db: AsyncSession):
+    """
+    Adds predictions to the hourly counts per label, in the transaction of the caller.
+
+    The counts of a call are summed in memory, so one upsert is sent per (hour, label)
+    whatever the number of predictions. The rows are upserted in (hour, label) order, so that
+    concurrent flushes lock them in the same order and cannot deadlock. The caller commits.
+
+    :param predictions: list[dict]: The prediction_date and predicted_label of every prediction.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    """
+    counts = Counter((hour_bucket(prediction["prediction_date"]), prediction["predicted_label"])
+                     for prediction in predictions)
+    if not counts:
+        return
+    dialect = sqlite if db.get_bind().dialect.name == "sqlite" else postgresql
+    statement = dialect.insert(PredictionRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=[PredictionRollup.bucket, PredictionRollup.predicted_label],
+        set_={"count": PredictionRollup.count + statement.excluded.count})
+    await db.execute(statement, [{"bucket": bucket, "predicted_label": label, "count": count}
+                                 for (bucket, label), count in sorted(counts.items())])
+
+
+async def rebuild_rollups(db: AsyncSession, since: datetime = None) -> int:
+    """
+    Recomputes the hourly counts per label from the predictions table.
+
+    Backfills the rollups of predictions stored before they existed and repairs drifted counts.
+    The hours from ``since`` on are replaced in one transaction; predictions written meanwhile
+    may be missed, so it is best run while the application is idle.
+
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :param since: datetime: The first hour to recompute, None for the whole history.
+    :return: int: The number of rollup rows written.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        # The text format of the dates stored by SQLAlchemy, truncated to the hour
+        bucket = type_coerce(func.strftime("%Y-%m-%d %H:00:00.000000", Prediction.prediction_date), DateTime)
+    else:
+        bucket = func.date_trunc("hour", Prediction.prediction_date)
+    query = (select(bucket.label("bucket"), Prediction.predicted_label, func.count().label("count"))
+             .where(Prediction.prediction_date.is_not(None))
+             .group_by(bucket, Prediction.predicted_label))
+    clear = delete(PredictionRollup)
+    if since is not None:
+        since = hour_bucket(since)
+        query = query.where(Prediction.prediction_date >= since)
+        clear = clear.where(PredictionRollup.bucket >= since)
+
+    await db.execute(clear)
+    result = await db.execute(insert(PredictionRollup).from_select(["bucket", "predicted_label", "count"], query))
+    await db.commit()
+    return result.rowcount
+
+
+async def get_prediction_stats(start: datetime, end: datetime, db: AsyncSession,
+                               label: str = None) -> list[tuple[datetime, str, int]]:
+    """
+    Retrieves the hourly counts per label of a time range from the rollups.
+
+    :param start: datetime: The start of the range; its hour is included.
+    :param end: datetime: The end of the range, excluded.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :param label: str: Only count this label, if given.
+    :return: list: The hour, the label and the number of predictions, oldest hour first.
+    """
+    query = (select(PredictionRollup.bucket, PredictionRollup.predicted_label, PredictionRollup.count)
+             .where(PredictionRollup.bucket >= hour_bucket(start), PredictionRollup.bucket < end)
+             .order_by(PredictionRollup.bucket, PredictionRollup.predicted_label))
+    if label is not None:
+        query = query.where(PredictionRollup.predicted_label == label)
+    result = await db.execute(query)
+    return [tuple(row) for row in result]
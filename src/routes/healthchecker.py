@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from src.database.db import get_db
+from src.services.health import health_monitor
 
 router = APIRouter(prefix="/healthchecker", tags=["healthchecker"])
 
@@ -35,3 +36,29 @@ async def healthchecker(db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error connecting to the database"
         )
+
+
+@router.get("/live")
+async def liveness():
+    """
+    Liveness probe: answers as long as the event loop is running, without any I/O.
+
+    :return: A dictionary with the status of the process.
+    :rtype: dict
+    """
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """
+    Readiness probe served from the snapshot of the background health checks:
+    model loaded and warmed up, inference queue depth, database connection pool and cache.
+
+    :return: The last health snapshot.
+    :rtype: dict
+    """
+    snapshot = health_monitor.snapshot
+    if not snapshot["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return snapshot
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from src.routes.predicts import registry_follower
+from src.services.auth_admin import is_admin
+from src.services.model_registry import ModelNotFoundError, model_registry
+from src.services.shadow import shadow_evaluator
+
+
+router = APIRouter(prefix='/models', tags=["models"], dependencies=[Depends(is_admin)])
+
+
+@router.get("/")
+async def get_models():
+    """
+    Lists the versions of the model registry and the version served by this worker.
+
+    :return: dict: The registered versions, the active one and the state of this worker.
+    """
+    active = model_registry.active()
+    return {"active": active.name if active is not None else None,
+            "versions": [version._asdict() for version in model_registry.versions()],
+            "worker": registry_follower.snapshot()}
+
+
+@router.post("/{version}/activate", status_code=status.HTTP_202_ACCEPTED)
+async def activate_model(version: str):
+    """
+    Makes a registered version the active one. It is loaded and warmed up in the background,
+    then swapped in without interrupting the requests; the other workers follow within
+    MODEL_REGISTRY_POLL_S seconds.
+
+    :param version: str: The version to activate.
+    :return: dict: The active version and the state of this worker.
+    :raises HTTPException 404: If the version is not registered.
+    """
+    try:
+        model_registry.activate(version)
+    except ModelNotFoundError as err:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    registry_follower.trigger()
+    return {"active": version, "worker": registry_follower.snapshot()}
+
+
+@router.get("/shadow")
+async def get_shadow():
+    """
+    Compares the shadowed candidate with the served model, on the requests sampled by this worker.
+
+    :return: dict: The shadowed version and the state of the comparison in this worker.
+    """
+    candidate = model_registry.shadow()
+    return {"shadow": candidate.name if candidate is not None else None,
+            "serving": registry_follower.manager.version,
+            "worker": shadow_evaluator.snapshot()}
+
+
+@router.put("/{version}/shadow", status_code=status.HTTP_202_ACCEPTED)
+async def shadow_model(version: str):
+    """
+    Makes a registered version the shadowed candidate. SHADOW_SAMPLE_RATE of the images classified
+    by the served model are also classified by the candidate in the background, and the two are
+    compared; the responses never wait for the candidate.
+
+    :param version: str: The version to shadow.
+    :return: dict: The shadowed version and the state of the comparison in this worker.
+    :raises HTTPException 404: If the version is not registered.
+    """
+    try:
+        model_registry.set_shadow(version)
+    except ModelNotFoundError as err:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(err))
+    registry_follower.trigger()
+    return {"shadow": version, "worker": shadow_evaluator.snapshot()}
+
+
+@router.delete("/shadow")
+async def stop_shadow():
+    """
+    Stops shadowing a candidate in every worker.
+
+    :return: dict: The comparison with the candidate in this worker, before it is dropped.
+    """
+    snapshot = shadow_evaluator.snapshot()
+    model_registry.set_shadow(None)
+    registry_follower.trigger()
+    return {"shadow": None, "worker": snapshot}
@@ -1,30 +1,477 @@
-from fastapi import APIRouter, UploadFile, File, Request, Depends, Form, requests, Query
+from fastapi import APIRouter, UploadFile, File, Request, Response, Depends, Form, requests, Query, HTTPException, status
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from io import BytesIO
-from keras.models import load_model
-from PIL import Image
+from typing import Literal
 from urllib.parse import urlparse
 import numpy as np
-import requests
+import asyncio
+import zipfile
+import redis.asyncio as redis
 import base64
 import imghdr
 
+from src.conf.config import settings
 from src.database.db import get_db
-from src.repository.predicts import create_prediction
-from src.repository.predicts import get_predictions as fetch_predictions
-from src.schemas import PredictionCreate, PredictionModel
+from src.database.models import Prediction
+from src.repository.predicts import create_prediction, create_predictions
+from src.repository.predicts import get_predictions as fetch_predictions, get_predictions_page, get_prediction_stats
+from src.repository.predicts import stream_predictions
+from src.schemas import PredictionCreate, PredictionModel, BatchPredictionResponse, PredictionResponse
+from src.schemas import PredictionStats, PredictionStatsBucket
+from src.services.inference import BatchPredictor, QueueFullError, InferenceTimeoutError
+from src.services.inference import create_executor, process_predict, warm_process_pool
+from src.services.model_manager import model_manager
+from src.services.model_registry import ModelVersion, model_registry
+from src.services.registry_follower import RegistryFollower
+from src.services.shadow import shadow_evaluator
+from src.services.tta import test_time_augmentation
+from src.services.export import MEDIA_TYPES, ExportFormatError, check_format, export_rows
+from src.services.health import health_monitor
+from src.services.image_fetcher import image_fetcher, normalize_url, FetchError, ImageTooLargeError
+from src.services.image_hash import HammingIndex, image_signature
+from src.services.metrics import metrics, StageTimer
+from src.services.prediction_cache import PredictionCache
+from src.services.prediction_writer import prediction_writer
+from src.services.single_flight import SingleFlight
+from src.services.preprocessing import decode_image, make_preview
+from src.services.url_cache import url_cache
 
 router = APIRouter(prefix='/predicts', tags=["predicts"])
-model = load_model('Models/cifar10_best_latest.h5')
+if settings.inference_executor == "process":
+    predict_fn = process_predict
+else:
+    predict_fn = model_manager.predict
+batch_predictor = BatchPredictor(predict_fn,
+                                 max_batch_size=settings.predict_batch_max_size,
+                                 max_wait_ms=settings.predict_batch_max_wait_ms,
+                                 max_queue_size=settings.predict_queue_max_size,
+                                 executor=create_executor(settings.inference_executor, settings.inference_workers,
+                                                          model_manager.backend, model_manager.model_path,
+                                                          model_manager.mmap),
+                                 max_concurrent_batches=settings.inference_workers,
+                                 timeout=settings.predict_timeout_s)
+prediction_cache = PredictionCache(max_entries=settings.prediction_cache_max_entries,
+                                   max_bytes=settings.prediction_cache_max_bytes,
+                                   redis_client=redis.Redis(host=settings.redis_host, port=settings.redis_port)
+                                   if settings.prediction_cache_redis else None,
+                                   ttl=settings.prediction_cache_ttl_s)
+near_duplicates = HammingIndex(capacity=settings.phash_index_size,
+                               max_distance=settings.phash_max_distance)
+decode_executor = ThreadPoolExecutor(max_workers=settings.decode_workers, thread_name_prefix="decode")
+prediction_flights = SingleFlight("prediction")
+url_flights = SingleFlight("url_fetch")
+
+
+async def check_inference() -> dict:
+    return {"ok": True, "queue_depth": batch_predictor.queue_depth(), "queue_limit": batch_predictor.max_queue_size}
+
+
+async def check_cache() -> dict:
+    await prediction_cache.redis.ping()
+    return {"ok": True, "entries": len(prediction_cache)}
+
+
+health_monitor.add_check("inference", check_inference, critical=False)
+if prediction_cache.redis is not None:
+    # The cache degrades to the in-memory tier when Redis is down, so it does not affect readiness
+    health_monitor.add_check("cache", check_cache, critical=False)
 
 templates = Jinja2Templates(directory="templates")
 class_labels = ['Літак', 'Автомобіль', 'Птах', 'Кіт',
                 'Олень', 'Собака', 'Жаба', 'Кінь', 'Корабель', 'Вантажівка']
 
 
+async def load_model():
+    """
+    Loads and warms up the model in the inference executor, off the event loop.
+    Called from the application startup hook when MODEL_LOAD is "eager".
+    """
+    if settings.inference_executor == "process":
+        # Every worker process loads and warms up its own copy in the pool initializer
+        try:
+            await warm_process_pool(batch_predictor.executor, settings.inference_workers)
+        except Exception as err:
+            # Reported by the readiness check
+            model_manager.error = str(err) or type(err).__name__
+            raise
+        model_manager.loaded = model_manager.warmed = True
+        model_manager.error = None
+    else:
+        await asyncio.get_running_loop().run_in_executor(batch_predictor.executor, model_manager.load)
+
+
+async def swap_model(version: ModelVersion):
+    """
+    Loads and warms up a registered model version, then serves it instead of the current one.
+
+    The current model answers the requests until the new one is warm. With process workers a new
+    pool is started for the new version, and the previous pool exits once its batches are done.
+
+    :param version: ModelVersion: The version to serve.
+    :raises Exception: The error raised while loading the version; the current model stays in place.
+    """
+    loop = asyncio.get_running_loop()
+    if settings.inference_executor == "process":
+        executor = create_executor("process", settings.inference_workers, version.backend, version.path,
+                                   model_manager.mmap)
+        try:
+            await warm_process_pool(executor, settings.inference_workers)
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        previous, batch_predictor.executor = batch_predictor.executor, executor
+        model_manager.use(version.backend, version.path, version.name)
+        previous.shutdown(wait=False)
+    else:
+        # Not in the inference executor, which keeps running the current model meanwhile
+        await loop.run_in_executor(None, model_manager.swap, version.backend, version.path, version.name)
+    # Unlike the caches, the near-duplicate index is not keyed by model version
+    near_duplicates.clear()
+
+
+registry_follower = RegistryFollower(model_registry, model_manager, swap_model, settings.model_registry_poll_s,
+                                     shadow_evaluator)
+
+
+def to_result(prediction: np.ndarray, version: str) -> dict:
+    """
+    Converts the model output for one image into a JSON-serializable prediction.
+
+    :param prediction: np.ndarray: The class probabilities.
+    :param version: str: The version of the model that made the prediction.
+    :return: dict: The predicted label, the class index, the class probabilities and the model version.
+    """
+    predicted_class = int(np.argmax(prediction))
+    return {"label": class_labels[predicted_class],
+            "class_index": predicted_class,
+            "probabilities": [float(p) for p in prediction],
+            "model_version": version}
+
+
+def result_version(result: dict) -> str:
+    """
+    The version of the model that made a prediction.
+
+    :param result: dict: The prediction.
+    :return: str: Its model version; predictions cached before it was recorded belong to the served model.
+    """
+    return result.get("model_version") or model_manager.version
+
+
+async def remember(key: str, signature, result: dict):
+    """
+    Stores a fresh prediction in the content-hash cache and in the near-duplicate index.
+
+    :param key: str: The content-hash cache key of the image.
+    :param signature: ImageSignature: The perceptual signature, or None when it is not computed.
+    :param result: dict: The prediction.
+    """
+    await prediction_cache.set(key, result)
+    if signature is not None:
+        near_duplicates.add(signature, result)
+
+
+def find_near_duplicate(image_array: np.ndarray):
+    """
+    Looks up a recently classified near-identical image.
+
+    :param image_array: np.ndarray: The preprocessed image.
+    :return: tuple: The signature of the image (None when disabled) and the reused prediction or None.
+    """
+    if not settings.phash_enabled:
+        return None, None
+    signature = image_signature(image_array)
+    result = near_duplicates.search(signature)
+    if result is not None and result_version(result) != model_manager.version:
+        # Made by a model that has been swapped out since
+        return signature, None
+    return signature, result
+
+
+def use_tta(requested: bool) -> bool:
+    """
+    Decides whether a prediction is made with test-time augmentation.
+
+    :param requested: bool: Whether the client asked for it.
+    :return: bool: Whether it is enabled and the recent augmented predictions were within the latency budget.
+    """
+    return requested and settings.tta_enabled and test_time_augmentation.admit()
+
+
+def cache_version(tta: bool = False, version: str = None) -> str:
+    """
+    The version the cached predictions are stored under: augmented predictions are cached apart.
+
+    :param tta: bool: Whether the prediction is made with test-time augmentation.
+    :param version: str: The model version, the served one by default.
+    :return: str: The model version, tagged with the number of views for augmented predictions.
+    """
+    version = version or model_manager.version
+    if tta:
+        return f"{version}+tta{test_time_augmentation.views}"
+    return version
+
+
+async def classify(f: bytes, timer: StageTimer = None, tta: bool = False) -> dict:
+    """
+    Classifies an image, reusing the cached result when the same bytes were classified before
+    or when a near-identical picture was classified recently. Concurrent requests for the same
+    bytes share a single computation.
+
+    :param f: bytes: The raw bytes of the image.
+    :param timer: StageTimer: Receives the duration of every stage and the source of the prediction.
+    :param tta: bool: Whether to average the predictions of augmented views, see :func:`use_tta`.
+    :return: dict: The predicted label, the class index and the class probabilities.
+    :raises QueueFullError: If the inference queue is full.
+    :raises InferenceTimeoutError: If the prediction takes too long.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("cache"):
+        key = prediction_cache.key(f, cache_version(tta))
+        cached = await prediction_cache.get(key)
+    if cached is not None:
+        timer.source = "cache"
+        return cached
+    result = await prediction_flights.do(key, lambda: predict_uncached(key, f, timer, tta))
+    if timer.source is None:
+        # Another request for the same bytes ran the computation
+        timer.source = "coalesced"
+    return result
+
+
+async def predict_uncached(key: str, f: bytes, timer: StageTimer, tta: bool = False) -> dict:
+    """
+    Decodes and classifies an image that is not in the content-hash cache.
+
+    :param key: str: The content-hash cache key of the image.
+    :param f: bytes: The raw bytes of the image.
+    :param timer: StageTimer: Receives the duration of every stage and the source of the prediction.
+    :param tta: bool: Whether to average the predictions of augmented views.
+    :return: dict: The prediction.
+    """
+    with timer.stage("decode"):
+        image_array = await asyncio.get_running_loop().run_in_executor(decode_executor, decode_image, f)
+
+    version = model_manager.version
+    if tta:
+        # The near-duplicate index and the shadow model only deal with single-view predictions
+        with timer.stage("infer"):
+            prediction = await test_time_augmentation.predict(image_array, batch_predictor.predict_batch)
+        timer.source = "model"
+        result = to_result(prediction, version)
+        result["views"] = test_time_augmentation.views
+        if model_manager.version == version:
+            await prediction_cache.set(key, result)
+        return result
+
+    with timer.stage("preprocess"):
+        signature, result = find_near_duplicate(image_array)
+    if result is not None:
+        timer.source = "near_duplicate"
+        await prediction_cache.set(key, result)
+        return result
+
+    with timer.stage("infer"):
+        prediction = await batch_predictor.predict(image_array)
+    timer.source = "model"
+    result = to_result(prediction, version)
+    # Off the response path: the candidate model runs in the background, if at all
+    shadow_evaluator.submit(image_array, result["class_index"], timer.stages["infer"])
+    if model_manager.version == version:
+        # Otherwise a swap completed during the inference, which either model may have run
+        await remember(key, signature, result)
+    return result
+
+
+def top_k(result: dict, k: int) -> list[dict]:
+    """
+    Lists the most probable classes of a prediction.
+
+    :param result: dict: The prediction.
+    :param k: int: The number of classes.
+    :return: list: The label, class index and probability of the k most probable classes.
+    """
+    probabilities = np.asarray(result["probabilities"])
+    return [{"label": class_labels[i], "class_index": int(i), "probability": float(probabilities[i])}
+            for i in np.argsort(probabilities)[::-1][:k]]
+
+
+def to_response(result: dict, timer: StageTimer, k: int, filename: str, url: str = '') -> dict:
+    """
+    Builds the JSON response of a single prediction.
+
+    :param result: dict: The prediction.
+    :param timer: StageTimer: The durations of the stages of the request.
+    :param k: int: The number of classes in the top-k list.
+    :param filename: str: The name of the image.
+    :param url: str: The URL of the image, empty for uploads.
+    :return: dict: The response matching PredictionResponse.
+    """
+    return {"filename": filename,
+            "url": url,
+            "predicted_label": result["label"],
+            "class_index": result["class_index"],
+            "score": max(result["probabilities"]),
+            "top_k": top_k(result, k),
+            "model_version": result_version(result),
+            "views": result.get("views", 1),
+            "source": timer.source,
+            "timings_ms": timer.milliseconds()}
+
+
+def prediction_row(filename: str, url: str, result: dict) -> dict:
+    """
+    Builds the stored row of a prediction, with its confidence and its most probable classes,
+    so that the history can be filtered and re-ranked without running the model again.
+
+    :param filename: str: The name of the image.
+    :param url: str: The URL of the image, empty for uploads.
+    :param result: dict: The prediction.
+    :return: dict: The values of the Prediction columns.
+    """
+    probabilities = result["probabilities"]
+    return {"filename": filename,
+            "url": url,
+            "predicted_label": result["label"],
+            "class_index": result["class_index"],
+            "score": max(probabilities),
+            "top_k_scores": Prediction.pack_top_k(probabilities, settings.prediction_stored_top_k),
+            "model_version": result_version(result)}
+
+
+async def record_predictions(rows: list[dict], db: AsyncSession):
+    """
+    Stores prediction rows, behind the request through the write-behind buffer when it is enabled.
+
+    :param rows: list[dict]: The rows built by prediction_row.
+    :param db: AsyncSession: A connection to the Postgres SQL database, used without write-behind.
+    """
+    if settings.prediction_write_behind:
+        prediction_writer.add_many(rows)
+    elif len(rows) == 1:
+        await create_prediction(db=db, **rows[0])
+    else:
+        await create_predictions(rows, db)
+
+
+async def render_image(f: bytes) -> tuple[str, str]:
+    """
+    Encodes the image shown on the result page: a small preview re-encoded off the event loop,
+    or the original bytes when previews are disabled.
+
+    :param f: bytes: The raw bytes of the image.
+    :return: tuple: The base64 text of the image and its MIME type.
+    """
+    if settings.prediction_preview:
+        f, image_type = await asyncio.get_running_loop().run_in_executor(
+            decode_executor, make_preview, f, settings.prediction_preview_size)
+    else:
+        image_type = "image/png"
+    return base64.b64encode(f).decode('utf-8'), image_type
+
+
+async def fetch_url(url: str) -> tuple:
+    """
+    Downloads an image, through the URL cache when it is enabled.
+    Concurrent requests for the same URL share a single download.
+
+    :param url: str: The URL of the image.
+    :return: tuple: The URL cache entry (None without the cache) and the bytes of the image.
+    :raises FetchError: If the image cannot be downloaded.
+    """
+    url = normalize_url(url)
+    if settings.url_cache_enabled:
+        return await url_flights.do(url, lambda: url_cache.fetch(url, image_fetcher))
+    return None, await url_flights.do(url, lambda: image_fetcher.fetch(url))
+
+
+async def classify_many(images: list[bytes]) -> list:
+    """
+    Classifies many images at once: cached images are answered directly, the others are decoded
+    in parallel and sent to the model in a few batched forward passes.
+
+    :param images: list[bytes]: The raw bytes of the images.
+    :return: list: The prediction of every image, or the exception raised while decoding it.
+    :raises QueueFullError: If the predictor is overloaded.
+    :raises InferenceTimeoutError: If the predictions take too long.
+    """
+    loop = asyncio.get_running_loop()
+    keys = [prediction_cache.key(f, model_manager.version) for f in images]
+    results = [await prediction_cache.get(key) for key in keys]
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    decoded = await asyncio.gather(*(loop.run_in_executor(decode_executor, decode_image, images[i])
+                                     for i in pending), return_exceptions=True)
+
+    to_predict = []
+    for i, image_array in zip(pending, decoded):
+        if isinstance(image_array, Exception):
+            results[i] = image_array
+            continue
+        signature, result = find_near_duplicate(image_array)
+        if result is not None:
+            await prediction_cache.set(keys[i], result)
+            results[i] = result
+        else:
+            to_predict.append((i, image_array, signature))
+
+    if to_predict:
+        version = model_manager.version
+        predictions = await batch_predictor.predict_batch(np.stack([image_array for _, image_array, _ in to_predict]),
+                                                          bounded=True)
+        for (i, _, signature), prediction in zip(to_predict, predictions):
+            results[i] = to_result(prediction, version)
+            if model_manager.version == version:
+                await remember(keys[i], signature, results[i])
+    return results
+
+
+async def read_batch_files(files: list[UploadFile]) -> list[tuple[str, bytes]]:
+    """
+    Reads the uploaded files of a batch request, unpacking ZIP archives.
+
+    The total uncompressed size and the number of images are capped by the settings
+    before anything is decoded.
+
+    :param files: list[UploadFile]: The uploaded images and archives.
+    :return: list: Pairs of file name and file bytes.
+    :raises HTTPException 413: If the batch exceeds the size or count limits.
+    :raises HTTPException 400: If an archive cannot be read.
+    """
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                              detail=f"A batch is limited to {settings.batch_max_images} images "
+                                     f"and {settings.batch_max_bytes} bytes")
+    images = []
+    remaining = settings.batch_max_bytes
+    for file in files:
+        data = await file.read(remaining + 1)
+        if len(data) > remaining:
+            raise too_large
+        if not zipfile.is_zipfile(BytesIO(data)):
+            remaining -= len(data)
+            images.append((file.filename, data))
+            continue
+        try:
+            with zipfile.ZipFile(BytesIO(data)) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    if info.file_size > remaining or len(images) >= settings.batch_max_images:
+                        raise too_large
+                    remaining -= info.file_size
+                    images.append((info.filename, archive.read(info)))
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Cannot read archive {file.filename}")
+        if len(images) > settings.batch_max_images:
+            raise too_large
+    if len(images) > settings.batch_max_images:
+        raise too_large
+    return images
+
 
 @router.post("/image", response_class=HTMLResponse, name="api_predict_image")
 async def predict_image(request: Request, 
@@ -34,31 +481,34 @@ async def predict_image(request: Request,
         return templates.TemplateResponse("recognition.html", {"request": request,
                                                                "error": "Please, upload a file"})
 
-    file_type = imghdr.what(None, h=file.file.read(2048))
+    # The upload is read once; sniffing, hashing, decoding and the preview all share this buffer
+    f = file.file.read()
+    file_type = imghdr.what(None, h=f)
 
     if not file_type:
         return templates.TemplateResponse("recognition.html", {"request": request,
                                                                "error": "Please, upload a file"})
 
-    file.file.seek(0)
-    f = file.file.read()
-    image = Image.open(file.file)
-    image = image.resize((32, 32)).convert('RGB')
-    image_array = np.array(image) / 255.0
-    image_array = np.expand_dims(image_array, axis=0)
-
-    prediction = model.predict(image_array)
-    predicted_class = np.argmax(prediction)
-    predicted_label = class_labels[predicted_class]
-    image_base64 = base64.b64encode(f).decode('utf-8')
+    try:
+        result, (image_base64, image_type) = await asyncio.gather(classify(f), render_image(f))
+    except QueueFullError:
+        return templates.TemplateResponse("recognition.html", {"request": request,
+                                                               "error": "Server is busy, please try again later"},
+                                          status_code=503)
+    except InferenceTimeoutError:
+        return templates.TemplateResponse("recognition.html", {"request": request,
+                                                               "error": "Prediction timed out, please try again later"},
+                                          status_code=504)
+    predicted_label = result["label"]
     print(file.filename)
 
     
-    await create_prediction(filename=file.filename, url='', predicted_label=predicted_label, db=db)
+    await record_predictions([prediction_row(file.filename, '', result)], db)
     
     return templates.TemplateResponse("recognition.html", {"request": request,
                                                            "predicted_label": predicted_label,
-                                                           "image_base64": image_base64})
+                                                           "image_base64": image_base64,
+                                                           "image_type": image_type})
 
 
 @router.post("/url", response_class=HTMLResponse, name="api_predict_url")
@@ -70,40 +520,278 @@ async def predict_image_url(request: Request,
                                                                "error": "Please provide a URL"})
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
+        entry, f = await fetch_url(url)
+    except ImageTooLargeError as e:
+        return templates.TemplateResponse("recognition.html", {"request": request,
+                                                               "error": f"Error downloading image from URL: {e}"},
+                                          status_code=413)
+    except FetchError as e:
         return templates.TemplateResponse("recognition.html", {"request": request,
                                                                "error": f"Error downloading image from URL: {e}"})
-    f = response.content
-    image = Image.open(BytesIO(f))
-    image = image.resize((32, 32)).convert('RGB')
-    image_array = np.array(image) / 255.0
-    image_array = np.expand_dims(image_array, axis=0)
 
-    prediction = model.predict(image_array)
-    predicted_class = np.argmax(prediction)
-    predicted_label = class_labels[predicted_class]
-    image_base64 = base64.b64encode(f).decode('utf-8')
+    # A cached URL whose image did not change keeps the prediction made for it
+    result = entry.predictions.get(model_manager.version) if entry is not None else None
+    try:
+        if result is None:
+            result, (image_base64, image_type) = await asyncio.gather(classify(f), render_image(f))
+            if entry is not None:
+                await url_cache.remember(entry, result_version(result), result)
+        else:
+            image_base64, image_type = await render_image(f)
+    except QueueFullError:
+        return templates.TemplateResponse("recognition.html", {"request": request,
+                                                               "error": "Server is busy, please try again later"},
+                                          status_code=503)
+    except InferenceTimeoutError:
+        return templates.TemplateResponse("recognition.html", {"request": request,
+                                                               "error": "Prediction timed out, please try again later"},
+                                          status_code=504)
+    predicted_label = result["label"]
 
     filename = urlparse(url).path.split("/")[-1]
     
-    await create_prediction(filename=filename, url=url, predicted_label=predicted_label, db=db)
+    await record_predictions([prediction_row(filename, url, result)], db)
 
     return templates.TemplateResponse("recognition.html", {"request": request,
                                                            "predicted_label": predicted_label,
-                                                           "image_base64": image_base64})
+                                                           "image_base64": image_base64,
+                                                           "image_type": image_type})
+
+
+@router.post("/image/json", response_model=PredictionResponse)
+async def predict_image_json(file: UploadFile = File(None),
+                             top: int = Query(3, ge=1, le=10),
+                             tta: bool = Query(False),
+                             db: AsyncSession = Depends(get_db)):
+    """
+    Classifies an uploaded image and returns the prediction as JSON, without rendering a page
+    or sending the image back.
+
+    :param file: UploadFile: The image to classify.
+    :param top: int: The number of most probable classes to return.
+    :param tta: bool: Whether to average the predictions of flipped and shifted views of the image,
+        unless the augmented predictions are over TTA_LATENCY_BUDGET_MS.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: dict: The prediction, the model version and the duration of every stage.
+    """
+    timer = StageTimer()
+    with timer.stage("total"):
+        if file is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Please, upload a file")
+        f = file.file.read()
+        if not imghdr.what(None, h=f):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The file is not an image")
+
+        result = await classify_or_raise(f, timer, use_tta(tta))
+        with timer.stage("db"):
+            await record_predictions([prediction_row(file.filename, '', result)], db)
+    return to_response(result, timer, top, file.filename)
+
+
+@router.post("/url/json", response_model=PredictionResponse)
+async def predict_image_url_json(url: str = Form(None),
+                                 top: int = Query(3, ge=1, le=10),
+                                 tta: bool = Query(False),
+                                 db: AsyncSession = Depends(get_db)):
+    """
+    Classifies an image downloaded from a URL and returns the prediction as JSON.
+
+    :param url: str: The URL of the image.
+    :param top: int: The number of most probable classes to return.
+    :param tta: bool: Whether to average the predictions of flipped and shifted views of the image,
+        unless the augmented predictions are over TTA_LATENCY_BUDGET_MS.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: dict: The prediction, the model version and the duration of every stage.
+    """
+    timer = StageTimer()
+    with timer.stage("total"):
+        if not url:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Please provide a URL")
+        try:
+            with timer.stage("fetch"):
+                entry, f = await fetch_url(url)
+        except ImageTooLargeError as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        except FetchError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Error downloading image from URL: {e}")
+
+        tta = use_tta(tta)
+        result = entry.predictions.get(cache_version(tta)) if entry is not None else None
+        if result is not None:
+            timer.source = "url_cache"
+        else:
+            result = await classify_or_raise(f, timer, tta)
+            if entry is not None:
+                await url_cache.remember(entry, cache_version(tta, result_version(result)), result)
+
+        filename = urlparse(url).path.split("/")[-1]
+        with timer.stage("db"):
+            await record_predictions([prediction_row(filename, url, result)], db)
+    return to_response(result, timer, top, filename, url)
+
+
+async def classify_or_raise(f: bytes, timer: StageTimer, tta: bool = False) -> dict:
+    """
+    Classifies an image for the JSON endpoints, turning failures into HTTP errors.
+
+    :param f: bytes: The raw bytes of the image.
+    :param timer: StageTimer: Receives the duration of every stage.
+    :param tta: bool: Whether to average the predictions of augmented views.
+    :return: dict: The prediction.
+    :raises HTTPException: 400 if the image cannot be decoded, 503 if the queue is full, 504 on timeout.
+    """
+    try:
+        return await classify(f, timer, tta)
+    except QueueFullError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Server is busy, please try again later")
+    except InferenceTimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                            detail="Prediction timed out, please try again later")
+    except (OSError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot decode image")
+
+
+@router.post("/batch", response_model=BatchPredictionResponse)
+async def predict_batch(files: list[UploadFile] = File(None),
+                        db: AsyncSession = Depends(get_db)):
+    """
+    Classifies many images in one request and returns the predictions as JSON.
+    Images can be uploaded as separate files and/or as ZIP archives.
+
+    :param files: list[UploadFile]: The images and archives to classify.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: dict: The prediction or the error for every image.
+    """
+    if not files:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Please, upload at least one file")
+
+    images = await read_batch_files(files)
+    try:
+        results = await classify_many([f for _, f in images])
+    except QueueFullError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Server is busy, please try again later")
+    except InferenceTimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                            detail="Prediction timed out, please try again later")
+
+    items = []
+    rows = []
+    for (filename, _), result in zip(images, results):
+        if isinstance(result, Exception):
+            items.append({"filename": filename, "error": "Cannot decode image"})
+            continue
+        items.append({"filename": filename,
+                      "predicted_label": result["label"],
+                      "class_index": result["class_index"],
+                      "score": max(result["probabilities"])})
+        rows.append(prediction_row(filename, "", result))
+
+    if rows:
+        await record_predictions(rows, db)
+    return {"predictions": items}
 
 
 @router.get("/", response_model=list[PredictionModel])
-async def get_predictions(limit: int = Query(10, le=50), offset: int = 0, db: AsyncSession = Depends(get_db)):
+async def get_predictions(response: Response, limit: int = Query(10, le=50), offset: int = None,
+                          cursor: str = None, min_score: float = Query(None, ge=0, le=1),
+                          db: AsyncSession = Depends(get_db)):
     """
-    Retrieves a list of predictions from the database.
+    Retrieves a list of predictions from the database, newest first.
+
+    Pages are fetched with the opaque cursor returned in the X-Next-Cursor header of the previous page,
+    which costs the same at any depth. The offset is kept for existing clients.
 
+    :param response: Response: Receives the X-Next-Cursor header when there are more predictions.
     :param limit: int: The number of predictions to return.
-    :param offset: int: The number of predictions to skip.
+    :param offset: int: The number of predictions to skip (deprecated, use the cursor).
+    :param cursor: str: The cursor of the page, from the X-Next-Cursor header of the previous page.
+    :param min_score: float: Only return the predictions with at least this confidence, if given.
     :param db: AsyncSession: A connection to the Postgres SQL database.
     :return: list: A list of prediction objects.
     """
-    predictions = await fetch_predictions(limit, offset, db)
+    if offset is not None:
+        predictions = await fetch_predictions(limit, offset, db, min_score)
+        return predictions
+    try:
+        predictions, next_cursor = await get_predictions_page(limit, cursor, db, min_score)
+    except ValueError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     return predictions
+
+
+@router.get("/stats", response_model=PredictionStats)
+async def get_stats(start: datetime = None, end: datetime = None,
+                    granularity: Literal["hour", "day"] = "hour", label: str = None,
+                    db: AsyncSession = Depends(get_db)):
+    """
+    Returns the number of predictions per label over a time range, per hour or per day.
+
+    The counts come from the hourly rollups maintained as the predictions are written,
+    so the predictions table itself is never scanned.
+
+    :param start: datetime: The start of the range, seven days before the end by default.
+    :param end: datetime: The end of the range, excluded, now by default.
+    :param granularity: str: The size of the buckets of the series, "hour" or "day".
+    :param label: str: Only count this label, if given.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: PredictionStats: The totals of the range and the series of buckets.
+    """
+    end = end or datetime.now()
+    start = start or end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+    labels = {}
+    series = {}
+    for bucket, predicted_label, count in await get_prediction_stats(start, end, db, label):
+        if granularity == "day":
+            bucket = bucket.replace(hour=0)
+        item = series.setdefault(bucket, PredictionStatsBucket(bucket=bucket, total=0, labels={}))
+        item.total += count
+        item.labels[predicted_label] = item.labels.get(predicted_label, 0) + count
+        labels[predicted_label] = labels.get(predicted_label, 0) + count
+    return PredictionStats(start=start, end=end, granularity=granularity, total=sum(labels.values()),
+                           labels=labels, series=list(series.values()))
+
+
+@router.get("/export")
+async def export_predictions(export_format: Literal["csv", "ndjson", "parquet"] = Query("csv", alias="format"),
+                             start: datetime = None, end: datetime = None,
+                             db: AsyncSession = Depends(get_db)):
+    """
+    Streams the prediction history as a CSV, newline-delimited JSON or Parquet file, oldest first.
+
+    The rows are read through a server-side cursor and sent chunk by chunk,
+    so an export of millions of predictions runs in constant memory.
+
+    :param export_format: str: Either "csv", "ndjson" or "parquet" (needs pyarrow).
+    :param start: datetime: Only export the predictions made from this date, if given.
+    :param end: datetime: Only export the predictions made before this date, if given.
+    :param db: AsyncSession: A connection to the Postgres SQL database.
+    :return: StreamingResponse: The file, as a chunked response.
+    """
+    try:
+        check_format(export_format)
+    except ExportFormatError as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+    chunks = stream_predictions(db, start, end, settings.export_chunk_rows)
+    return StreamingResponse(export_rows(chunks, export_format), media_type=MEDIA_TYPES[export_format],
+                             headers={"Content-Disposition": f'attachment; filename="predictions.{export_format}"'})
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Returns the in-process inference metrics: batch sizes, queue wait times and queue depth.
+
+    :return: dict: A mapping of metric names to their current values.
+    """
+    return metrics.snapshot()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel, EmailStr, Field
 from src.database.models import UserRole
@@ -32,14 +32,39 @@ class PredictionCreate(PredictionBase):
     pass
 
 
+class ClassScore(BaseModel):
+    """
+    Model representing the stored probability of one class.
+
+    :param class_index: The index of the class.
+    :type class_index: int
+    :param probability: The probability predicted for the class.
+    :type probability: float
+    """
+    class_index: int
+    probability: float
+
+
 class PredictionModel(PredictionBase):
     """
     Model representing a prediction, inheriting from PredictionBase.
 
     :param id: The unique identifier of the prediction.
     :type id: int
+    :param class_index: The index of the predicted class, if stored.
+    :type class_index: int
+    :param score: The probability of the predicted class, if stored.
+    :type score: float
+    :param top_k: The most probable classes, most probable first, if stored.
+    :type top_k: List[ClassScore]
+    :param model_version: The version of the model that made the prediction, if stored.
+    :type model_version: str
     """
     id: int
+    class_index: Optional[int] = None
+    score: Optional[float] = None
+    top_k: Optional[List[ClassScore]] = None
+    model_version: Optional[str] = None
 
     class Config:
         """
@@ -48,6 +73,132 @@ class PredictionModel(PredictionBase):
         orm_mode = True
 
 
+class BatchPredictionItem(BaseModel):
+    """
+    Model representing the result of one image of a batch prediction.
+
+    :param filename: The name of the file in the request or in the archive.
+    :type filename: str
+    :param predicted_label: The predicted label.
+    :type predicted_label: str
+    :param class_index: The index of the predicted class.
+    :type class_index: int
+    :param score: The probability of the predicted class.
+    :type score: float
+    :param error: The reason the image could not be classified.
+    :type error: str
+    """
+    filename: Optional[str] = None
+    predicted_label: Optional[str] = None
+    class_index: Optional[int] = None
+    score: Optional[float] = None
+    error: Optional[str] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    """
+    Model representing the response of a batch prediction.
+
+    :param predictions: The results in the order of the uploaded images.
+    :type predictions: List[BatchPredictionItem]
+    """
+    predictions: List[BatchPredictionItem]
+
+
+class ClassProbability(BaseModel):
+    """
+    Model representing the probability of one class.
+
+    :param label: The label of the class.
+    :type label: str
+    :param class_index: The index of the class.
+    :type class_index: int
+    :param probability: The probability predicted for the class.
+    :type probability: float
+    """
+    label: str
+    class_index: int
+    probability: float
+
+
+class PredictionResponse(BaseModel):
+    """
+    Model representing the JSON result of a single prediction.
+
+    :param filename: The name of the uploaded file or of the remote file.
+    :type filename: str
+    :param url: The URL of the image, empty for uploads.
+    :type url: str
+    :param predicted_label: The predicted label.
+    :type predicted_label: str
+    :param class_index: The index of the predicted class.
+    :type class_index: int
+    :param score: The probability of the predicted class.
+    :type score: float
+    :param top_k: The most probable classes, most probable first.
+    :type top_k: List[ClassProbability]
+    :param model_version: The version of the model that made the prediction.
+    :type model_version: str
+    :param views: The number of augmented views averaged, 1 without test-time augmentation.
+    :type views: int
+    :param source: Where the prediction came from: "model", "cache", "near_duplicate", "url_cache" or "coalesced".
+    :type source: str
+    :param timings_ms: The duration of every stage of the request in milliseconds.
+    :type timings_ms: Dict[str, float]
+    """
+    filename: Optional[str] = None
+    url: str = ""
+    predicted_label: str
+    class_index: int
+    score: float
+    top_k: List[ClassProbability]
+    model_version: str
+    views: int = 1
+    source: str
+    timings_ms: Dict[str, float]
+
+
+class PredictionStatsBucket(BaseModel):
+    """
+    Model representing the predictions of one hour or one day.
+
+    :param bucket: The start of the hour or of the day.
+    :type bucket: datetime
+    :param total: The number of predictions.
+    :type total: int
+    :param labels: The number of predictions of every label.
+    :type labels: Dict[str, int]
+    """
+    bucket: datetime
+    total: int
+    labels: Dict[str, int]
+
+
+class PredictionStats(BaseModel):
+    """
+    Model representing the prediction volumes and label distribution of a time range.
+
+    :param start: The start of the range.
+    :type start: datetime
+    :param end: The end of the range, excluded.
+    :type end: datetime
+    :param granularity: The size of the buckets, "hour" or "day".
+    :type granularity: str
+    :param total: The number of predictions in the range.
+    :type total: int
+    :param labels: The number of predictions of every label in the range.
+    :type labels: Dict[str, int]
+    :param series: The buckets that contain predictions, oldest first.
+    :type series: List[PredictionStatsBucket]
+    """
+    start: datetime
+    end: datetime
+    granularity: str
+    total: int
+    labels: Dict[str, int]
+    series: List[PredictionStatsBucket]
+
+
 class ImageTagModel(BaseModel):
     """
     Model for representing an image tag.
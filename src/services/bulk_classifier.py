@@ -0,0 +1,155 @@
+import asyncio
+import bisect
+import json
+import os
+from concurrent.futures import Executor
+from typing import AsyncIterator, Awaitable, Callable
+
+import numpy as np
+
+from src.services.preprocessing import INPUT_SIZE, decode_image
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+
+
+def find_images(root: str) -> list[str]:
+    """
+    The **find_images** function lists the images of a directory tree.
+
+    :param root: str: The directory to walk.
+    :return: The paths of the images relative to ``root``, sorted, so that every run sees the same order.
+    """
+    paths = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                paths.append(os.path.relpath(os.path.join(directory, filename), root))
+    paths.sort()
+    return paths
+
+
+def decode_files(root: str, paths: list[str]) -> tuple[np.ndarray, list]:
+    """
+    The **decode_files** function reads and decodes a chunk of images, in a worker process.
+
+    :param root: str: The directory the paths are relative to.
+    :param paths: list[str]: The relative paths of the images.
+    :return: The stacked float32 images that could be decoded, and for every path None or the decoding error.
+    """
+    images = []
+    errors = []
+    for path in paths:
+        try:
+            with open(os.path.join(root, path), "rb") as image_file:
+                images.append(decode_image(image_file.read()).astype(np.float32))
+            errors.append(None)
+        except Exception as err:
+            errors.append(str(err) or type(err).__name__)
+    if not images:
+        return np.empty((0, *INPUT_SIZE, 3), dtype=np.float32), errors
+    return np.stack(images), errors
+
+
+class Checkpoint:
+    """
+    The **Checkpoint** class records how far a bulk classification went, so that it can resume.
+
+    The images are classified in the sorted order of :func:`find_images`; the checkpoint holds the
+    last classified path and the size of the output file at that point. Resuming truncates the output
+    to that size, dropping the rows written after the last checkpoint, and skips the classified paths.
+    It also holds the start of the run, which dates the stored predictions of every chunk, so that
+    a resumed run can tell the predictions it already stored.
+
+    :param path: str: The JSON file of the checkpoint.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last_path = None
+        self.processed = 0
+        self.output_bytes = 0
+        self.started = None
+
+    def load(self) -> bool:
+        """
+        The **load** function reads the checkpoint file.
+
+        :return: Whether there was a checkpoint to resume from.
+        """
+        try:
+            with open(self.path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return False
+        self.last_path = state["last_path"]
+        self.processed = state["processed"]
+        self.output_bytes = state["output_bytes"]
+        self.started = state.get("started")
+        return True
+
+    def save(self, last_path: str, processed: int, output_bytes: int, started: str = None):
+        """
+        The **save** function atomically replaces the checkpoint file.
+
+        :param last_path: str: The last classified path.
+        :param processed: int: The number of classified images.
+        :param output_bytes: int: The size of the output file once flushed.
+        :param started: str: The start of the run in ISO format.
+        """
+        self.last_path, self.processed, self.output_bytes = last_path, processed, output_bytes
+        self.started = started
+        with open(self.path + ".tmp", "w") as checkpoint_file:
+            json.dump({"last_path": last_path, "processed": processed, "output_bytes": output_bytes,
+                       "started": started}, checkpoint_file)
+        os.replace(self.path + ".tmp", self.path)
+
+    def remaining(self, paths: list[str]) -> list[str]:
+        """
+        The **remaining** function drops the paths classified before the checkpoint.
+
+        :param paths: list[str]: The sorted paths returned by :func:`find_images`.
+        :return: The paths left to classify.
+        """
+        if self.last_path is None:
+            return paths
+        return paths[bisect.bisect_right(paths, self.last_path):]
+
+
+async def classify_files(root: str, paths: list[str], predict_batch: Callable[..., Awaitable[np.ndarray]],
+                         decode_executor: Executor, batch_size: int = 256,
+                         max_pending: int = 4) -> AsyncIterator[tuple[list[str], np.ndarray, list]]:
+    """
+    The **classify_files** function runs images through a bounded decode and predict pipeline.
+
+    A producer hands chunks of ``batch_size`` paths to the decode pool while the model runs on the
+    previous chunks; at most ``max_pending`` decoded chunks wait for the model, so the memory stays
+    bounded however many images there are. Every chunk goes through the model in a single forward
+    pass, and the chunks come out in the order of ``paths``.
+
+    :param root: str: The directory the paths are relative to.
+    :param paths: list[str]: The relative paths of the images.
+    :param predict_batch: Callable: Runs a batch of images through the model, e.g. BatchPredictor.predict_batch.
+    :param decode_executor: Executor: The pool decoding the images, preferably a process pool.
+    :param batch_size: int: The number of images decoded together and run in one forward pass.
+    :param max_pending: int: The number of decoded chunks allowed to wait for the model.
+    :return: For every chunk: its paths, the predictions of the decoded images and the decoding errors.
+    """
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(maxsize=max_pending)
+
+    async def produce():
+        for start in range(0, len(paths), batch_size):
+            chunk = paths[start:start + batch_size]
+            await pending.put((chunk, loop.run_in_executor(decode_executor, decode_files, root, chunk)))
+        await pending.put(None)
+
+    producer = loop.create_task(produce())
+    try:
+        while (item := await pending.get()) is not None:
+            chunk, decoded = item
+            images, errors = await decoded
+            predictions = await predict_batch(images, chunk_size=batch_size) if len(images) else np.empty((0,))
+            yield chunk, predictions, errors
+        await producer
+    finally:
+        producer.cancel()
@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+EXPORT_COLUMNS = ("id", "prediction_date", "filename", "url", "predicted_label", "class_index", "score",
+                  "model_version")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8",
+               "ndjson": "application/x-ndjson",
+               "parquet": "application/vnd.apache.parquet"}
+
+
+class ExportFormatError(Exception):
+    """Raised when an export format is unknown or its library is not installed."""
+    pass
+
+
+def _text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_chunk(rows: list[tuple], header: bool = False) -> bytes:
+    """
+    The **csv_chunk** function formats rows of predictions as CSV lines.
+
+    :param rows: list[tuple]: The rows, with the values of EXPORT_COLUMNS.
+    :param header: bool: Whether to start with the line of the column names.
+    :return: The UTF-8 encoded lines.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_text(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunk(rows: list[tuple]) -> bytes:
+    """
+    The **ndjson_chunk** function formats rows of predictions as one JSON object per line.
+
+    :param rows: list[tuple]: The rows, with the values of EXPORT_COLUMNS.
+    :return: The UTF-8 encoded lines.
+    """
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, map(_text, row))), ensure_ascii=False) + "\n"
+                   for row in rows).encode("utf-8")
+
+
+class _ChunkSink:
+    # A file that hands out what was written since the last call, and knows its absolute
+    # position, so that the Parquet footer gets the right offsets
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._position += len(data)
+        return self._buffer.write(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer = io.BytesIO()
+        return data
+
+
+async def _parquet_chunks(chunks: AsyncIterator[list[tuple]]) -> AsyncIterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportFormatError("Parquet export requires pyarrow")
+
+    schema = pa.schema([("id", pa.int64()), ("prediction_date", pa.timestamp("us")), ("filename", pa.string()),
+                        ("url", pa.string()), ("predicted_label", pa.string()), ("class_index", pa.int16()),
+                        ("score", pa.float32()), ("model_version", pa.string())])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in chunks:
+            # Every chunk becomes a row group, written out before the next one is read
+            columns = list(zip(*rows))
+            writer.write_table(pa.table([pa.array(column, type=field.type)
+                                         for column, field in zip(columns, schema)], schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+async def export_rows(chunks: AsyncIterator[list[tuple]], export_format: str) -> AsyncIterator[bytes]:
+    """
+    The **export_rows** function encodes chunks of predictions as they are read from the database.
+
+    Only one chunk is held in memory at a time, so the size of an export does not matter.
+    Parquet needs the optional pyarrow package; every chunk is written as one row group.
+
+    :param chunks: AsyncIterator[list[tuple]]: The chunks of rows, with the values of EXPORT_COLUMNS.
+    :param export_format: str: Either "csv", "ndjson" or "parquet".
+    :return: The encoded chunks, to be written or sent one after the other.
+    :raises ExportFormatError: If the format is unknown or pyarrow is missing.
+    """
+    if export_format == "parquet":
+        async for data in _parquet_chunks(chunks):
+            yield data
+    elif export_format == "csv":
+        header = True
+        async for rows in chunks:
+            yield csv_chunk(rows, header)
+            header = False
+        if header:
+            yield csv_chunk([], header)
+    elif export_format == "ndjson":
+        async for rows in chunks:
+            yield ndjson_chunk(rows)
+    else:
+        raise ExportFormatError(f"Unknown export format: {export_format}")
+
+
+def check_format(export_format: str):
+    """
+    The **check_format** function fails early for a format that :func:`export_rows` cannot write.
+
+    :param export_format: str: The requested format.
+    :raises ExportFormatError: If the format is unknown or pyarrow is missing.
+    """
+    if export_format not in MEDIA_TYPES:
+        raise ExportFormatError(f"Unknown export format: {export_format}")
+    if export_format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise ExportFormatError("Parquet export requires pyarrow")
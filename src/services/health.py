@@ -0,0 +1,110 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.services.model_manager import model_manager
+
+
+class HealthMonitor:
+    """
+    The **HealthMonitor** class runs the expensive health checks in a background task.
+
+    Probes read the last snapshot instead of touching the database, the cache or the model,
+    so answering them costs the same under heavy load as when idle. The application is ready
+    when every critical check of the last run succeeded.
+
+    :param interval: float: Seconds between two runs of the checks.
+    :param timeout: float: Seconds a single check may take before it is considered failed.
+    """
+
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0):
+        self.interval = interval
+        self.timeout = timeout
+        self._checks = {}
+        self._snapshot = {"ready": False, "checked_at": None, "checks": {}}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def snapshot(self) -> dict:
+        """
+        The result of the last run of the checks.
+        """
+        return self._snapshot
+
+    def add_check(self, name: str, func: Callable[[], Awaitable[dict]], critical: bool = True):
+        """
+        The **add_check** function registers a health check.
+
+        :param name: str: The name of the check in the snapshot.
+        :param func: Callable: A coroutine function returning a dict with at least the "ok" key.
+        :param critical: bool: Whether a failure of the check makes the application not ready.
+        """
+        self._checks[name] = (func, critical)
+
+    async def _run_check(self, func) -> dict:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(), self.timeout)
+        except Exception as err:
+            result = {"ok": False, "error": str(err) or type(err).__name__}
+        result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    async def refresh(self) -> dict:
+        """
+        The **refresh** function runs every check concurrently and replaces the snapshot.
+
+        :return: The new snapshot.
+        """
+        names = list(self._checks)
+        results = await asyncio.gather(*(self._run_check(self._checks[name][0]) for name in names))
+        checks = dict(zip(names, results))
+        ready = all(checks[name]["ok"] for name in names if self._checks[name][1])
+        self._snapshot = {"ready": ready, "checked_at": datetime.now().isoformat(), "checks": checks}
+        return self._snapshot
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        The **start** function starts the background task in the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        The **stop** function cancels the background task.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+async def check_database() -> dict:
+    await sessionmanager.ping()
+    return {"ok": True, **sessionmanager.pool_status()}
+
+
+async def check_model() -> dict:
+    # A lazily loaded model is loaded by the first request, so it must not hold back readiness
+    return {"ok": model_manager.ready or settings.model_load == "lazy",
+            "loaded": model_manager.loaded,
+            "warmed": model_manager.warmed,
+            "version": model_manager.version if model_manager.loaded else None,
+            "error": model_manager.error}
+
+
+health_monitor = HealthMonitor(settings.health_check_interval_s, settings.health_check_timeout_s)
+health_monitor.add_check("database", check_database)
+health_monitor.add_check("model", check_model)
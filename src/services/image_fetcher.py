@@ -0,0 +1,195 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+from urllib.parse import urlparse, urlunparse
+
+import httpx
+
+from src.conf.config import settings
+from src.services.metrics import metrics, LATENCY_BUCKETS
+
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    The **normalize_url** function gives the same spelling to URLs that address the same resource:
+    the scheme and the host are lowercased, the default port and the fragment are dropped.
+
+    :param url: str: The URL.
+    :return: The normalized URL.
+    :raises FetchError: If the URL cannot be parsed, e.g. an unclosed IPv6 bracket or an invalid port.
+    """
+    try:
+        parsed = urlparse(url.strip())
+        port = parsed.port
+    except ValueError as err:
+        raise FetchError(f"Invalid URL: {url}") from err
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or "").lower()
+    if ":" in netloc:
+        netloc = f"[{netloc}]"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    if parsed.username:
+        netloc = f"{parsed.username}{':' + parsed.password if parsed.password else ''}@{netloc}"
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, parsed.query, ""))
+
+
+class FetchError(Exception):
+    """Raised when an image cannot be downloaded."""
+    pass
+
+
+class ImageTooLargeError(FetchError):
+    """Raised when a remote image is larger than the configured limit."""
+    pass
+
+
+class FetchResult(NamedTuple):
+    """
+    A downloaded response: its status code, its body (empty for 304 Not Modified) and its headers.
+    """
+    status_code: int
+    content: bytes
+    headers: dict
+
+
+class ImageFetcher:
+    """
+    The **ImageFetcher** class downloads remote images without blocking the event loop.
+
+    All downloads share one pooled asynchronous HTTP client, so connections to the same host
+    are reused. Every host gets at most ``max_per_host`` concurrent downloads, so a slow host
+    cannot take every connection of the pool. The body is streamed and the download is aborted
+    as soon as it exceeds ``max_bytes``, before anything is decoded.
+
+    :param max_connections: int: The maximum number of connections of the pool.
+    :param max_per_host: int: The maximum number of concurrent downloads from one host.
+    :param connect_timeout: float: The time allowed to connect to a host, in seconds.
+    :param read_timeout: float: The time allowed between two chunks of the response, in seconds.
+    :param max_bytes: int: The maximum size of a downloaded image.
+    """
+
+    def __init__(self, max_connections: int = 100, max_per_host: int = 4, connect_timeout: float = 3.0,
+                 read_timeout: float = 10.0, max_bytes: int = 10 * 1024 * 1024):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_bytes = max_bytes
+        self._client = None
+        self._loop = None
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+        self._host_users: dict[str, int] = {}
+        self._fetch_time = metrics.histogram("image_fetch_seconds", LATENCY_BUCKETS + (10.0, 30.0))
+        self._fetch_size = metrics.histogram("image_fetch_bytes", BYTES_BUCKETS)
+        self._errors = metrics.counter("image_fetch_errors_total")
+        self._too_large = metrics.counter("image_fetch_too_large_total")
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # The client and the semaphores belong to the event loop they were created in
+            self._loop = loop
+            self._hosts = {}
+            self._host_users = {}
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True,
+                                             limits=httpx.Limits(max_connections=self.max_connections))
+
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        # The hosts come from the clients: a host is forgotten as soon as no download uses or awaits it
+        slots = self._hosts.get(host)
+        if slots is None:
+            slots = self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+            self._host_users[host] = 0
+        self._host_users[host] += 1
+        try:
+            async with slots:
+                yield
+        finally:
+            self._host_users[host] -= 1
+            if not self._host_users[host]:
+                del self._hosts[host], self._host_users[host]
+
+    async def fetch(self, url: str) -> bytes:
+        """
+        The **fetch** function downloads an image.
+
+        :param url: str: The http or https URL of the image.
+        :return: The raw bytes of the image.
+        :raises ImageTooLargeError: If the image is larger than ``max_bytes``.
+        :raises FetchError: If the URL is invalid, the host does not answer in time or returns an error.
+        """
+        return (await self.request(url)).content
+
+    async def request(self, url: str, headers: dict = None) -> FetchResult:
+        """
+        The **request** function downloads an image, possibly conditionally.
+        A 304 Not Modified answer to If-None-Match or If-Modified-Since headers is not an error.
+
+        :param url: str: The http or https URL of the image.
+        :param headers: dict: Extra request headers.
+        :return: The status code, the body and the headers of the response.
+        :raises ImageTooLargeError: If the image is larger than ``max_bytes``.
+        :raises FetchError: If the URL is invalid, the host does not answer in time or returns an error.
+        """
+        try:
+            parsed = urlparse(url)
+        except ValueError as err:
+            raise FetchError(f"Invalid URL: {url}") from err
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise FetchError(f"Invalid URL: {url}")
+
+        self._ensure_started()
+        started = time.perf_counter()
+        try:
+            async with self._host_slot(parsed.hostname):
+                result = await self._download(url, headers)
+        except ImageTooLargeError:
+            self._too_large.inc()
+            raise
+        except (httpx.HTTPError, httpx.InvalidURL) as err:
+            # InvalidURL, e.g. a control character in the URL, is not an HTTPError
+            self._errors.inc()
+            raise FetchError(str(err) or type(err).__name__) from err
+        self._fetch_time.observe(time.perf_counter() - started)
+        self._fetch_size.observe(len(result.content))
+        return result
+
+    async def _download(self, url: str, headers: dict = None) -> FetchResult:
+        async with self._client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return FetchResult(304, b"", dict(response.headers))
+            response.raise_for_status()
+            length = response.headers.get("content-length")
+            if length is not None and length.isdigit() and int(length) > self.max_bytes:
+                raise ImageTooLargeError(f"Image is larger than {self.max_bytes} bytes")
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ImageTooLargeError(f"Image is larger than {self.max_bytes} bytes")
+                chunks.append(chunk)
+        return FetchResult(response.status_code, b"".join(chunks), dict(response.headers))
+
+    async def close(self):
+        """
+        The **close** function closes the pooled connections.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+
+image_fetcher = ImageFetcher(max_connections=settings.fetch_max_connections,
+                             max_per_host=settings.fetch_max_per_host,
+                             connect_timeout=settings.fetch_connect_timeout_s,
+                             read_timeout=settings.fetch_read_timeout_s,
+                             max_bytes=settings.fetch_max_bytes)
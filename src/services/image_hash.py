@@ -0,0 +1,144 @@
+import threading
+from typing import NamedTuple
+
+import numpy as np
+
+from src.services.metrics import metrics
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+
+class ImageSignature(NamedTuple):
+    """
+    The perceptual signature of an image: its aHash and dHash and its mean color.
+    """
+    hashes: np.ndarray
+    color: np.ndarray
+
+
+def _pack(bits: np.ndarray) -> np.uint64:
+    return np.packbits(bits.ravel()).view(">u8")[0].astype(np.uint64)
+
+
+def _block_means(array: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    row_edges = np.linspace(0, array.shape[0], rows + 1).astype(int)
+    col_edges = np.linspace(0, array.shape[1], cols + 1).astype(int)
+    sums = np.add.reduceat(np.add.reduceat(array, row_edges[:-1], axis=0), col_edges[:-1], axis=1)
+    return sums / np.outer(np.diff(row_edges), np.diff(col_edges))
+
+
+def average_hash(gray: np.ndarray) -> np.uint64:
+    """
+    The **average_hash** function computes the 64-bit aHash of a grayscale image.
+
+    :param gray: np.ndarray: The grayscale image, at least 8x8 pixels.
+    :return: The hash, one bit per cell of an 8x8 grid set when the cell is brighter than the mean.
+    """
+    cells = _block_means(gray, 8, 8)
+    return _pack(cells > cells.mean())
+
+
+def difference_hash(gray: np.ndarray) -> np.uint64:
+    """
+    The **difference_hash** function computes the 64-bit dHash of a grayscale image.
+
+    :param gray: np.ndarray: The grayscale image, at least 8x9 pixels.
+    :return: The hash, one bit per pair of horizontally adjacent cells of an 8x9 grid.
+    """
+    cells = _block_means(gray, 8, 9)
+    return _pack(cells[:, 1:] > cells[:, :-1])
+
+
+def image_signature(image_array: np.ndarray) -> ImageSignature:
+    """
+    The **image_signature** function computes the perceptual signature of an already resized image.
+
+    :param image_array: np.ndarray: The RGB image with values in [0, 1], e.g. the 32x32 model input.
+    :return: The signature of the image.
+    """
+    gray = image_array[..., :3] @ _GRAY_WEIGHTS
+    hashes = np.array([average_hash(gray), difference_hash(gray)], dtype=np.uint64)
+    color = image_array[..., :3].reshape(-1, 3).mean(axis=0).astype(np.float32)
+    return ImageSignature(hashes, color)
+
+
+class HammingIndex:
+    """
+    The **HammingIndex** class finds previously seen images whose signature is close to a new one.
+
+    Signatures live in fixed-size NumPy arrays used as a ring buffer, so memory is bounded by
+    ``capacity`` and a lookup is a single vectorized XOR and popcount over all entries.
+    An entry matches when both hashes are within ``max_distance`` bits and the mean colors
+    differ by at most ``color_tolerance`` per channel, which keeps differently colored images
+    with the same structure apart.
+
+    :param capacity: int: The maximum number of stored signatures.
+    :param max_distance: int: The maximum Hamming distance of each hash for a match.
+    :param color_tolerance: float: The maximum difference of the mean color per channel.
+    """
+
+    def __init__(self, capacity: int = 4096, max_distance: int = 2, color_tolerance: float = 0.05):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.color_tolerance = color_tolerance
+        self._hashes = np.zeros((capacity, 2), dtype=np.uint64)
+        self._colors = np.zeros((capacity, 3), dtype=np.float32)
+        self._values = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._lookups = metrics.counter("phash_lookups_total")
+        self._hits = metrics.counter("phash_hits_total")
+        metrics.gauge("phash_index_entries", lambda: self._size)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, signature: ImageSignature, value):
+        """
+        The **add** function stores a value under a signature, replacing the oldest entry when full.
+
+        :param signature: ImageSignature: The signature of the image.
+        :param value: The value returned by :meth:`search` for similar images.
+        """
+        with self._lock:
+            self._hashes[self._next] = signature.hashes
+            self._colors[self._next] = signature.color
+            self._values[self._next] = value
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def search(self, signature: ImageSignature):
+        """
+        The **search** function returns the value of the closest matching signature.
+
+        :param signature: ImageSignature: The signature of the new image.
+        :return: The stored value, or None if no entry is within the thresholds.
+        """
+        self._lookups.inc()
+        with self._lock:
+            if self._size == 0:
+                return None
+            hashes = self._hashes[:self._size]
+            colors = self._colors[:self._size]
+            differences = np.bitwise_xor(hashes, signature.hashes)
+            distances = _POPCOUNT[differences.view(np.uint8)].reshape(self._size, -1, 8).sum(axis=2)
+            matches = (distances.max(axis=1) <= self.max_distance) & \
+                      (np.abs(colors - signature.color).max(axis=1) <= self.color_tolerance)
+            if not matches.any():
+                return None
+            candidates = np.flatnonzero(matches)
+            best = candidates[np.argmin(distances[candidates].sum(axis=1))]
+            value = self._values[best]
+        self._hits.inc()
+        return value
+
+    def clear(self):
+        """
+        The **clear** function removes all stored signatures.
+        """
+        with self._lock:
+            self._values = [None] * self.capacity
+            self._size = 0
+            self._next = 0
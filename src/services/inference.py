@@ -0,0 +1,305 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from src.services.metrics import metrics, LATENCY_BUCKETS, SIZE_BUCKETS
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue has no room for a new request."""
+    pass
+
+
+class InferenceTimeoutError(Exception):
+    """Raised when a prediction is not ready within the configured timeout."""
+    pass
+
+
+def load_predict_fn(backend: str, model_path: str, mmap: bool = False) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    The **load_predict_fn** function loads a model and returns its batch prediction function.
+
+    :param backend: str: Either "keras", "numpy" or "tflite".
+    :param model_path: str: The .h5 file of the Keras model, or the .npz or .tflite file exported from it.
+    :param mmap: bool: Whether to memory-map the NumPy weights so that all processes share them.
+    :return: A function taking a batch of images and returning the batch of predictions.
+    """
+    if backend == "numpy":
+        from src.services.numpy_model import NumpyModel
+        return NumpyModel.load(model_path, mmap=mmap).predict
+    if backend == "tflite":
+        from src.services.tflite_model import TFLiteModel
+        return TFLiteModel(model_path).predict
+    if backend == "keras":
+        from keras.models import load_model
+        model = load_model(model_path)
+        return lambda batch: model.predict(batch, verbose=0)
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+_process_predict_fn = None
+
+
+def _init_process_model(backend: str, model_path: str, mmap: bool = False):
+    global _process_predict_fn
+    _process_predict_fn = load_predict_fn(backend, model_path, mmap)
+    _process_predict_fn(np.zeros((1, 32, 32, 3), dtype=np.float32))
+
+
+def process_predict(batch: np.ndarray) -> np.ndarray:
+    """
+    The **process_predict** function runs a forward pass inside a process pool worker.
+    The model is loaded and warmed up once per worker by the pool initializer.
+
+    :param batch: np.ndarray: A batch of preprocessed images.
+    :return: The batch of predictions.
+    """
+    return _process_predict_fn(batch)
+
+
+def _process_warmup(pause: float) -> int:
+    process_predict(np.zeros((1, 32, 32, 3), dtype=np.float32))
+    # Keeps this worker busy, so that the other calls of the round go to the other workers
+    time.sleep(pause)
+    return os.getpid()
+
+
+async def warm_process_pool(executor: Executor, workers: int, pause: float = 0.05) -> set:
+    """
+    The **warm_process_pool** function waits until every worker of a process pool has loaded its model.
+
+    The workers load the model in the pool initializer, which can take much longer than a prediction,
+    so no inference timeout applies. Rounds of forward passes are run until every worker answered one.
+
+    :param executor: Executor: A pool created by :func:`create_executor` with kind "process".
+    :param workers: int: The number of workers in the pool.
+    :param pause: float: How long every warmup call keeps its worker busy, in seconds.
+    :return: The process ids of the workers.
+    :raises Exception: The error raised while loading the model, e.g. BrokenProcessPool.
+    """
+    loop = asyncio.get_running_loop()
+    pids = set()
+    while len(pids) < workers:
+        pids.update(await asyncio.gather(*(loop.run_in_executor(executor, _process_warmup, pause)
+                                           for _ in range(workers))))
+    return pids
+
+
+def create_executor(kind: str, workers: int, backend: str = "keras", model_path: str = None,
+                    mmap: bool = False) -> Executor:
+    """
+    The **create_executor** function creates the pool that runs forward passes off the event loop.
+
+    :param kind: str: Either "thread" or "process".
+    :param workers: int: The number of workers in the pool.
+    :param backend: str: The backend loaded by every process worker (process pools only).
+    :param model_path: str: The model loaded by every process worker (process pools only).
+    :param mmap: bool: Whether the process workers share memory-mapped NumPy weights (process pools only).
+    :return: The executor.
+    """
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_process_model,
+                                   initargs=(backend, model_path, mmap))
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+    raise ValueError(f"Unknown inference executor: {kind}")
+
+
+class BatchPredictor:
+    """
+    The **BatchPredictor** class collects concurrent prediction requests into micro-batches.
+
+    Requests wait in a bounded queue until either ``max_batch_size`` images are pending
+    or ``max_wait_ms`` has passed since the first one arrived, then a single batched
+    forward pass is run in the executor and every waiting coroutine receives its own row
+    of the result. The event loop thread never runs the model itself.
+
+    :param predict_fn: Callable: A function taking a batch of images and returning the batch of predictions.
+    :param max_batch_size: int: The maximum number of images in one forward pass.
+    :param max_wait_ms: float: How long the first request of a batch waits for company.
+    :param max_queue_size: int: The maximum number of requests waiting in the queue.
+    :param executor: Executor: The pool running the forward passes, a single thread by default.
+    :param max_concurrent_batches: int: How many batches may run in the executor at once.
+    :param timeout: float: Seconds a request may wait for its prediction, None to wait forever.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = 16,
+                 max_wait_ms: float = 5.0,
+                 max_queue_size: int = 256,
+                 executor: Executor = None,
+                 max_concurrent_batches: int = 1,
+                 timeout: float = None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self.max_concurrent_batches = max_concurrent_batches
+        self.timeout = timeout
+        self._queue: asyncio.Queue | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._worker_task: asyncio.Task | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._running: set = set()
+        self._batched_images = 0
+        self._batch_size = metrics.histogram("inference_batch_size", SIZE_BUCKETS)
+        self._queue_wait = metrics.histogram("inference_queue_wait_seconds", LATENCY_BUCKETS)
+        self._rejected = metrics.counter("inference_queue_rejected_total")
+        self._timeouts = metrics.counter("inference_timeouts_total")
+        self._infer_time = metrics.histogram("inference_forward_seconds", LATENCY_BUCKETS)
+        metrics.gauge("inference_queue_depth", self.queue_depth)
+        metrics.gauge("inference_batched_images", lambda: self._batched_images)
+
+    def queue_depth(self) -> int:
+        """
+        The **queue_depth** function returns the number of requests waiting for a batch.
+
+        :return: The current size of the queue.
+        """
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker_task is None or self._worker_task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker_task = loop.create_task(self._worker())
+
+    async def predict(self, image_array: np.ndarray) -> np.ndarray:
+        """
+        The **predict** function enqueues a single image and waits for its prediction.
+
+        :param image_array: np.ndarray: The preprocessed image of shape (height, width, channels).
+        :return: The prediction vector for the image.
+        :raises QueueFullError: If the queue already holds ``max_queue_size`` requests.
+        :raises InferenceTimeoutError: If the prediction is not ready within ``timeout`` seconds.
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((image_array, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._rejected.inc()
+            raise QueueFullError("Inference queue is full")
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts.inc()
+            raise InferenceTimeoutError(f"Prediction was not ready in {self.timeout} seconds")
+
+    async def predict_batch(self, images: np.ndarray, chunk_size: int = None, bounded: bool = False) -> np.ndarray:
+        """
+        The **predict_batch** function runs an already stacked batch of images without queueing.
+
+        The images are split into chunks of ``chunk_size`` (``max_batch_size`` by default), and each
+        chunk takes one executor slot, so bulk requests share the pool with the micro-batches.
+        A ``bounded`` batch is only admitted while the queued requests and the images of the batches
+        in progress are fewer than ``max_queue_size``, so that requests fail fast under load.
+
+        :param images: np.ndarray: The preprocessed images of shape (count, height, width, channels).
+        :param chunk_size: int: The maximum number of images in one forward pass.
+        :param bounded: bool: Whether to reject the batch when the predictor is overloaded.
+        :return: The predictions, one row per image.
+        :raises QueueFullError: If the batch is bounded and the predictor is overloaded.
+        :raises InferenceTimeoutError: If the predictions are not ready within ``timeout`` seconds.
+        """
+        self._ensure_started()
+        if bounded and self.queue_depth() + self._batched_images >= self.max_queue_size:
+            self._rejected.inc()
+            raise QueueFullError("Inference queue is full")
+        chunk_size = chunk_size or self.max_batch_size
+        images = images.astype(np.float32, copy=False)
+
+        async def run_chunk(chunk):
+            async with self._slots:
+                started = time.perf_counter()
+                self._batch_size.observe(len(chunk))
+                try:
+                    return await self._loop.run_in_executor(self.executor, self.predict_fn, chunk)
+                finally:
+                    self._infer_time.observe(time.perf_counter() - started)
+
+        chunks = [images[start:start + chunk_size] for start in range(0, len(images), chunk_size)]
+        self._batched_images += len(images)
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*(run_chunk(chunk) for chunk in chunks)),
+                                             self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts.inc()
+            raise InferenceTimeoutError(f"Predictions were not ready in {self.timeout} seconds")
+        finally:
+            self._batched_images -= len(images)
+        return np.concatenate(results) if results else np.empty((0,))
+
+    async def _collect_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._collect_batch()
+            await self._slots.acquire()
+            task = self._loop.create_task(self._run_batch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: list):
+        try:
+            # Requests that timed out while queued are dropped before the forward pass
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                return
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self._queue_wait.observe(started - enqueued)
+            self._batch_size.observe(len(batch))
+
+            futures = [future for _, future, _ in batch]
+            try:
+                images = np.stack([image for image, _, _ in batch]).astype(np.float32, copy=False)
+                predictions = await self._loop.run_in_executor(self.executor, self.predict_fn, images)
+            except Exception as err:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(err)
+                return
+            finally:
+                self._infer_time.observe(time.perf_counter() - started)
+
+            for future, prediction in zip(futures, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+        finally:
+            self._slots.release()
+
+    async def stop(self):
+        """
+        The **stop** function cancels the background worker of the current event loop.
+        Batches already handed to the executor are allowed to finish.
+        """
+        if self._worker_task is not None and not self._worker_task.done():
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self._worker_task = None
+        self._queue = None
+        self._loop = None
@@ -0,0 +1,175 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+
+class Counter:
+    """
+    A monotonically increasing in-process counter.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        """
+        Increase the counter.
+
+        :param amount: The value to add to the counter.
+        :type amount: int
+        """
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Histogram:
+    """
+    A cumulative histogram with fixed upper bounds, similar to the Prometheus histogram.
+
+    :param buckets: The sorted upper bounds of the buckets.
+    :type buckets: tuple
+    """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """
+        Record a single observation.
+
+        :param value: The observed value.
+        :type value: float
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """
+        Return the current state of the histogram.
+
+        :return: The total count, the sum and the cumulative count per bucket.
+        :rtype: dict
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        buckets = {}
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"count": count, "sum": total, "buckets": buckets}
+
+
+class MetricsRegistry:
+    """
+    A registry of named counters, histograms and gauges exposed by the application.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._gauges = {}
+
+    def counter(self, name: str) -> Counter:
+        """
+        Get or create a counter.
+
+        :param name: The name of the counter.
+        :type name: str
+        :return: The counter registered under the name.
+        :rtype: Counter
+        """
+        return self._metrics.setdefault(name, Counter())
+
+    def histogram(self, name: str, buckets: tuple) -> Histogram:
+        """
+        Get or create a histogram.
+
+        :param name: The name of the histogram.
+        :type name: str
+        :param buckets: The upper bounds of the buckets, used only when the histogram is created.
+        :type buckets: tuple
+        :return: The histogram registered under the name.
+        :rtype: Histogram
+        """
+        return self._metrics.setdefault(name, Histogram(buckets))
+
+    def gauge(self, name: str, func: Callable[[], float]):
+        """
+        Register a gauge whose value is read from a callable on every snapshot.
+
+        :param name: The name of the gauge.
+        :type name: str
+        :param func: A callable returning the current value.
+        :type func: Callable
+        """
+        self._gauges[name] = func
+
+    def snapshot(self) -> dict:
+        """
+        Return the current values of all registered metrics.
+
+        :return: A mapping of metric names to their values.
+        :rtype: dict
+        """
+        result = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        for name, func in self._gauges.items():
+            result[name] = func()
+        return result
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the stages of one request, e.g. decode, infer and db.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.source = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time the enclosed block and add its duration to a stage.
+
+        :param name: The name of the stage.
+        :type name: str
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def milliseconds(self) -> dict:
+        """
+        Return the durations of the stages in milliseconds.
+
+        :return: A mapping of stage names to durations.
+        :rtype: dict
+        """
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+metrics = MetricsRegistry()
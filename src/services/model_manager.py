@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.conf.config import settings
+from src.services.inference import load_predict_fn
+from src.services.metrics import metrics
+from src.services.model_registry import model_registry
+
+
+class ModelManager:
+    """
+    The **ModelManager** class owns the lifecycle of the classifier.
+
+    Nothing is loaded on import: the model is loaded either on the first prediction or by
+    :meth:`load` from the application startup hook, and is then warmed up with dummy batches
+    so that graph tracing and memory allocation do not happen during a real request.
+    The model is ready only once the warmup has completed.
+
+    :param backend: str: The inference backend, see :func:`load_predict_fn`.
+    :param model_path: str: The model file of the backend.
+    :param warmup_batches: int: The number of dummy forward passes for every warmup batch size.
+    :param warmup_batch_sizes: tuple: The batch sizes to warm up, typically 1 and the micro-batch limit.
+    :param mmap: bool: Whether to memory-map the NumPy weights, see :meth:`NumpyModel.load`.
+    :param version: str: The registry version of the model, the digest of the model file by default.
+    """
+
+    def __init__(self, backend: str, model_path: str, warmup_batches: int = 2, warmup_batch_sizes: tuple = (1,),
+                 mmap: bool = False, version: str = None):
+        self.backend = backend
+        self.model_path = model_path
+        self.mmap = mmap
+        self.warmup_batches = warmup_batches
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self.loaded = False
+        self.warmed = False
+        self.error = None
+        self._predict_fn = None
+        self._version = version
+        self._lock = threading.Lock()
+        self._load_time = metrics.histogram("model_load_seconds", (0.1, 0.5, 1, 2.5, 5, 10, 30, 60))
+        self._swaps = metrics.counter("model_swaps_total")
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the model is loaded and warmed up.
+        """
+        return self.loaded and self.warmed
+
+    @property
+    def version(self) -> str:
+        """
+        The registry version of the model, or else the short digest of the model file, or of every file
+        of a model directory. It tags the cached and the stored predictions.
+        """
+        if self._version is None:
+            if os.path.isdir(self.model_path):
+                paths = [os.path.join(self.model_path, name) for name in sorted(os.listdir(self.model_path))]
+            else:
+                paths = [self.model_path]
+            digest = hashlib.sha256()
+            for path in paths:
+                with open(path, 'rb') as model_file:
+                    file_digest = hashlib.sha256()
+                    for block in iter(lambda: model_file.read(1 << 20), b''):
+                        file_digest.update(block)
+                    digest.update(file_digest.digest())
+            self._version = digest.hexdigest()[:12]
+        return self._version
+
+    def load(self):
+        """
+        The **load** function loads and warms up the model once; concurrent callers wait for it.
+        It blocks, so it must run in an executor when called from the event loop.
+
+        :raises Exception: The error raised while loading the model.
+        """
+        if self.ready:
+            return
+        with self._lock:
+            if self.ready:
+                return
+            started = time.perf_counter()
+            try:
+                self._predict_fn = load_predict_fn(self.backend, self.model_path, self.mmap)
+                self.loaded = True
+                self.warmup(self._predict_fn)
+            except Exception as err:
+                self.error = str(err)
+                raise
+            self.error = None
+            self._load_time.observe(time.perf_counter() - started)
+
+    def swap(self, backend: str, model_path: str, version: str = None):
+        """
+        The **swap** function loads and warms up another model, then replaces the current one.
+
+        The current model keeps serving while the new one loads, and the batches already running
+        finish with the function they hold, so no request is dropped. It blocks, so it must run in
+        an executor other than the inference one when called from the event loop.
+
+        :param backend: str: The inference backend of the new model.
+        :param model_path: str: The model file of the new model.
+        :param version: str: The registry version of the new model.
+        :raises Exception: The error raised while loading the new model; the current one stays in place.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            predict_fn = load_predict_fn(backend, model_path, self.mmap)
+            self.warmup(predict_fn)
+            self._load_time.observe(time.perf_counter() - started)
+            self.use(backend, model_path, version, predict_fn)
+
+    def use(self, backend: str, model_path: str, version: str = None, predict_fn=None):
+        """
+        The **use** function switches to a model that is already loaded and warmed up, e.g. by process workers.
+
+        :param backend: str: The inference backend of the model.
+        :param model_path: str: The model file of the model.
+        :param version: str: The registry version of the model.
+        :param predict_fn: Callable: The prediction function of the model, None when it runs in other processes.
+        """
+        self.backend = backend
+        self.model_path = model_path
+        self._version = version
+        self._predict_fn = predict_fn
+        self.loaded = self.warmed = True
+        self.error = None
+        self._swaps.inc()
+
+    def warmup(self, predict_fn):
+        """
+        The **warmup** function runs dummy batches through a prediction function.
+
+        :param predict_fn: Callable: The function to warm up.
+        """
+        for batch_size in self.warmup_batch_sizes:
+            dummy = np.zeros((batch_size, 32, 32, 3), dtype=np.float32)
+            for _ in range(self.warmup_batches):
+                predict_fn(dummy)
+        self.warmed = True
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        The **predict** function runs a forward pass, loading the model first if needed.
+
+        :param batch: np.ndarray: A batch of preprocessed images.
+        :return: The batch of predictions.
+        """
+        if not self.ready:
+            self.load()
+        return self._predict_fn(batch)
+
+
+KERAS_MODEL_PATH = 'Models/cifar10_best_latest.h5'
+MODEL_PATHS = {"keras": KERAS_MODEL_PATH,
+               "numpy": settings.numpy_model_path,
+               "tflite": settings.tflite_model_path}
+
+# The active version of the model registry, when there is one, replaces the configured model
+active_version = model_registry.active()
+if active_version is not None:
+    model_manager = ModelManager(active_version.backend, active_version.path,
+                                 warmup_batches=settings.model_warmup_batches,
+                                 warmup_batch_sizes=(1, settings.predict_batch_max_size),
+                                 mmap=settings.numpy_model_mmap, version=active_version.name)
+else:
+    model_manager = ModelManager(settings.inference_backend, MODEL_PATHS[settings.inference_backend],
+                                 warmup_batches=settings.model_warmup_batches,
+                                 warmup_batch_sizes=(1, settings.predict_batch_max_size),
+                                 mmap=settings.numpy_model_mmap)
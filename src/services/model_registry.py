@@ -0,0 +1,192 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import NamedTuple
+
+from src.conf.config import settings
+
+BACKENDS = {".h5": "keras", ".keras": "keras", ".npz": "numpy", ".tflite": "tflite"}
+# Versions are stored in Prediction.model_version
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,16}$")
+
+
+class ModelNotFoundError(Exception):
+    """Raised when a model version is not in the registry."""
+    pass
+
+
+class ModelVersion(NamedTuple):
+    """
+    A registered model: its version name, its inference backend, the path of its artifact and its metadata.
+    """
+    name: str
+    backend: str
+    path: str
+    sha256: str
+    created: str
+    description: str = ""
+
+
+class ModelRegistry:
+    """
+    The **ModelRegistry** class keeps versioned model artifacts in a local directory.
+
+    Every version lives in its own subdirectory and is described in ``manifest.json``, together
+    with the active version and the shadowed candidate. The manifest is the state shared by all the workers of the application:
+    it is replaced atomically under a file lock, and every worker follows its active version.
+
+    :param directory: str: The directory of the registry.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.manifest_path) as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return {"active": None, "versions": {}}
+
+    def _write(self, manifest: dict):
+        with open(self.manifest_path + ".tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.replace(self.manifest_path + ".tmp", self.manifest_path)
+
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(os.path.join(self.directory, "manifest.lock"), "w")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _version(self, name: str, entry: dict) -> ModelVersion:
+        return ModelVersion(name=name, backend=entry["backend"], path=os.path.join(self.directory, entry["path"]),
+                            sha256=entry["sha256"], created=entry["created"],
+                            description=entry.get("description", ""))
+
+    def versions(self) -> list[ModelVersion]:
+        """
+        The **versions** function lists the registered versions.
+
+        :return: The versions, oldest first.
+        """
+        return [self._version(name, entry) for name, entry in self._read()["versions"].items()]
+
+    def get(self, name: str) -> ModelVersion:
+        """
+        The **get** function describes a registered version.
+
+        :param name: str: The version name.
+        :return: The version.
+        :raises ModelNotFoundError: If the version is not registered.
+        """
+        entry = self._read()["versions"].get(name)
+        if entry is None:
+            raise ModelNotFoundError(f"Unknown model version: {name}")
+        return self._version(name, entry)
+
+    def active(self) -> ModelVersion | None:
+        """
+        The **active** function describes the version the workers should serve.
+
+        :return: The active version, or None when the registry is empty.
+        """
+        manifest = self._read()
+        if manifest["active"] is None:
+            return None
+        return self._version(manifest["active"], manifest["versions"][manifest["active"]])
+
+    def register(self, source: str, backend: str = None, name: str = None, description: str = "") -> ModelVersion:
+        """
+        The **register** function copies a model artifact into the registry as a new version.
+
+        :param source: str: The model file, or the directory of memory-mapped NumPy weights.
+        :param backend: str: The inference backend, guessed from the extension by default.
+        :param name: str: The version name, "v1", "v2"... by default.
+        :param description: str: A free description, e.g. the training run.
+        :return: The new version; it is not activated.
+        :raises ValueError: If the name is invalid or taken, or the backend cannot be guessed.
+        """
+        backend = backend or BACKENDS.get(os.path.splitext(source.rstrip("/"))[1].lower())
+        if backend is None:
+            raise ValueError(f"Cannot guess the backend of {source}")
+        with self._locked():
+            manifest = self._read()
+            name = name or f"v{len(manifest['versions']) + 1}"
+            if not VERSION_PATTERN.match(name) or name in manifest["versions"]:
+                raise ValueError(f"Invalid or existing model version: {name}")
+
+            relative = os.path.join(name, os.path.basename(source.rstrip("/")))
+            target = os.path.join(self.directory, relative)
+            os.makedirs(os.path.dirname(target))
+            digest = hashlib.sha256()
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+                paths = [os.path.join(target, filename) for filename in sorted(os.listdir(target))]
+            else:
+                shutil.copy2(source, target)
+                paths = [target]
+            for path in paths:
+                with open(path, "rb") as model_file:
+                    file_digest = hashlib.sha256()
+                    for block in iter(lambda: model_file.read(1 << 20), b""):
+                        file_digest.update(block)
+                    digest.update(file_digest.digest())
+
+            manifest["versions"][name] = {"backend": backend, "path": relative, "sha256": digest.hexdigest(),
+                                          "created": datetime.now().isoformat(timespec="seconds"),
+                                          "description": description}
+            self._write(manifest)
+        return self.get(name)
+
+    def activate(self, name: str) -> ModelVersion:
+        """
+        The **activate** function makes a version the one every worker should serve.
+
+        :param name: str: The version name.
+        :return: The version.
+        :raises ModelNotFoundError: If the version is not registered.
+        """
+        with self._locked():
+            manifest = self._read()
+            if name not in manifest["versions"]:
+                raise ModelNotFoundError(f"Unknown model version: {name}")
+            manifest["active"] = name
+            self._write(manifest)
+        return self.get(name)
+
+    def shadow(self) -> ModelVersion | None:
+        """
+        The **shadow** function describes the candidate version the workers should compare with the active one.
+
+        :return: The shadowed version, or None when shadowing is off.
+        """
+        manifest = self._read()
+        name = manifest.get("shadow")
+        if name is None:
+            return None
+        return self._version(name, manifest["versions"][name])
+
+    def set_shadow(self, name: str | None) -> ModelVersion | None:
+        """
+        The **set_shadow** function makes a version the candidate every worker should shadow.
+
+        :param name: str: The version name, None to stop shadowing.
+        :return: The version, or None.
+        :raises ModelNotFoundError: If the version is not registered.
+        """
+        with self._locked():
+            manifest = self._read()
+            if name is not None and name not in manifest["versions"]:
+                raise ModelNotFoundError(f"Unknown model version: {name}")
+            manifest["shadow"] = name
+            self._write(manifest)
+        return self.get(name) if name is not None else None
+
+
+model_registry = ModelRegistry(settings.model_registry_dir)
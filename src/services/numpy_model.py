@@ -0,0 +1,259 @@
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _same_padding(size: int, kernel: int, stride: int) -> tuple[int, int]:
+    out = -(-size // stride)
+    total = max((out - 1) * stride + kernel - size, 0)
+    return total // 2, total - total // 2
+
+
+def elu(x: np.ndarray) -> np.ndarray:
+    return np.where(x > 0, x, np.expm1(np.minimum(x, 0)))
+
+
+def softmax(x: np.ndarray) -> np.ndarray:
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "elu": elu,
+    "softmax": softmax,
+}
+
+
+def im2col(x: np.ndarray, kernel: tuple, strides: tuple, padding: str) -> np.ndarray:
+    """
+    The **im2col** function gathers the receptive field of every output pixel of a convolution.
+
+    :param x: np.ndarray: The input of shape (batch, height, width, channels).
+    :param kernel: tuple: The kernel height and width.
+    :param strides: tuple: The vertical and horizontal strides.
+    :param padding: str: Either "same" or "valid", as in Keras.
+    :return: The patches of shape (batch, out_height, out_width, kernel_height * kernel_width * channels).
+    """
+    kh, kw = kernel
+    sh, sw = strides
+    if padding == "same":
+        x = np.pad(x, ((0, 0), _same_padding(x.shape[1], kh, sh), _same_padding(x.shape[2], kw, sw), (0, 0)))
+    windows = sliding_window_view(x, (kh, kw), axis=(1, 2))[:, ::sh, ::sw]
+    # (batch, out_h, out_w, channels, kh, kw) -> (batch, out_h, out_w, kh, kw, channels), the Keras kernel order
+    windows = windows.transpose(0, 1, 2, 4, 5, 3)
+    return windows.reshape(*windows.shape[:3], -1)
+
+
+def conv2d(x: np.ndarray, layer: dict) -> np.ndarray:
+    kernel = layer["kernel"]
+    patches = im2col(x, kernel.shape[:2], layer["strides"], layer["padding"])
+    # A single 2-D product lets BLAS see the whole batch instead of one GEMM per output row
+    out = (patches.reshape(-1, patches.shape[-1]) @ kernel.reshape(-1, kernel.shape[-1]))
+    out = out.reshape(*patches.shape[:3], -1)
+    if "bias" in layer:
+        out += layer["bias"]
+    return ACTIVATIONS[layer["activation"]](out)
+
+
+def max_pooling2d(x: np.ndarray, layer: dict) -> np.ndarray:
+    ph, pw = layer["pool_size"]
+    sh, sw = layer["strides"]
+    if layer["padding"] == "same":
+        x = np.pad(x, ((0, 0), _same_padding(x.shape[1], ph, sh), _same_padding(x.shape[2], pw, sw), (0, 0)),
+                   constant_values=-np.inf)
+    if (ph, pw) == (sh, sw):
+        n, h, w, c = x.shape
+        h, w = h // ph, w // pw
+        return x[:, :h * ph, :w * pw].reshape(n, h, ph, w, pw, c).max(axis=(2, 4))
+    return sliding_window_view(x, (ph, pw), axis=(1, 2))[:, ::sh, ::sw].max(axis=(4, 5))
+
+
+def batch_normalization(x: np.ndarray, layer: dict) -> np.ndarray:
+    return x * layer["scale"] + layer["shift"]
+
+
+def dense(x: np.ndarray, layer: dict) -> np.ndarray:
+    out = x @ layer["kernel"]
+    if "bias" in layer:
+        out += layer["bias"]
+    return ACTIVATIONS[layer["activation"]](out)
+
+
+FORWARD = {
+    "conv2d": conv2d,
+    "max_pooling2d": max_pooling2d,
+    "batch_normalization": batch_normalization,
+    "dense": dense,
+    "activation": lambda x, layer: ACTIVATIONS[layer["activation"]](x),
+    "flatten": lambda x, layer: x.reshape(len(x), -1),
+}
+
+
+def mmap_directory(path: str) -> str:
+    """
+    The **mmap_directory** function returns the directory an .npz model is unpacked to for memory-mapping.
+
+    :param path: str: The .npz file.
+    :return: The sibling directory with the ".weights" suffix.
+    """
+    return os.path.splitext(path)[0] + ".weights"
+
+
+class NumpyModel:
+    """
+    The **NumpyModel** class runs the CIFAR-10 CNN with vectorized NumPy, without TensorFlow.
+
+    Convolutions are computed as one matrix product over im2col patches, batch normalization
+    is folded at export time into a single per-channel scale and shift, and dropout is removed.
+
+    :param layers: list[dict]: The inference layers, each with a "type" and its parameters.
+    """
+
+    def __init__(self, layers: list[dict]):
+        self.layers = layers
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        The **predict** function runs a forward pass.
+
+        :param batch: np.ndarray: The images of shape (batch, 32, 32, 3) with values in [0, 1].
+        :return: The class probabilities of shape (batch, 10).
+        """
+        x = np.asarray(batch, dtype=np.float32)
+        for layer in self.layers:
+            x = FORWARD[layer["type"]](x, layer)
+        return x
+
+    def save(self, path: str):
+        """
+        The **save** function writes the layers into a single .npz file.
+
+        :param path: str: The destination file.
+        """
+        architecture = []
+        arrays = {}
+        for i, layer in enumerate(self.layers):
+            config = {}
+            for name, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    arrays[f"{i}/{name}"] = value
+                else:
+                    config[name] = value
+            architecture.append(config)
+        np.savez(path, architecture=np.array(json.dumps(architecture)), **arrays)
+
+    def save_mmap(self, directory: str):
+        """
+        The **save_mmap** function writes the layers as one .npy file per array, so that they can be
+        memory-mapped. The files are written to a staging directory that is renamed into place,
+        so a reader never sees a partially written model.
+
+        :param directory: str: The destination directory.
+        """
+        staging = tempfile.mkdtemp(prefix=".weights-", dir=os.path.dirname(os.path.abspath(directory)))
+        architecture = []
+        for i, layer in enumerate(self.layers):
+            config = {}
+            for name, value in layer.items():
+                if isinstance(value, np.ndarray):
+                    np.save(os.path.join(staging, f"{i}.{name}.npy"), np.ascontiguousarray(value))
+                else:
+                    config[name] = value
+            architecture.append(config)
+        with open(os.path.join(staging, "architecture.json"), "w") as architecture_file:
+            json.dump(architecture, architecture_file)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> "NumpyModel":
+        """
+        The **load** function reads a model written by :meth:`save` or :meth:`save_mmap`.
+
+        A directory written by :meth:`save_mmap` is always memory-mapped read-only: the weights stay
+        in the page cache and every process mapping them shares the same physical pages.
+        With ``mmap`` an .npz file is first unpacked next to itself into such a directory.
+
+        :param path: str: The .npz file or the directory of .npy files.
+        :param mmap: bool: Whether to memory-map the weights of an .npz file.
+        :return: The model.
+        """
+        if os.path.isdir(path):
+            with open(os.path.join(path, "architecture.json")) as architecture_file:
+                layers = json.load(architecture_file)
+            for file_name in os.listdir(path):
+                if file_name.endswith(".npy"):
+                    index, name, _ = file_name.split(".")
+                    layers[int(index)][name] = np.load(os.path.join(path, file_name), mmap_mode="r")
+            return cls(layers)
+
+        if mmap:
+            directory = mmap_directory(path)
+            # Workers start together: one of them unpacks the model while the others wait for it
+            with open(directory + ".lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not os.path.isdir(directory) or os.path.getmtime(directory) < os.path.getmtime(path):
+                    cls.load(path).save_mmap(directory)
+                return cls.load(directory)
+
+        with np.load(path) as data:
+            layers = json.loads(str(data["architecture"]))
+            for i, layer in enumerate(layers):
+                for key in data.files:
+                    index, _, name = key.partition("/")
+                    if index == str(i):
+                        layer[name] = data[key]
+        return cls(layers)
+
+    @classmethod
+    def from_keras(cls, model) -> "NumpyModel":
+        """
+        The **from_keras** function converts a loaded Keras Sequential model.
+
+        :param model: The Keras model.
+        :return: The equivalent NumPy model.
+        :raises ValueError: If the model contains a layer that is not supported.
+        """
+        layers = []
+        for keras_layer in model.layers:
+            kind = type(keras_layer).__name__
+            config = keras_layer.get_config()
+            weights = keras_layer.get_weights()
+            if kind == "Dropout" or kind == "InputLayer":
+                continue
+            if kind == "Conv2D":
+                layer = {"type": "conv2d", "strides": list(config["strides"]), "padding": config["padding"],
+                         "activation": config["activation"], "kernel": weights[0].astype(np.float32)}
+                if config["use_bias"]:
+                    layer["bias"] = weights[1].astype(np.float32)
+            elif kind == "Dense":
+                layer = {"type": "dense", "activation": config["activation"], "kernel": weights[0].astype(np.float32)}
+                if config["use_bias"]:
+                    layer["bias"] = weights[1].astype(np.float32)
+            elif kind == "MaxPooling2D":
+                layer = {"type": "max_pooling2d", "pool_size": list(config["pool_size"]),
+                         "strides": list(config["strides"] or config["pool_size"]), "padding": config["padding"]}
+            elif kind == "BatchNormalization":
+                weights = list(weights)
+                gamma = weights.pop(0) if config["scale"] else 1.0
+                beta = weights.pop(0) if config["center"] else 0.0
+                mean, variance = weights
+                scale = gamma / np.sqrt(variance + config["epsilon"])
+                layer = {"type": "batch_normalization",
+                         "scale": np.asarray(scale, dtype=np.float32),
+                         "shift": np.asarray(beta - mean * scale, dtype=np.float32)}
+            elif kind == "Activation":
+                layer = {"type": "activation", "activation": config["activation"]}
+            elif kind == "Flatten":
+                layer = {"type": "flatten"}
+            else:
+                raise ValueError(f"Unsupported layer {kind}")
+            layers.append(layer)
+        return cls(layers)
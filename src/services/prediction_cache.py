@@ -0,0 +1,127 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from src.services.metrics import metrics
+
+
+class PredictionCache:
+    """
+    The **PredictionCache** class stores prediction results keyed by the hash of the image bytes.
+
+    The first tier is an in-process LRU bounded by the number of entries and by their total size.
+    The optional second tier is Redis, shared by all workers and consulted on a memory miss.
+
+    :param max_entries: int: The maximum number of entries kept in memory.
+    :param max_bytes: int: The maximum total size of the serialized entries kept in memory.
+    :param redis_client: The asynchronous Redis client of the second tier, or None to disable it.
+    :param ttl: int: The lifetime of the Redis entries in seconds.
+    :param namespace: str: The prefix of the Redis keys.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024,
+                 redis_client=None, ttl: int = 86400, namespace: str = "prediction"):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.redis = redis_client
+        self.ttl = ttl
+        self.namespace = namespace
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._memory_hits = metrics.counter("prediction_cache_memory_hits_total")
+        self._redis_hits = metrics.counter("prediction_cache_redis_hits_total")
+        self._misses = metrics.counter("prediction_cache_misses_total")
+        self._evictions = metrics.counter("prediction_cache_evictions_total")
+        self._redis_errors = metrics.counter("prediction_cache_redis_errors_total")
+        metrics.gauge("prediction_cache_entries", lambda: len(self._entries))
+        metrics.gauge("prediction_cache_bytes", lambda: self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(data, model_version: str) -> str:
+        """
+        The **key** function builds the cache key of an image for a given model version.
+
+        :param data: bytes: The raw bytes of the uploaded image.
+        :param model_version: str: The version of the model producing the prediction.
+        :return: The hex digest identifying the image and the model.
+        """
+        digest = hashlib.sha256(model_version.encode("utf-8"))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _get_local(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += len(value)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions.inc()
+
+    async def get(self, key: str) -> dict | None:
+        """
+        The **get** function returns the cached prediction for a key.
+
+        :param key: str: The key built by :meth:`key`.
+        :return: The cached prediction, or None on a miss.
+        """
+        value = self._get_local(key)
+        if value is not None:
+            self._memory_hits.inc()
+            return json.loads(value)
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(f"{self.namespace}:{key}")
+            except Exception as err:
+                print(err)
+                self._redis_errors.inc()
+                value = None
+            if value is not None:
+                self._redis_hits.inc()
+                self._set_local(key, value)
+                return json.loads(value)
+
+        self._misses.inc()
+        return None
+
+    async def set(self, key: str, prediction: dict):
+        """
+        The **set** function stores a prediction in every tier.
+
+        :param key: str: The key built by :meth:`key`.
+        :param prediction: dict: The JSON-serializable prediction.
+        """
+        value = json.dumps(prediction).encode("utf-8")
+        self._set_local(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set(f"{self.namespace}:{key}", value, ex=self.ttl)
+            except Exception as err:
+                print(err)
+                self._redis_errors.inc()
+
+    def clear(self):
+        """
+        The **clear** function drops all entries of the in-memory tier.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable
+
+from src.conf.config import settings
+from src.database.db import sessionmanager
+from src.repository.predicts import insert_predictions
+from src.services.metrics import metrics, LATENCY_BUCKETS
+
+
+class PredictionWriter:
+    """
+    The **PredictionWriter** class stores prediction rows behind the request path.
+
+    Rows are appended to an in-memory buffer and a background task writes them, with their hourly
+    counts per label, in a single multi-row INSERT and one commit, as soon as ``max_rows`` rows
+    are pending or ``max_wait_ms`` after the first pending row. A request therefore returns without waiting for the database.
+    Rows of a failed flush are kept for the next one; when the buffer holds ``max_pending`` rows
+    the oldest are dropped, so a database outage cannot exhaust the memory.
+
+    :param session_factory: Callable: Returns an async context manager yielding an AsyncSession.
+    :param max_rows: int: The number of pending rows that triggers a flush.
+    :param max_wait_ms: float: The maximum time a row waits in the buffer, in milliseconds.
+    :param max_pending: int: The maximum number of rows kept in the buffer.
+    """
+
+    def __init__(self, session_factory: Callable = None, max_rows: int = 100, max_wait_ms: float = 200.0,
+                 max_pending: int = 10000):
+        self.session_factory = session_factory or sessionmanager.session
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self._rows: list[dict] = []
+        self._loop = None
+        self._wakeup = None
+        self._worker_task = None
+        self._flush_lock = None
+        self._flush_time = metrics.histogram("prediction_writer_flush_seconds", LATENCY_BUCKETS)
+        self._written = metrics.counter("prediction_writer_rows_total")
+        self._errors = metrics.counter("prediction_writer_flush_errors_total")
+        self._dropped = metrics.counter("prediction_writer_dropped_total")
+        metrics.gauge("prediction_writer_buffer_depth", lambda: len(self._rows))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker_task is None or self._worker_task.done():
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._worker_task = loop.create_task(self._worker())
+
+    def add(self, filename: str, url: str, predicted_label: str, **scores):
+        """
+        The **add** function queues one prediction row; it never waits for the database.
+
+        :param filename: str: The name of the classified file.
+        :param url: str: The URL of the image, empty for uploads.
+        :param predicted_label: str: The predicted label.
+        :param scores: The optional class_index, score, top_k_scores and model_version of the prediction.
+        """
+        self.add_many([{"filename": filename, "url": url, "predicted_label": predicted_label, **scores}])
+
+    def add_many(self, predictions: list[dict]):
+        """
+        The **add_many** function queues several prediction rows.
+
+        :param predictions: list[dict]: The filename, url and predicted_label of every prediction,
+            with their optional class_index, score, top_k_scores and model_version.
+        """
+        self._ensure_started()
+        prediction_date = datetime.now()
+        self._rows.extend({"prediction_date": prediction_date, **prediction} for prediction in predictions)
+        self._trim()
+        self._wakeup.set()
+
+    def _trim(self):
+        excess = len(self._rows) - self.max_pending
+        if excess > 0:
+            del self._rows[:excess]
+            self._dropped.inc(excess)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # The first pending row starts the clock; a full buffer is written at once
+            deadline = loop.time() + self.max_wait
+            while len(self._rows) < self.max_rows and loop.time() < deadline:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+            if not await self.flush() and self._rows:
+                # The database is failing: retry later instead of spinning
+                await asyncio.sleep(self.max_wait)
+
+    async def flush(self) -> int:
+        """
+        The **flush** function writes every pending row now.
+
+        :return: The number of rows written.
+        """
+        if self._flush_lock is None:
+            self._ensure_started()
+        async with self._flush_lock:
+            rows, self._rows = self._rows, []
+            self._wakeup.clear()
+            if not rows:
+                return 0
+            started = time.perf_counter()
+            written = False
+            try:
+                async with self.session_factory() as session:
+                    await insert_predictions(rows, session)
+                    written = True
+            except Exception as err:
+                print(err)
+            finally:
+                if not written:
+                    self._errors.inc()
+                    # Keep the rows for the next flush, before the rows queued meanwhile
+                    self._rows[:0] = rows
+                    self._trim()
+                    self._wakeup.set()
+            if not written:
+                return 0
+            self._flush_time.observe(time.perf_counter() - started)
+            self._written.inc(len(rows))
+            return len(rows)
+
+    async def stop(self):
+        """
+        The **stop** function stops the background task and writes the pending rows.
+        """
+        if self._worker_task is not None and not self._worker_task.done():
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+        if self._rows:
+            await self.flush()
+        self._worker_task = None
+        self._loop = None
+
+
+prediction_writer = PredictionWriter(max_rows=settings.prediction_flush_rows,
+                                     max_wait_ms=settings.prediction_flush_interval_ms,
+                                     max_pending=settings.prediction_buffer_max)
@@ -0,0 +1,77 @@
+import os
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+INPUT_SIZE = (32, 32)
+# JPEGs are decoded at the smallest DCT scale keeping this size, enough headroom for an antialiased resize
+DRAFT_SIZE = (INPUT_SIZE[0] * 4, INPUT_SIZE[1] * 4)
+# Other formats are first shrunk by an integer factor with a box filter, down to this multiple of the input size
+REDUCING_GAP = 3.0
+
+
+def decode_image(f: bytes) -> np.ndarray:
+    """
+    Decodes image bytes into the normalized 32x32 RGB array expected by the model.
+
+    JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale, so a 12MP photo is never decoded in full.
+    Other formats are reduced by an integer factor before the final bicubic resize.
+
+    :param f: bytes: The raw bytes of the image.
+    :return: np.ndarray: The image of shape (32, 32, 3) with values in [0, 1].
+    """
+    image = Image.open(BytesIO(f))
+    if image.format == "JPEG":
+        image.draft("RGB", DRAFT_SIZE)
+        image = image.resize(INPUT_SIZE)
+    else:
+        image = image.resize(INPUT_SIZE, reducing_gap=REDUCING_GAP)
+    return np.array(image.convert('RGB')) / 255.0
+
+
+def make_preview(f: bytes, max_size: int = 256, quality: int = 80) -> tuple[bytes, str]:
+    """
+    Re-encodes an image into a small preview for the response page.
+
+    :param f: bytes: The raw bytes of the image.
+    :param max_size: int: The maximum width and height of the preview.
+    :param quality: int: The JPEG quality of the preview.
+    :return: tuple: The encoded preview and its MIME type, PNG for images with transparency, JPEG otherwise.
+    """
+    image = Image.open(BytesIO(f))
+    # thumbnail decodes JPEGs in draft mode and keeps the aspect ratio
+    image.thumbnail((max_size, max_size), reducing_gap=REDUCING_GAP)
+    buffer = BytesIO()
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        image.convert("RGBA").save(buffer, "PNG", optimize=True)
+        return buffer.getvalue(), "image/png"
+    image.convert("RGB").save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue(), "image/jpeg"
+
+
+def load_image_folder(path: str, limit: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Loads the images of a local folder for calibration or evaluation.
+
+    Images placed in a subfolder named after a class index (``0`` to ``9``) are labeled with it,
+    all other images get the label -1. Files that are not images are skipped.
+
+    :param path: str: The root folder.
+    :param limit: int: The maximum number of images to load.
+    :return: tuple: The images of shape (count, 32, 32, 3) and their labels.
+    """
+    images, labels = [], []
+    for root, _, files in sorted(os.walk(path)):
+        folder = os.path.basename(root)
+        label = int(folder) if folder.isdigit() else -1
+        for name in sorted(files):
+            if limit is not None and len(images) >= limit:
+                break
+            with open(os.path.join(root, name), 'rb') as image_file:
+                try:
+                    images.append(decode_image(image_file.read()))
+                except (OSError, ValueError):
+                    continue
+            labels.append(label)
+    return np.array(images, dtype=np.float32).reshape(-1, *INPUT_SIZE, 3), np.array(labels)
@@ -0,0 +1,105 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from src.services.model_manager import ModelManager
+from src.services.model_registry import ModelRegistry, ModelVersion
+from src.services.shadow import ShadowEvaluator
+
+
+class RegistryFollower:
+    """
+    The **RegistryFollower** class keeps a worker serving the active version of the model registry.
+
+    Every ``interval`` seconds, and at once when :meth:`trigger` is called, the active version of the
+    manifest is compared with the served one, and ``swap`` is awaited to switch to it. Each worker
+    process runs its own follower, so activating a version through any worker reaches all of them.
+    A version that fails to load is not retried until another one is activated. The shadowed
+    candidate of the manifest, if any, is handed over to ``shadow`` the same way.
+
+    :param registry: ModelRegistry: The registry to follow.
+    :param manager: ModelManager: The model served by the worker.
+    :param swap: Callable: Loads, warms up and switches to a version, without interrupting the current one.
+    :param interval: float: Seconds between two reads of the manifest.
+    :param shadow: ShadowEvaluator: Compares the shadowed candidate with the served model, optional.
+    """
+
+    def __init__(self, registry: ModelRegistry, manager: ModelManager,
+                 swap: Callable[[ModelVersion], Awaitable[None]], interval: float = 5.0,
+                 shadow: ShadowEvaluator = None):
+        self.registry = registry
+        self.manager = manager
+        self.swap = swap
+        self.interval = interval
+        self.shadow = shadow
+        self.loading: str | None = None
+        self.failed: str | None = None
+        self.error: str | None = None
+        self._task: asyncio.Task | None = None
+        self._sync_task: asyncio.Task | None = None
+
+    def snapshot(self) -> dict:
+        """
+        The **snapshot** function describes the served version and the swap in progress.
+
+        :return: The served, loading and failed versions and the last error.
+        """
+        return {"serving": self.manager.version, "loading": self.loading, "failed": self.failed, "error": self.error}
+
+    async def sync(self):
+        """
+        The **sync** function switches to the active version of the registry if it is not served yet,
+        and to its shadowed candidate if it is not shadowed yet.
+        """
+        if self.shadow is not None:
+            candidate = self.registry.shadow()
+            if (candidate.name if candidate is not None else None) != self.shadow.version:
+                self.shadow.set_candidate(candidate)
+        active = self.registry.active()
+        if active is None or active.name in (self.manager.version, self.loading, self.failed):
+            return
+        self.loading = active.name
+        try:
+            await self.swap(active)
+            self.failed = self.error = None
+        except Exception as err:
+            self.failed = active.name
+            self.error = str(err) or type(err).__name__
+        finally:
+            self.loading = None
+
+    def trigger(self) -> asyncio.Task:
+        """
+        The **trigger** function starts a :meth:`sync` in the background, unless one is running.
+
+        :return: The task of the sync.
+        """
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.get_running_loop().create_task(self.sync())
+        return self._sync_task
+
+    async def _run(self):
+        while True:
+            await asyncio.shield(self.trigger())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        The **start** function starts following the registry in the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        The **stop** function stops following the registry; a swap in progress is allowed to finish.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self._sync_task is not None and not self._sync_task.done():
+            await self._sync_task
+        self._sync_task = None
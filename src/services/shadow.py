@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.conf.config import settings
+from src.services.metrics import metrics, LATENCY_BUCKETS
+from src.services.model_manager import ModelManager
+from src.services.model_registry import ModelVersion
+
+
+class ShadowEvaluator:
+    """
+    The **ShadowEvaluator** class compares a candidate model with the served one on real traffic.
+
+    A sampled fraction of the images classified by the served model is also classified by the
+    candidate, in background tasks and in threads of its own, after the response no longer depends
+    on it. At most ``max_concurrency`` images are shadowed at once: when the cap is reached the
+    sample is dropped instead of queued, so shadowing never delays a response nor piles up work.
+    The agreement of the two models and their latencies are kept for the current candidate
+    and exported as metrics.
+
+    :param sample_rate: float: The fraction of the predictions that are shadowed, from 0 to 1.
+    :param max_concurrency: int: The maximum number of images classified by the candidate at once.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_concurrency: int = 2):
+        self.sample_rate = sample_rate
+        self.max_concurrency = max_concurrency
+        self.candidate: ModelManager | None = None
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="shadow")
+        self._in_flight = 0
+        self._tasks: set = set()
+        self._reset()
+        self._sampled = metrics.counter("shadow_sampled_total")
+        self._dropped = metrics.counter("shadow_dropped_total")
+        self._errors = metrics.counter("shadow_errors_total")
+        self._agreements = metrics.counter("shadow_agreements_total")
+        self._disagreements_total = metrics.counter("shadow_disagreements_total")
+        self._candidate_time = metrics.histogram("shadow_candidate_seconds", LATENCY_BUCKETS)
+        self._primary_time = metrics.histogram("shadow_primary_seconds", LATENCY_BUCKETS)
+        metrics.gauge("shadow_in_flight", lambda: self._in_flight)
+
+    def _reset(self):
+        self.compared = 0
+        self.agreed = 0
+        self.primary_seconds = 0.0
+        self.candidate_seconds = 0.0
+        self.disagreements = Counter()
+
+    @property
+    def version(self) -> str | None:
+        """
+        The version of the candidate, None when shadowing is off.
+        """
+        return self.candidate.version if self.candidate is not None else None
+
+    def set_candidate(self, version: ModelVersion | None):
+        """
+        The **set_candidate** function starts shadowing a registered version, or stops shadowing.
+        The candidate is loaded and warmed up in the shadow threads, and its statistics start from zero.
+
+        :param version: ModelVersion: The candidate, None to stop shadowing.
+        """
+        self._reset()
+        if version is None:
+            self.candidate = None
+            return
+        self.candidate = ModelManager(version.backend, version.path, warmup_batches=1, warmup_batch_sizes=(1,),
+                                      version=version.name)
+        self.executor.submit(self.candidate.load)
+
+    def submit(self, image_array: np.ndarray, class_index: int, primary_seconds: float):
+        """
+        The **submit** function hands an image classified by the served model over to the candidate, maybe.
+        It returns at once; the comparison happens in the background.
+
+        :param image_array: np.ndarray: The preprocessed image.
+        :param class_index: int: The class predicted by the served model.
+        :param primary_seconds: float: The time the served model took, queueing included.
+        """
+        candidate = self.candidate
+        if candidate is None or random.random() >= self.sample_rate:
+            return
+        self._sampled.inc()
+        if self._in_flight >= self.max_concurrency or not candidate.ready:
+            self._dropped.inc()
+            return
+        self._in_flight += 1
+        task = asyncio.get_running_loop().create_task(self._compare(candidate, image_array, class_index,
+                                                                    primary_seconds))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compare(self, candidate: ModelManager, image_array: np.ndarray, class_index: int,
+                       primary_seconds: float):
+        try:
+            started = time.perf_counter()
+            prediction = await asyncio.get_running_loop().run_in_executor(
+                self.executor, candidate.predict, image_array[np.newaxis].astype(np.float32))
+            candidate_seconds = time.perf_counter() - started
+        except Exception as err:
+            print(f"Shadow prediction failed: {err}")
+            self._errors.inc()
+            return
+        finally:
+            self._in_flight -= 1
+        if candidate is not self.candidate:
+            # The candidate changed meanwhile
+            return
+
+        candidate_index = int(np.argmax(prediction[0]))
+        self.compared += 1
+        self.primary_seconds += primary_seconds
+        self.candidate_seconds += candidate_seconds
+        self._primary_time.observe(primary_seconds)
+        self._candidate_time.observe(candidate_seconds)
+        if candidate_index == class_index:
+            self.agreed += 1
+            self._agreements.inc()
+        else:
+            self.disagreements[(class_index, candidate_index)] += 1
+            self._disagreements_total.inc()
+
+    def snapshot(self) -> dict:
+        """
+        The **snapshot** function summarizes the comparison with the current candidate.
+
+        :return: The candidate and its loading state, the number of compared images, the agreement rate,
+            the mean latencies and the most frequent disagreements as (served class, candidate class, count).
+        """
+        compared = self.compared or None
+        return {"candidate": self.version,
+                "ready": self.candidate.ready if self.candidate is not None else False,
+                "error": self.candidate.error if self.candidate is not None else None,
+                "sample_rate": self.sample_rate,
+                "compared": self.compared,
+                "agreement_rate": self.agreed / compared if compared else None,
+                "primary_ms": round(self.primary_seconds / compared * 1000, 3) if compared else None,
+                "candidate_ms": round(self.candidate_seconds / compared * 1000, 3) if compared else None,
+                "disagreements": [[served, candidate, count]
+                                  for (served, candidate), count in self.disagreements.most_common(10)]}
+
+    async def stop(self):
+        """
+        The **stop** function waits for the comparisons in progress.
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+shadow_evaluator = ShadowEvaluator(settings.shadow_sample_rate, settings.shadow_max_concurrency)
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from src.services.metrics import metrics
+
+
+class SingleFlight:
+    """
+    The **SingleFlight** class lets concurrent identical requests share one computation.
+
+    The first caller for a key starts the computation in its own task; every caller arriving
+    with the same key before it finishes awaits that task instead of starting another one.
+    The task is shielded, so a caller that disconnects does not cancel it for the others,
+    and the key is forgotten as soon as the result is available, so nothing is cached.
+
+    :param name: str: The prefix of the metrics, e.g. "prediction".
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[str, asyncio.Task] = {}
+        self._started = metrics.counter(f"{name}_single_flight_calls_total")
+        self._coalesced = metrics.counter(f"{name}_single_flight_coalesced_total")
+        metrics.gauge(f"{name}_single_flight_in_flight", lambda: len(self._calls))
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        """
+        The **do** function returns the result of ``func``, sharing it with the concurrent calls of the same key.
+
+        :param key: str: The identity of the computation, e.g. a content hash or a normalized URL.
+        :param func: Callable: A function returning the coroutine to run when no call is in flight.
+        :return: The result of the computation.
+        :raises Exception: The error raised by the computation, to every caller.
+        """
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self._coalesced.inc()
+        else:
+            self._started.inc()
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
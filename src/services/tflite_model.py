@@ -0,0 +1,85 @@
+import os
+import tempfile
+import threading
+from typing import Iterable
+
+import numpy as np
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """
+    The **TFLiteModel** class runs a TensorFlow Lite model, such as the int8 quantized classifier.
+
+    A TFLite interpreter is not thread-safe, so every executor thread gets its own interpreter.
+    The input tensor is resized when the batch size changes.
+
+    :param model_path: str: The .tflite file.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self._local = threading.local()
+
+    def _interpreter(self, batch_size: int):
+        interpreter = getattr(self._local, "interpreter", None)
+        if interpreter is None:
+            interpreter = Interpreter(model_path=self.model_path)
+            self._local.interpreter = interpreter
+            self._local.batch_size = None
+        if self._local.batch_size != batch_size:
+            input_details = interpreter.get_input_details()[0]
+            interpreter.resize_tensor_input(input_details["index"], [batch_size, *input_details["shape"][1:]])
+            interpreter.allocate_tensors()
+            self._local.batch_size = batch_size
+        return interpreter
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        The **predict** function runs a forward pass.
+
+        :param batch: np.ndarray: The images of shape (batch, 32, 32, 3) with values in [0, 1].
+        :return: The class probabilities of shape (batch, 10).
+        """
+        interpreter = self._interpreter(len(batch))
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        interpreter.set_tensor(input_details["index"], np.asarray(batch, dtype=input_details["dtype"]))
+        interpreter.invoke()
+        return interpreter.get_tensor(output_details["index"]).copy()
+
+
+def quantize_keras_model(model, calibration_images: Iterable[np.ndarray], output_path: str) -> int:
+    """
+    The **quantize_keras_model** function applies post-training int8 quantization to a Keras model.
+
+    Weights and activations are stored as int8, the activation ranges being measured on the
+    calibration images. The model keeps float32 input and output, so it is a drop-in replacement.
+
+    :param model: The Keras model.
+    :param calibration_images: Iterable[np.ndarray]: Preprocessed images of shape (32, 32, 3).
+    :param output_path: str: The destination .tflite file.
+    :return: The size of the quantized model in bytes.
+    """
+    import tensorflow as tf
+
+    def representative_dataset():
+        for image in calibration_images:
+            yield [np.expand_dims(image, 0).astype(np.float32)]
+
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir)
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        flatbuffer = converter.convert()
+
+    with open(output_path, "wb") as output:
+        output.write(flatbuffer)
+    return os.path.getsize(output_path)
@@ -0,0 +1,118 @@
+import time
+from typing import Awaitable, Callable
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.conf.config import settings
+from src.services.metrics import metrics, LATENCY_BUCKETS
+
+# Shifted crops of the reflect-padded image, as in the usual CIFAR-10 training augmentation
+SHIFT = 2
+OFFSETS = ((0, 0), (-SHIFT, -SHIFT), (-SHIFT, SHIFT), (SHIFT, -SHIFT), (SHIFT, SHIFT))
+MAX_VIEWS = 2 * len(OFFSETS)
+
+
+def check_views(views: int):
+    """
+    The **check_views** function validates a number of views.
+
+    :param views: int: The number of views.
+    :raises ValueError: If it is not an even number from 2 to ``MAX_VIEWS``.
+    """
+    if views % 2 or not 2 <= views <= MAX_VIEWS:
+        raise ValueError(f"The number of views must be an even number from 2 to {MAX_VIEWS}, not {views}")
+
+
+def augment_views(image_array: np.ndarray, views: int = MAX_VIEWS) -> np.ndarray:
+    """
+    The **augment_views** function builds the test-time augmentations of an image as one stacked batch.
+
+    The first view is the image itself and the second its mirror; the next ones are crops shifted by
+    ``SHIFT`` pixels of the reflect-padded image, and their mirrors. The crops are strided windows of
+    the padded image, so the whole batch is gathered with a single copy.
+
+    :param image_array: np.ndarray: The preprocessed image of shape (height, width, channels).
+    :param views: int: The number of views, an even number from 2 to ``MAX_VIEWS``.
+    :return: The views of shape (views, height, width, channels), in float32.
+    :raises ValueError: If the number of views is not supported.
+    """
+    check_views(views)
+    height, width = image_array.shape[:2]
+    padded = np.pad(image_array.astype(np.float32, copy=False), ((SHIFT, SHIFT), (SHIFT, SHIFT), (0, 0)),
+                    mode="reflect")
+    # (rows, cols, channels, height, width) windows, viewed without copying
+    windows = sliding_window_view(padded, (height, width), axis=(0, 1))
+    rows, cols = np.array(OFFSETS[:views // 2]).T + SHIFT
+    crops = windows[rows, cols].transpose(0, 2, 3, 1)
+    batch = np.empty((views, height, width, image_array.shape[2]), dtype=np.float32)
+    batch[0::2] = crops
+    batch[1::2] = crops[:, :, ::-1]
+    return batch
+
+
+class TestTimeAugmentation:
+    """
+    The **TestTimeAugmentation** class classifies an image by averaging the predictions of its augmented views.
+
+    All the views of an image go through the model in a single forward pass, and their class
+    probabilities are averaged. A moving average of the duration of these passes is kept: while it
+    exceeds ``budget_ms``, requests fall back to the single view. Every fallback lowers the estimate a
+    little, so the augmentation is tried again once the load has had time to drop. The stacked views
+    count against the queue limit of the predictor like queued requests, so an overloaded
+    predictor rejects augmented requests too.
+
+    :param views: int: The number of views of every image, see :func:`augment_views`.
+    :param budget_ms: float: The latency budget of an augmented forward pass, in milliseconds; 0 for none.
+    :raises ValueError: If the number of views is not supported, so that a bad TTA_VIEWS fails at startup.
+    """
+    __test__ = False
+
+    def __init__(self, views: int = MAX_VIEWS, budget_ms: float = 0.0, smoothing: float = 0.2,
+                 decay: float = 0.95):
+        check_views(views)
+        self.views = views
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.decay = decay
+        self.estimate_ms: float | None = None
+        self._augmented = metrics.counter("tta_predictions_total")
+        self._skipped = metrics.counter("tta_skipped_total")
+        self._infer_time = metrics.histogram("tta_infer_seconds", LATENCY_BUCKETS)
+
+    def admit(self) -> bool:
+        """
+        The **admit** function decides whether a request may be augmented within the latency budget.
+
+        :return: Whether to augment, False when the recent augmented passes were over budget.
+        """
+        if not self.budget_ms or self.estimate_ms is None or self.estimate_ms <= self.budget_ms:
+            return True
+        self.estimate_ms *= self.decay
+        self._skipped.inc()
+        return False
+
+    async def predict(self, image_array: np.ndarray,
+                      predict_batch: Callable[..., Awaitable[np.ndarray]]) -> np.ndarray:
+        """
+        The **predict** function runs the views of an image through the model and averages their predictions.
+
+        :param image_array: np.ndarray: The preprocessed image.
+        :param predict_batch: Callable: Runs a stacked batch through the model, e.g. BatchPredictor.predict_batch.
+        :return: The averaged class probabilities.
+        :raises QueueFullError: If the predictor is overloaded.
+        """
+        batch = augment_views(image_array, self.views)
+        started = time.perf_counter()
+        predictions = await predict_batch(batch, chunk_size=len(batch), bounded=True)
+        seconds = time.perf_counter() - started
+        self._infer_time.observe(seconds)
+        self._augmented.inc()
+        if self.estimate_ms is None:
+            self.estimate_ms = seconds * 1000
+        else:
+            self.estimate_ms += self.smoothing * (seconds * 1000 - self.estimate_ms)
+        return predictions.mean(axis=0)
+
+
+test_time_augmentation = TestTimeAugmentation(settings.tta_views, settings.tta_latency_budget_ms)
@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from src.conf.config import settings
+from src.services.image_fetcher import ImageFetcher, normalize_url
+from src.services.metrics import metrics
+
+# RFC 9111 heuristic freshness: a tenth of the time since Last-Modified, capped at one day
+HEURISTIC_FRACTION = 0.1
+HEURISTIC_MAX_AGE = 86400
+
+
+def _parse_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _cache_control(headers: dict) -> dict:
+    directives = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+def freshness_lifetime(headers: dict, now: float) -> float | None:
+    """
+    The **freshness_lifetime** function computes how long a response may be reused without revalidation.
+
+    :param headers: dict: The response headers, with lowercase names.
+    :param now: float: The time the response was received, as a UNIX timestamp.
+    :return: The lifetime in seconds, 0 when it must always be revalidated, or None when it must not be stored.
+    """
+    directives = _cache_control(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    age = int(headers["age"]) if headers.get("age", "").isdigit() else 0
+    if directives.get("max-age", "").isdigit():
+        return max(int(directives["max-age"]) - age, 0)
+    expires = _parse_date(headers.get("expires"))
+    if expires is not None:
+        date = _parse_date(headers.get("date")) or now
+        return max(expires - date - age, 0)
+    last_modified = _parse_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(max(now - last_modified, 0) * HEURISTIC_FRACTION, HEURISTIC_MAX_AGE)
+    return 0
+
+
+class UrlEntry:
+    """
+    A cached remote image: its validators, its expiry time and the predictions made for it.
+
+    :param url: str: The URL of the image.
+    :param size: int: The size of the body in bytes.
+    :param etag: str: The ETag validator, if any.
+    :param last_modified: str: The Last-Modified validator, if any.
+    :param expires_at: float: The UNIX time after which the entry must be revalidated.
+    :param predictions: dict: The predictions of the body, by model version.
+    """
+
+    def __init__(self, url: str, size: int, etag: str = None, last_modified: str = None,
+                 expires_at: float = 0, predictions: dict = None):
+        self.url = url
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.predictions = predictions or {}
+
+    @property
+    def fresh(self) -> bool:
+        """
+        Whether the entry can be used without asking the remote host.
+        """
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict:
+        """
+        The **validators** function builds the headers of a conditional request for the entry.
+
+        :return: The If-None-Match and If-Modified-Since headers.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self) -> dict:
+        return {"url": self.url, "size": self.size, "etag": self.etag, "last_modified": self.last_modified,
+                "expires_at": self.expires_at, "predictions": self.predictions}
+
+
+class UrlCache:
+    """
+    The **UrlCache** class keeps downloaded images on disk, keyed by their URL.
+
+    Responses are stored with their validators and reused while they are fresh according to
+    Cache-Control, Expires or, failing those, the age of Last-Modified. Stale entries are
+    revalidated with a conditional GET, so an unchanged image costs a 304 instead of a download.
+    Every entry also keeps the predictions made for its body by model version, so a fresh or
+    revalidated URL is answered without downloading nor running the model. The total size of the
+    bodies is bounded and the least recently used entries are evicted first.
+
+    :param directory: str: The directory of the cached bodies and their metadata.
+    :param max_bytes: int: The maximum total size of the cached bodies.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, UrlEntry] = OrderedDict()
+        self._bytes = 0
+        self._loaded = False
+        self._hits = metrics.counter("url_cache_hits_total")
+        self._revalidated = metrics.counter("url_cache_revalidated_total")
+        self._misses = metrics.counter("url_cache_misses_total")
+        self._evictions = metrics.counter("url_cache_evictions_total")
+        metrics.gauge("url_cache_entries", lambda: len(self._entries))
+        metrics.gauge("url_cache_bytes", lambda: self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(url: str) -> str:
+        """
+        The **key** function names the files of a URL.
+
+        :param url: str: The normalized URL.
+        :return: The hex digest of the URL.
+        """
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def _load(self):
+        # The index is rebuilt from the metadata files, least recently used first
+        if self._loaded:
+            return
+        self._loaded = True
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as meta_file:
+                    entry = UrlEntry(**json.load(meta_file))
+                found.append((os.path.getmtime(path), name[:-5], entry))
+            except (OSError, ValueError, TypeError):
+                continue
+        for _, key, entry in sorted(found, key=lambda item: item[0]):
+            if os.path.exists(self._path(key, ".body")):
+                self._entries[key] = entry
+                self._bytes += entry.size
+
+    def _write_meta(self, key: str, entry: UrlEntry):
+        path = self._path(key, ".json")
+        with open(path + ".tmp", "w") as meta_file:
+            json.dump(entry.to_dict(), meta_file)
+        os.replace(path + ".tmp", path)
+
+    def _write(self, key: str, entry: UrlEntry, data: bytes):
+        with open(self._path(key, ".body.tmp"), "wb") as body_file:
+            body_file.write(data)
+        os.replace(self._path(key, ".body.tmp"), self._path(key, ".body"))
+        self._write_meta(key, entry)
+
+    def _read(self, key: str) -> bytes:
+        with open(self._path(key, ".body"), "rb") as body_file:
+            return body_file.read()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        for suffix in (".body", ".json"):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions.inc()
+
+    async def fetch(self, url: str, fetcher: ImageFetcher) -> tuple[UrlEntry, bytes]:
+        """
+        The **fetch** function returns the image of a URL from the cache, revalidating or downloading it as needed.
+
+        :param url: str: The http or https URL of the image.
+        :param fetcher: ImageFetcher: The client downloading the image.
+        :return: The cache entry of the URL and the bytes of the image.
+        :raises FetchError: If the image cannot be downloaded.
+        """
+        loop = asyncio.get_running_loop()
+        url = normalize_url(url)
+        key = self.key(url)
+        self._load()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if entry.fresh:
+                try:
+                    data = await loop.run_in_executor(None, self._read, key)
+                except FileNotFoundError:
+                    # The body was removed from the disk behind our back
+                    self._remove(key)
+                    return await self.fetch(url, fetcher)
+                self._hits.inc()
+                return entry, data
+
+        response = await fetcher.request(url, entry.validators() if entry is not None else None)
+        now = time.time()
+        lifetime = freshness_lifetime(response.headers, now)
+
+        if response.status_code == 304 and entry is not None:
+            # The image did not change: its predictions are still valid
+            self._revalidated.inc()
+            entry.expires_at = now + (lifetime or 0)
+            entry.etag = response.headers.get("etag", entry.etag)
+            entry.last_modified = response.headers.get("last-modified", entry.last_modified)
+            try:
+                data = await loop.run_in_executor(None, self._read, key)
+            except FileNotFoundError:
+                self._remove(key)
+                return await self.fetch(url, fetcher)
+            await loop.run_in_executor(None, self._write_meta, key, entry)
+            return entry, data
+
+        self._misses.inc()
+        data = response.content
+        if entry is not None:
+            self._remove(key)
+        entry = UrlEntry(url, len(data), etag=response.headers.get("etag"),
+                         last_modified=response.headers.get("last-modified"), expires_at=now + (lifetime or 0))
+        if lifetime is not None and len(data) <= self.max_bytes:
+            await loop.run_in_executor(None, self._write, key, entry, data)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+        return entry, data
+
+    async def remember(self, entry: UrlEntry, model_version: str, result: dict):
+        """
+        The **remember** function links a prediction to the cached image it was made for.
+
+        :param entry: UrlEntry: The entry returned by :meth:`fetch`.
+        :param model_version: str: The version of the model that made the prediction.
+        :param result: dict: The JSON-serializable prediction.
+        """
+        entry.predictions = {model_version: result}
+        key = self.key(entry.url)
+        if self._entries.get(key) is entry:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_meta, key, entry)
+
+    def clear(self):
+        """
+        The **clear** function removes every cached image.
+        """
+        self._load()
+        for key in list(self._entries):
+            self._remove(key)
+
+
+url_cache = UrlCache(settings.url_cache_dir, settings.url_cache_max_bytes)
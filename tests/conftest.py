@@ -1,11 +1,20 @@
+import os
+import time
+import tempfile
+import threading
 import pytest
 import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
 )
+os.environ.setdefault("MODEL_LOAD", "lazy")
+os.environ.setdefault("URL_CACHE_DIR", tempfile.mkdtemp(prefix="url-cache-"))
+os.environ.setdefault("MODEL_REGISTRY_DIR", tempfile.mkdtemp(prefix="model-registry-"))
+
 from main import app
 from src.database.models import Base
 from src.database.db import get_db
@@ -63,3 +72,63 @@ def user():
             "email": "deadpool@example.com", 
             "password": "123456789",
             "confirmed": False}
+
+
+class ImageServer:
+    """
+    A local stand-in for remote image hosts.
+    Every route maps a path to a status, headers, a body and an optional delay before answering.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        image_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                image_server.requests.append((self.path, dict(self.headers)))
+                route = image_server.routes.get(self.path)
+                if route is None:
+                    self.send_error(404)
+                    return
+                if callable(route):
+                    route = route(self)
+                code, headers, body, delay = route
+                time.sleep(delay)
+                self.send_response(code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def add(self, path, body=b"", code=200, headers=None, delay=0.0, content_length=True):
+        headers = dict(headers or {})
+        if content_length:
+            headers.setdefault("Content-Length", str(len(body)))
+        self.routes[path] = (code, headers, body, delay)
+        return self.url(path)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+
+@pytest.fixture(scope="module")
+def image_server():
+    server = ImageServer()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
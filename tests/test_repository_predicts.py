@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from src.database.models import Prediction, PredictionRollup
+from src.repository.predicts import create_predictions, get_predictions_page, decode_cursor
+from src.repository.predicts import increment_rollups, rebuild_rollups, get_prediction_stats, insert_predictions
+from src.repository.predicts import get_stored_filenames
+
+
+@pytest.mark.asyncio
+async def test_get_predictions_page(session):
+    """
+    Test that the keyset pagination walks the whole history once, newest first,
+    including predictions sharing the same date.
+
+    Parameters:
+    - session: AsyncSession - An async database session.
+    """
+    await session.execute(delete(Prediction))
+    await session.commit()
+    # create_predictions gives every row of a call the same date
+    for day in range(3):
+        await create_predictions([{"filename": f"{day}-{i}.png", "url": "", "predicted_label": "cat"}
+                                  for i in range(8)], session)
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = await get_predictions_page(10, cursor, session)
+        seen.extend(page)
+        if cursor is None:
+            break
+
+    assert len(seen) == 24
+    assert len({prediction.id for prediction in seen}) == 24
+    keys = [(prediction.prediction_date, prediction.id) for prediction in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor(session):
+    """
+    Test that a malformed cursor is rejected.
+
+    Parameters:
+    - session: AsyncSession - An async database session.
+    """
+    with pytest.raises(ValueError):
+        await get_predictions_page(10, "not-a-cursor", session)
+    with pytest.raises(ValueError):
+        decode_cursor("")
+
+
+@pytest.mark.asyncio
+async def test_rollups_match_the_predictions(session):
+    """
+    Test that the incrementally maintained hourly counts equal the counts recomputed from the predictions.
+
+    Parameters:
+    - session: AsyncSession - An async database session.
+    """
+    await session.execute(delete(Prediction))
+    await session.execute(delete(PredictionRollup))
+    await session.commit()
+    start = datetime(2024, 5, 1, 10, 0)
+    rows = [{"prediction_date": start + timedelta(minutes=25 * i), "filename": f"{i}.png", "url": "",
+             "predicted_label": "cat" if i % 3 else "dog"} for i in range(12)]
+    session.add_all(Prediction(**row) for row in rows)
+    await increment_rollups(rows[:6], session)
+    await increment_rollups(rows[6:], session)
+    await session.commit()
+
+    incremental = await get_prediction_stats(start, start + timedelta(days=1), session)
+    assert sum(count for _, _, count in incremental) == 12
+    assert incremental[0] == (start, "cat", 2)
+
+    await rebuild_rollups(session)
+    assert await get_prediction_stats(start, start + timedelta(days=1), session) == incremental
+
+    # The hour of the start is included, the end is excluded
+    dogs = await get_prediction_stats(start + timedelta(minutes=30), start + timedelta(hours=3), session, "dog")
+    assert dogs == [(start, "dog", 1), (start + timedelta(hours=1), "dog", 1), (start + timedelta(hours=2), "dog", 1)]
+
+
+@pytest.mark.asyncio
+async def test_filter_by_min_score(session):
+    """
+    Test that the stored scores are read back and filter the history, leaving out unscored predictions.
+
+    Parameters:
+    - session: AsyncSession - An async database session.
+    """
+    await session.execute(delete(Prediction))
+    await session.commit()
+    probabilities = [0.05, 0.1, 0.0, 0.6, 0.0, 0.2, 0.0, 0.0, 0.05, 0.0]
+    await insert_predictions([{"prediction_date": datetime(2024, 5, 1, 10, i), "filename": f"{i}.png", "url": "",
+                               "predicted_label": "cat", "class_index": 3, "score": score, "model_version": "v1",
+                               "top_k_scores": Prediction.pack_top_k(probabilities, 3)}
+                              for i, score in enumerate([0.3, 0.95, 0.6])], session)
+    await insert_predictions([{"prediction_date": datetime(2024, 5, 1, 11, 0), "filename": "old.png", "url": "",
+                               "predicted_label": "cat"}], session)
+
+    page, cursor = await get_predictions_page(10, None, session, min_score=0.5)
+    assert [prediction.filename for prediction in page] == ["2.png", "1.png"]
+    assert cursor is None
+    assert len((await get_predictions_page(10, None, session))[0]) == 4
+
+    assert page[0].model_version == "v1"
+    assert [item["class_index"] for item in page[0].top_k] == [3, 5, 1]
+    assert page[0].top_k[0]["probability"] == pytest.approx(0.6)
+    assert len(page[0].top_k_scores) == 15
+
+
+@pytest.mark.asyncio
+async def test_get_stored_filenames(session):
+    """
+    Test that the files stored at a date by a model version are found, and only those.
+
+    Parameters:
+    - session: AsyncSession - An async database session.
+    """
+    started = datetime(2024, 6, 1, 9, 30, 15, 123456)
+    await insert_predictions([{"prediction_date": started, "filename": f"run/{i}.png", "url": "",
+                               "predicted_label": "cat", "model_version": "v1"} for i in range(3)], session)
+    await insert_predictions([{"prediction_date": started + timedelta(seconds=1), "filename": "run/3.png", "url": "",
+                               "predicted_label": "cat", "model_version": "v1"}], session)
+
+    filenames = [f"run/{i}.png" for i in range(5)]
+    assert await get_stored_filenames(filenames, started, "v1", session) == {"run/0.png", "run/1.png", "run/2.png"}
+    assert await get_stored_filenames(filenames, started, "v2", session) == set()
+    assert await get_stored_filenames([], started, "v1", session) == set()
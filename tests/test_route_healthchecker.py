@@ -0,0 +1,30 @@
+from src.services.health import health_monitor
+
+
+def test_liveness(client):
+    """
+    Test that the liveness probe answers without touching the database.
+
+    Raises:
+    - AssertionError: If the probe fails.
+    """
+    response = client.get("/api/healthchecker/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+
+def test_readiness_reflects_snapshot(client, monkeypatch):
+    """
+    Test that the readiness probe returns the cached snapshot with 200 or 503.
+
+    Raises:
+    - AssertionError: If the status code does not follow the snapshot.
+    """
+    monkeypatch.setattr(health_monitor, "_snapshot", {"ready": False, "checked_at": None, "checks": {}})
+    assert client.get("/api/healthchecker/ready").status_code == 503
+
+    snapshot = {"ready": True, "checked_at": "now", "checks": {"model": {"ok": True}}}
+    monkeypatch.setattr(health_monitor, "_snapshot", snapshot)
+    response = client.get("/api/healthchecker/ready")
+    assert response.status_code == 200
+    assert response.json() == snapshot
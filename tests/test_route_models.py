@@ -0,0 +1,128 @@
+import io
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from main import app
+from src.routes import predicts
+from src.services import model_manager as model_manager_module
+from src.services.auth_admin import is_admin
+from src.services.model_registry import model_registry
+from src.services.shadow import shadow_evaluator
+
+
+def fake_predict(batch):
+    """
+    Predict class 5 for every image, as a one-hot probability vector.
+    """
+    probabilities = np.zeros((len(batch), 10), dtype=np.float32)
+    probabilities[:, 5] = 1.0
+    return probabilities
+
+
+@pytest.fixture
+def admin(monkeypatch, tmp_path):
+    """
+    Let the requests through the admin check, use an empty registry and restore the served model afterwards.
+    """
+    app.dependency_overrides[is_admin] = lambda: None
+    monkeypatch.setattr(model_registry, "directory", str(tmp_path / "registry"))
+    monkeypatch.setattr(model_registry, "manifest_path", str(tmp_path / "registry" / "manifest.json"))
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", lambda backend, path, mmap=False: fake_predict)
+    manager = predicts.model_manager
+    for name in ("backend", "model_path", "_version", "_predict_fn", "loaded", "warmed"):
+        monkeypatch.setattr(manager, name, getattr(manager, name))
+    # The routes run the model through the batch predictor, not the manager
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", manager.predict)
+    predicts.prediction_cache.clear()
+    yield tmp_path
+    app.dependency_overrides.pop(is_admin)
+    predicts.prediction_cache.clear()
+
+
+def test_activate_model(client, admin):
+    """
+    Test that activating a version swaps it in and that the predictions are tagged with it.
+
+    Raises:
+    - AssertionError: If the version is not served or the predictions are not tagged.
+    """
+    (admin / "model.npz").write_bytes(b"weights")
+    model_registry.register(str(admin / "model.npz"), name="candidate")
+
+    response = client.post("/api/models/candidate/activate")
+    assert response.status_code == 202
+    for _ in range(100):
+        state = client.get("/api/models/").json()
+        if state["worker"]["serving"] == "candidate":
+            break
+        time.sleep(0.05)
+    assert state["active"] == "candidate"
+    assert state["worker"]["serving"] == "candidate"
+    assert [version["name"] for version in state["versions"]] == ["candidate"]
+
+    image = io.BytesIO()
+    Image.new("RGB", (40, 30), (9, 8, 7)).save(image, "PNG")
+    response = client.post("/api/predicts/image/json", files={"file": ("swap.png", image.getvalue(), "image/png")})
+    assert response.status_code == 200, response.text
+    prediction = response.json()
+    assert prediction["model_version"] == "candidate"
+    assert prediction["class_index"] == 5
+
+    assert client.post("/api/models/missing/activate").status_code == 404
+
+
+def test_shadow_model(client, admin, monkeypatch):
+    """
+    Test that a shadowed version classifies the sampled images in the background and is compared.
+
+    Raises:
+    - AssertionError: If the candidate is not shadowed or the comparison is not reported.
+    """
+    (admin / "model.npz").write_bytes(b"weights")
+    model_registry.register(str(admin / "model.npz"), name="served")
+    model_registry.register(str(admin / "model.npz"), name="shadowed")
+    model_registry.activate("served")
+    monkeypatch.setattr(shadow_evaluator, "sample_rate", 1.0)
+
+    assert client.put("/api/models/shadowed/shadow").status_code == 202
+    for _ in range(100):
+        state = client.get("/api/models/shadow").json()
+        if state["worker"]["ready"]:
+            break
+        time.sleep(0.05)
+    assert state["shadow"] == "shadowed"
+    assert state["worker"]["candidate"] == "shadowed"
+
+    image = io.BytesIO()
+    Image.new("RGB", (40, 30), (1, 2, 3)).save(image, "PNG")
+    response = client.post("/api/predicts/image/json", files={"file": ("shadow.png", image.getvalue(), "image/png")})
+    assert response.status_code == 200, response.text
+    for _ in range(100):
+        state = client.get("/api/models/shadow").json()
+        if state["worker"]["compared"]:
+            break
+        time.sleep(0.05)
+    assert state["worker"]["compared"] == 1
+    assert state["worker"]["agreement_rate"] == 1.0
+
+    response = client.delete("/api/models/shadow")
+    assert response.json()["worker"]["compared"] == 1
+    for _ in range(100):
+        if shadow_evaluator.version is None:
+            break
+        time.sleep(0.05)
+    assert client.get("/api/models/shadow").json()["worker"]["candidate"] is None
+    assert client.put("/api/models/missing/shadow").status_code == 404
+
+
+def test_models_require_admin(client):
+    """
+    Test that the registry endpoints are reserved to administrators.
+
+    Raises:
+    - AssertionError: If an anonymous request is accepted.
+    """
+    assert client.get("/api/models/").status_code == 401
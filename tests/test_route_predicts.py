@@ -0,0 +1,434 @@
+import asyncio
+import io
+import json
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.routes import predicts
+
+
+def fake_predict(batch):
+    """
+    Predict class 3 for every image, as a one-hot probability vector.
+    """
+    probabilities = np.zeros((len(batch), 10), dtype=np.float32)
+    probabilities[:, 3] = 1.0
+    return probabilities
+
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    """
+    Replace the CNN with fake_predict and start every test with empty caches.
+    """
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", fake_predict)
+    predicts.prediction_cache.clear()
+    predicts.near_duplicates.clear()
+    predicts.url_cache.clear()
+
+
+def image_bytes(color, size=(64, 48), fmt="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def test_predict_image(client):
+    """
+    Test that an uploaded image is classified and rendered in the recognition page.
+
+    Raises:
+    - AssertionError: If the label is not in the page.
+    """
+    response = client.post("/api/predicts/image", files={"file": ("cat.png", image_bytes((255, 0, 0)), "image/png")})
+    assert response.status_code == 200
+    assert predicts.class_labels[3] in response.text
+
+
+def test_predict_batch(client):
+    """
+    Test that several files and the images of a ZIP archive are classified in one request.
+
+    Raises:
+    - AssertionError: If a file is missing from the response or has a wrong label.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("album/a.png", image_bytes((0, 255, 0)))
+        zf.writestr("album/b.jpg", image_bytes((0, 0, 255), fmt="JPEG"))
+
+    files = [("files", ("one.png", image_bytes((10, 20, 30)), "image/png")),
+             ("files", ("two.png", image_bytes((200, 100, 0)), "image/png")),
+             ("files", ("album.zip", archive.getvalue(), "application/zip")),
+             ("files", ("broken.png", b"not an image", "image/png"))]
+    response = client.post("/api/predicts/batch", files=files)
+    assert response.status_code == 200, response.text
+
+    data = response.json()["predictions"]
+    assert [item["filename"] for item in data] == ["one.png", "two.png", "album/a.png", "album/b.jpg", "broken.png"]
+    for item in data[:4]:
+        assert item["class_index"] == 3
+        assert item["predicted_label"] == predicts.class_labels[3]
+        assert item["score"] == 1.0
+    assert data[4]["error"]
+
+
+def test_predict_batch_too_many_images(client, monkeypatch):
+    """
+    Test that a batch with more images than allowed is rejected with 413.
+
+    Raises:
+    - AssertionError: If the batch is accepted.
+    """
+    monkeypatch.setattr(predicts.settings, "batch_max_images", 2)
+    files = [("files", (f"{i}.png", image_bytes((i, i, i)), "image/png")) for i in range(3)]
+    response = client.post("/api/predicts/batch", files=files)
+    assert response.status_code == 413
+
+
+def test_predict_batch_too_large(client, monkeypatch):
+    """
+    Test that a batch larger than the byte limit is rejected with 413.
+
+    Raises:
+    - AssertionError: If the batch is accepted.
+    """
+    monkeypatch.setattr(predicts.settings, "batch_max_bytes", 100)
+    files = [("files", ("big.png", image_bytes((1, 2, 3), size=(256, 256)), "image/png"))]
+    response = client.post("/api/predicts/batch", files=files)
+    assert response.status_code == 413
+
+
+def test_predict_batch_overloaded(client, monkeypatch):
+    """
+    Test that a batch is rejected with 503 while the predictor is overloaded.
+
+    Raises:
+    - AssertionError: If the batch is accepted.
+    """
+    monkeypatch.setattr(predicts.batch_predictor, "max_queue_size", 0)
+    files = [("files", ("one.png", image_bytes((10, 20, 30)), "image/png"))]
+    response = client.post("/api/predicts/batch", files=files)
+    assert response.status_code == 503
+
+
+def test_predict_url(client, image_server):
+    """
+    Test that an image downloaded from a URL is classified, and that an oversized one is rejected.
+
+    Raises:
+    - AssertionError: If the label is missing or the oversized image is accepted.
+    """
+    url = image_server.add("/dog.png", image_bytes((0, 128, 255)))
+    response = client.post("/api/predicts/url", data={"url": url})
+    assert response.status_code == 200
+    assert predicts.class_labels[3] in response.text
+
+    large = image_server.add("/huge.png", b"x" * (predicts.image_fetcher.max_bytes + 1))
+    response = client.post("/api/predicts/url", data={"url": large})
+    assert response.status_code == 413
+
+
+def test_predict_malformed_url(client):
+    """
+    Test that URLs which cannot be parsed are reported as client errors, not server errors.
+
+    Raises:
+    - AssertionError: If a malformed URL is not rejected with a 400 or an error page.
+    """
+    for url in ("http://example.com:99999/a.png", "http://[::1/a.png"):
+        response = client.post("/api/predicts/url/json", data={"url": url})
+        assert response.status_code == 400, url
+        assert "Invalid URL" in response.json()["detail"]
+
+        response = client.post("/api/predicts/url", data={"url": url})
+        assert response.status_code == 200, url
+        assert "Error downloading image from URL" in response.text
+
+
+def test_predict_cached_url(client, image_server, monkeypatch):
+    """
+    Test that a fresh cached URL is answered without downloading it nor running the model.
+
+    Raises:
+    - AssertionError: If the image is downloaded or classified twice.
+    """
+    calls = []
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", lambda batch: calls.append(len(batch)) or fake_predict(batch))
+    url = image_server.add("/cached.png", image_bytes((200, 100, 0)), headers={"Cache-Control": "max-age=600"})
+
+    assert client.post("/api/predicts/url", data={"url": url}).status_code == 200
+    predicts.prediction_cache.clear()
+    predicts.near_duplicates.clear()
+    downloads = len(image_server.requests)
+    response = client.post("/api/predicts/url", data={"url": url})
+
+    assert predicts.class_labels[3] in response.text
+    assert len(image_server.requests) == downloads
+    assert calls == [1]
+
+
+async def test_identical_concurrent_images_are_coalesced(monkeypatch):
+    """
+    Test that concurrent classifications of the same bytes share one forward pass.
+
+    Raises:
+    - AssertionError: If the model runs more than once.
+    """
+    calls = []
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", lambda batch: calls.append(len(batch)) or fake_predict(batch))
+    f = image_bytes((1, 2, 3))
+
+    try:
+        results = await asyncio.gather(*(predicts.classify(f) for _ in range(4)))
+    finally:
+        # The worker started on this event loop must not outlive it
+        await predicts.batch_predictor.stop()
+
+    assert [result["class_index"] for result in results] == [3] * 4
+    assert calls == [1]
+
+
+def test_predict_image_returns_preview(client):
+    """
+    Test that the result page embeds a small JPEG preview instead of the whole upload.
+
+    Raises:
+    - AssertionError: If the original image is embedded.
+    """
+    f = image_bytes((30, 60, 90), size=(2000, 1500))
+    response = client.post("/api/predicts/image", files={"file": ("big.png", f, "image/png")})
+
+    assert response.status_code == 200
+    assert "data:image/jpeg;base64," in response.text
+    assert len(response.content) < len(f)
+
+
+def test_predict_image_json(client):
+    """
+    Test that the JSON endpoint returns the top-k classes, the model version and the stage timings,
+    and that a repeated image is answered from the cache.
+
+    Raises:
+    - AssertionError: If a field is missing or wrong.
+    """
+    f = image_bytes((90, 10, 200))
+    response = client.post("/api/predicts/image/json?top=2", files={"file": ("car.png", f, "image/png")})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["predicted_label"] == predicts.class_labels[3]
+    assert data["class_index"] == 3
+    assert [item["class_index"] for item in data["top_k"]][0] == 3
+    assert len(data["top_k"]) == 2
+    assert data["model_version"] == predicts.model_manager.version
+    assert data["source"] == "model"
+    assert {"decode", "infer", "db", "total"} <= set(data["timings_ms"])
+
+    response = client.post("/api/predicts/image/json", files={"file": ("car.png", f, "image/png")})
+    assert response.json()["source"] == "cache"
+    assert "infer" not in response.json()["timings_ms"]
+
+
+def test_predict_image_json_with_tta(client, monkeypatch):
+    """
+    Test that test-time augmentation runs all the views of an image in one forward pass,
+    caches its result apart from the single-view one and falls back when over budget.
+
+    Raises:
+    - AssertionError: If the views are not batched or the cached results are mixed up.
+    """
+    batches = []
+
+    def counting_predict(batch):
+        batches.append(len(batch))
+        return fake_predict(batch)
+
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", counting_predict)
+    monkeypatch.setattr(predicts.test_time_augmentation, "estimate_ms", None)
+    f = image_bytes((40, 120, 220))
+    response = client.post("/api/predicts/image/json?tta=true", files={"file": ("tta.png", f, "image/png")})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["views"] == predicts.test_time_augmentation.views
+    assert data["class_index"] == 3
+    assert data["score"] == 1.0
+    assert batches == [predicts.test_time_augmentation.views]
+
+    response = client.post("/api/predicts/image/json", files={"file": ("tta.png", f, "image/png")})
+    assert (response.json()["views"], response.json()["source"]) == (1, "model")
+    response = client.post("/api/predicts/image/json?tta=true", files={"file": ("tta.png", f, "image/png")})
+    assert (response.json()["views"], response.json()["source"]) == (10, "cache")
+
+    monkeypatch.setattr(predicts.test_time_augmentation, "estimate_ms", 10 ** 6)
+    response = client.post("/api/predicts/image/json?tta=true",
+                           files={"file": ("slow.png", image_bytes((1, 2, 3)), "image/png")})
+    assert response.json()["views"] == 1
+
+
+def test_predict_with_tta_overloaded(client, monkeypatch):
+    """
+    Test that an augmented request is rejected with 503 while the predictor is overloaded.
+
+    Raises:
+    - AssertionError: If the request is accepted.
+    """
+    monkeypatch.setattr(predicts.test_time_augmentation, "estimate_ms", None)
+    monkeypatch.setattr(predicts.batch_predictor, "max_queue_size", 0)
+    response = client.post("/api/predicts/image/json?tta=true",
+                           files={"file": ("busy.png", image_bytes((7, 8, 9)), "image/png")})
+    assert response.status_code == 503
+
+
+def test_predictions_keep_the_version_that_made_them(client, monkeypatch):
+    """
+    Test that a prediction is tagged with the model version that ran it, that a prediction straddling
+    a swap is not cached and that near-duplicates from a swapped-out model are not reused.
+
+    Raises:
+    - AssertionError: If a prediction is tagged with the wrong version or reused across versions.
+    """
+    monkeypatch.setattr(predicts.settings, "phash_enabled", True)
+    monkeypatch.setattr(predicts.model_manager, "_version", "old")
+
+    def swapping_predict(batch):
+        predicts.model_manager._version = "new"
+        return fake_predict(batch)
+
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", swapping_predict)
+    f = image_bytes((12, 34, 56))
+    response = client.post("/api/predicts/image/json", files={"file": ("swap.png", f, "image/png")})
+    assert (response.json()["model_version"], response.json()["source"]) == ("old", "model")
+    assert predicts.prediction_row("swap.png", "", predicts.to_result(np.eye(10)[3], "old"))["model_version"] == "old"
+
+    monkeypatch.setattr(predicts.batch_predictor, "predict_fn", fake_predict)
+    response = client.post("/api/predicts/image/json", files={"file": ("swap.png", f, "image/png")})
+    assert (response.json()["model_version"], response.json()["source"]) == ("new", "model")
+
+    # The same picture at another size is a near-duplicate, but only for the same version
+    resized = image_bytes((12, 34, 56), size=(96, 72))
+    response = client.post("/api/predicts/image/json", files={"file": ("swap2.png", resized, "image/png")})
+    assert (response.json()["model_version"], response.json()["source"]) == ("new", "near_duplicate")
+    predicts.model_manager._version = "newer"
+    response = client.post("/api/predicts/image/json",
+                           files={"file": ("swap3.png", image_bytes((12, 34, 56), size=(128, 96)), "image/png")})
+    assert (response.json()["model_version"], response.json()["source"]) == ("newer", "model")
+
+
+def test_predict_json_errors(client, image_server):
+    """
+    Test that the JSON endpoints report invalid input as HTTP errors.
+
+    Raises:
+    - AssertionError: If an error is not reported with the expected status.
+    """
+    response = client.post("/api/predicts/image/json", files={"file": ("notes.txt", b"hello", "text/plain")})
+    assert response.status_code == 400
+
+    response = client.post("/api/predicts/url/json", data={"url": image_server.url("/nothing.png")})
+    assert response.status_code == 400
+
+    url = image_server.add("/frog.png", image_bytes((5, 200, 5)))
+    response = client.post("/api/predicts/url/json", data={"url": url})
+    assert response.status_code == 200
+    assert response.json()["url"] == url
+    assert "fetch" in response.json()["timings_ms"]
+
+
+def test_get_predictions_with_cursor(client, monkeypatch):
+    """
+    Test that the history returns the next cursor in a header and rejects a malformed one.
+
+    Raises:
+    - AssertionError: If the pages overlap or the cursor is not validated.
+    """
+    # Write the rows in the request, so that they are in the history right away
+    monkeypatch.setattr(predicts.settings, "prediction_write_behind", False)
+    for i in range(3):
+        client.post("/api/predicts/batch", files=[("files", (f"p{i}.png", image_bytes((i, i, i)), "image/png"))])
+
+    first = client.get("/api/predicts/?limit=1")
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/api/predicts/?limit=1&cursor={cursor}")
+    assert second.json()[0]["id"] != first.json()[0]["id"]
+
+    assert client.get("/api/predicts/?cursor=garbage").status_code == 400
+
+
+def test_get_stats(client, monkeypatch):
+    """
+    Test that the statistics count the predictions of the range per label and per bucket.
+
+    Raises:
+    - AssertionError: If the counts are wrong or an invalid range is accepted.
+    """
+    monkeypatch.setattr(predicts.settings, "prediction_write_behind", False)
+    # A label of its own, so that the rows of the other tests are not counted
+    labels = list(predicts.class_labels)
+    labels[3] = "stats"
+    monkeypatch.setattr(predicts, "class_labels", labels)
+    client.post("/api/predicts/batch", files=[("files", (f"s{i}.png", image_bytes((i, 0, 0)), "image/png"))
+                                              for i in range(3)])
+
+    response = client.get("/api/predicts/stats?granularity=day&label=stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total"] == 3
+    assert stats["labels"] == {"stats": 3}
+    assert [bucket["total"] for bucket in stats["series"]] == [3]
+    assert client.get("/api/predicts/stats").json()["labels"]["stats"] == 3
+
+    assert client.get("/api/predicts/stats?granularity=week").status_code == 422
+    assert client.get("/api/predicts/stats?start=2024-02-01T00:00&end=2024-01-01T00:00").status_code == 400
+
+
+def test_export_predictions(client, monkeypatch):
+    """
+    Test that the history is exported as CSV and NDJSON, filtered by date.
+
+    Raises:
+    - AssertionError: If the export is missing rows or ignores the range.
+    """
+    monkeypatch.setattr(predicts.settings, "prediction_write_behind", False)
+    monkeypatch.setattr(predicts.settings, "export_chunk_rows", 2)
+    started = datetime.now().isoformat()
+    client.post("/api/predicts/batch", files=[("files", (f"e{i}.png", image_bytes((0, i, 0)), "image/png"))
+                                              for i in range(3)])
+
+    response = client.get(f"/api/predicts/export?start={started}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,prediction_date,filename,url,predicted_label,class_index,score,model_version"
+    assert [line.split(",")[2] for line in lines[1:]] == ["e0.png", "e1.png", "e2.png"]
+
+    response = client.get(f"/api/predicts/export?format=ndjson&start={started}")
+    assert [json.loads(line)["filename"] for line in response.text.splitlines()] == ["e0.png", "e1.png", "e2.png"]
+
+    assert client.get(f"/api/predicts/export?end={started}&start={started}").status_code == 400
+    assert client.get("/api/predicts/export?format=xml").status_code == 422
+
+
+def test_get_predictions_with_scores(client, monkeypatch):
+    """
+    Test that the stored confidence and top-k scores are listed and filter the history.
+
+    Raises:
+    - AssertionError: If the scores are missing or the filter is ignored.
+    """
+    monkeypatch.setattr(predicts.settings, "prediction_write_behind", False)
+    response = client.post("/api/predicts/image/json", files={"file": ("scored.png", image_bytes((1, 2, 3)), "image/png")})
+    assert response.status_code == 200
+
+    latest = client.get("/api/predicts/?limit=1&min_score=0.99").json()[0]
+    assert latest["filename"] == "scored.png"
+    assert latest["class_index"] == 3
+    assert latest["score"] == 1.0
+    assert latest["top_k"][0] == {"class_index": 3, "probability": 1.0}
+    assert latest["model_version"] == predicts.model_manager.version
+
+    assert client.get("/api/predicts/?min_score=1.5").status_code == 422
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from src.services.bulk_classifier import Checkpoint, classify_files, find_images
+from src.services.inference import BatchPredictor
+
+
+def make_tree(root):
+    for directory in ("b", "a/nested"):
+        os.makedirs(os.path.join(root, directory))
+    for i, path in enumerate(["b/1.png", "a/nested/2.jpg", "a/3.png", "b/4.png", "a/5.png"]):
+        Image.new("RGB", (40, 30), (i * 40, 0, 0)).save(os.path.join(root, path))
+    with open(os.path.join(root, "a/broken.png"), "wb") as broken:
+        broken.write(b"not an image")
+    with open(os.path.join(root, "a/notes.txt"), "w") as notes:
+        notes.write("not an image either")
+
+
+def test_find_images(tmp_path):
+    """
+    Test that the images of a tree are listed in a stable order, without the other files.
+
+    Raises:
+    - AssertionError: If the listing is wrong.
+    """
+    make_tree(tmp_path)
+    assert find_images(str(tmp_path)) == ["a/3.png", "a/5.png", "a/broken.png", "a/nested/2.jpg", "b/1.png", "b/4.png"]
+
+
+async def test_classify_files(tmp_path):
+    """
+    Test that every image goes through the pipeline in order, a chunk per forward pass,
+    and that undecodable files are reported.
+
+    Raises:
+    - AssertionError: If an image is lost, reordered or wrongly reported.
+    """
+    make_tree(tmp_path)
+    paths = find_images(str(tmp_path))
+    batch_sizes = []
+
+    def predict_fn(images):
+        batch_sizes.append(len(images))
+        # The red channel identifies the image
+        return images[:, 0, 0, :1]
+
+    # The chunks are larger than the micro-batches of the predictor, yet run in one forward pass each
+    predictor = BatchPredictor(predict_fn, max_batch_size=2)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        chunks = [item async for item in classify_files(str(tmp_path), paths, predictor.predict_batch, pool,
+                                                          batch_size=4, max_pending=1)]
+
+    assert [chunk for chunk, _, _ in chunks] == [paths[:4], paths[4:]]
+    assert batch_sizes == [3, 2]
+    assert chunks[0][2][2] is not None and chunks[0][2][:2] == [None, None]
+    reds = np.concatenate([predictions for _, predictions, _ in chunks])[:, 0] * 255
+    assert np.allclose(reds, [80, 160, 40, 0, 120], atol=1)
+
+
+def test_checkpoint(tmp_path):
+    """
+    Test that a saved checkpoint is loaded back and skips the classified paths.
+
+    Raises:
+    - AssertionError: If the checkpoint is not restored.
+    """
+    checkpoint = Checkpoint(str(tmp_path / "run.checkpoint"))
+    assert not checkpoint.load()
+    assert checkpoint.remaining(["a", "b"]) == ["a", "b"]
+    checkpoint.save("b/1.png", 4, 120, "2024-05-01T10:00:00")
+
+    resumed = Checkpoint(str(tmp_path / "run.checkpoint"))
+    assert resumed.load()
+    assert (resumed.last_path, resumed.processed, resumed.output_bytes) == ("b/1.png", 4, 120)
+    assert resumed.started == "2024-05-01T10:00:00"
+    assert resumed.remaining(["a/3.png", "b/1.png", "b/4.png", "c/0.png"]) == ["b/4.png", "c/0.png"]
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from src.services.export import EXPORT_COLUMNS, ExportFormatError, export_rows
+
+ROWS = [(1, datetime(2024, 5, 1, 10, 0), "cat.png", "", "Кіт", 3, 0.875, "0123456789ab"),
+        (2, datetime(2024, 5, 1, 10, 5), None, "https://example.com/a,b.jpg", "Собака", None, None, None)]
+
+
+async def chunked(rows, size=1):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def export(rows, export_format):
+    return b"".join([data async for data in export_rows(chunked(rows), export_format)])
+
+
+async def test_csv_export():
+    """
+    Test that the CSV export has a single header line and quotes the values that need it.
+
+    Raises:
+    - AssertionError: If the rows are not read back unchanged.
+    """
+    lines = list(csv.reader(io.StringIO((await export(ROWS, "csv")).decode("utf-8"))))
+    assert lines[0] == list(EXPORT_COLUMNS)
+    assert lines[1] == ["1", "2024-05-01T10:00:00", "cat.png", "", "Кіт", "3", "0.875", "0123456789ab"]
+    assert lines[2][3] == "https://example.com/a,b.jpg"
+    assert len(lines) == 3
+
+    assert (await export([], "csv")).decode("utf-8").strip() == ",".join(EXPORT_COLUMNS)
+
+
+async def test_ndjson_export():
+    """
+    Test that the NDJSON export has one object per prediction.
+
+    Raises:
+    - AssertionError: If the objects are wrong.
+    """
+    lines = (await export(ROWS, "ndjson")).decode("utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [1, 2]
+    assert json.loads(lines[1])["filename"] is None
+    assert json.loads(lines[0])["score"] == 0.875
+    assert json.loads(lines[0])["prediction_date"] == "2024-05-01T10:00:00"
+
+
+async def test_parquet_export():
+    """
+    Test that the chunks of the Parquet export make up a readable file, with one row group per chunk.
+
+    Raises:
+    - AssertionError: If the file cannot be read back.
+    """
+    pq = pytest.importorskip("pyarrow.parquet")
+    parquet_file = pq.ParquetFile(io.BytesIO(await export(ROWS, "parquet")))
+    assert parquet_file.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.column("predicted_label").to_pylist() == ["Кіт", "Собака"]
+    assert table.column("prediction_date").to_pylist()[1] == ROWS[1][1]
+
+
+async def test_unknown_format():
+    """
+    Test that an unknown format is rejected.
+
+    Raises:
+    - AssertionError: If no error is raised.
+    """
+    with pytest.raises(ExportFormatError):
+        await export(ROWS, "xml")
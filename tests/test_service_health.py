@@ -0,0 +1,94 @@
+import asyncio
+
+from src.services.health import HealthMonitor
+
+
+async def healthy():
+    return {"ok": True, "value": 1}
+
+
+async def unhealthy():
+    raise ConnectionError("database is down")
+
+
+async def slow():
+    await asyncio.sleep(1)
+    return {"ok": True}
+
+
+async def test_snapshot_before_first_run():
+    """
+    Test that the application is not ready before the checks ran once.
+
+    Raises:
+    - AssertionError: If the initial snapshot is ready.
+    """
+    monitor = HealthMonitor()
+    monitor.add_check("database", healthy)
+    assert monitor.snapshot["ready"] is False
+
+
+async def test_refresh_all_healthy():
+    """
+    Test that a run with only passing checks produces a ready snapshot with the check details.
+
+    Raises:
+    - AssertionError: If the snapshot is not ready or misses details.
+    """
+    monitor = HealthMonitor()
+    monitor.add_check("database", healthy)
+    snapshot = await monitor.refresh()
+
+    assert snapshot["ready"] is True
+    assert snapshot["checks"]["database"]["value"] == 1
+    assert monitor.snapshot is snapshot
+
+
+async def test_failing_critical_check():
+    """
+    Test that an exception in a critical check makes the application not ready.
+
+    Raises:
+    - AssertionError: If the failure is not reported.
+    """
+    monitor = HealthMonitor()
+    monitor.add_check("database", unhealthy)
+    monitor.add_check("model", healthy)
+    snapshot = await monitor.refresh()
+
+    assert snapshot["ready"] is False
+    assert snapshot["checks"]["database"] == {"ok": False, "error": "database is down",
+                                              "duration_ms": snapshot["checks"]["database"]["duration_ms"]}
+
+
+async def test_non_critical_and_slow_checks():
+    """
+    Test that a failing non-critical check keeps the application ready and a slow check times out.
+
+    Raises:
+    - AssertionError: If the checks are not handled as expected.
+    """
+    monitor = HealthMonitor(timeout=0.05)
+    monitor.add_check("cache", unhealthy, critical=False)
+    monitor.add_check("model", slow, critical=False)
+    snapshot = await monitor.refresh()
+
+    assert snapshot["ready"] is True
+    assert snapshot["checks"]["cache"]["ok"] is False
+    assert snapshot["checks"]["model"]["error"] == "TimeoutError"
+
+
+async def test_background_task():
+    """
+    Test that start runs the checks in the background and stop cancels the task.
+
+    Raises:
+    - AssertionError: If the checks are not run.
+    """
+    monitor = HealthMonitor(interval=0.01)
+    monitor.add_check("database", healthy)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    assert monitor.snapshot["ready"] is True
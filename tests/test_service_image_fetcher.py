@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.image_fetcher import ImageFetcher, FetchError, ImageTooLargeError
+from src.services.metrics import metrics
+
+
+async def test_fetch_image(image_server):
+    """
+    Test that an image is downloaded and its latency recorded.
+
+    Raises:
+    - AssertionError: If the body differs or the download is not measured.
+    """
+    url = image_server.add("/cat.png", b"\x89PNG" + b"x" * 100)
+    fetcher = ImageFetcher()
+    count = metrics.histogram("image_fetch_seconds", ()).snapshot()["count"]
+
+    assert await fetcher.fetch(url) == b"\x89PNG" + b"x" * 100
+    assert metrics.histogram("image_fetch_seconds", ()).snapshot()["count"] == count + 1
+    await fetcher.close()
+
+
+async def test_too_large_by_content_length(image_server):
+    """
+    Test that a download announcing a body larger than the limit is rejected from its headers.
+
+    Raises:
+    - AssertionError: If the image is accepted.
+    """
+    url = image_server.add("/large.png", b"x" * 2048)
+    fetcher = ImageFetcher(max_bytes=1024)
+
+    with pytest.raises(ImageTooLargeError):
+        await fetcher.fetch(url)
+    await fetcher.close()
+
+
+async def test_too_large_while_streaming(image_server):
+    """
+    Test that a body without Content-Length is aborted once it exceeds the limit.
+
+    Raises:
+    - AssertionError: If the image is accepted.
+    """
+    url = image_server.add("/stream.png", b"x" * 100000, content_length=False)
+    fetcher = ImageFetcher(max_bytes=1024)
+
+    with pytest.raises(ImageTooLargeError):
+        await fetcher.fetch(url)
+    await fetcher.close()
+
+
+async def test_errors(image_server):
+    """
+    Test that HTTP errors, slow hosts and invalid URLs raise FetchError.
+
+    Raises:
+    - AssertionError: If an error is not reported.
+    """
+    slow = image_server.add("/slow.png", b"x", delay=0.5)
+    fetcher = ImageFetcher(read_timeout=0.1)
+
+    with pytest.raises(FetchError):
+        await fetcher.fetch(image_server.url("/missing.png"))
+    with pytest.raises(FetchError):
+        await fetcher.fetch(slow)
+    with pytest.raises(FetchError):
+        await fetcher.fetch("file:///etc/passwd")
+    with pytest.raises(FetchError):
+        await fetcher.fetch("http://a\x00b.com/x.png")
+    with pytest.raises(FetchError):
+        await fetcher.fetch("http://[::1/x.png")
+    await fetcher.close()
+
+
+async def test_per_host_limit(image_server):
+    """
+    Test that concurrent downloads from one host are limited to max_per_host.
+
+    Raises:
+    - AssertionError: If the downloads are not serialized.
+    """
+    url = image_server.add("/delayed.png", b"x", delay=0.2)
+    fetcher = ImageFetcher(max_per_host=1)
+
+    started = time.perf_counter()
+    await asyncio.gather(fetcher.fetch(url), fetcher.fetch(url))
+    assert time.perf_counter() - started >= 0.4
+    # Idle hosts are not kept
+    assert fetcher._hosts == {}
+    await fetcher.close()
@@ -0,0 +1,83 @@
+import numpy as np
+from PIL import Image
+
+from src.services.image_hash import HammingIndex, image_signature, average_hash
+
+
+def gradient_image(size=256, color=(1.0, 0.5, 0.2)):
+    x = np.linspace(0, 1, size)
+    pattern = np.outer(x, x[::-1])
+    return np.stack([pattern * c for c in color], axis=-1)
+
+
+def model_input(image_array, size=(32, 32), quality=None):
+    """
+    Reproduce the preprocessing of the prediction endpoint: resize to 32x32 and scale to [0, 1].
+    """
+    image = Image.fromarray((image_array * 255).astype(np.uint8))
+    if quality is not None:
+        from io import BytesIO
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=quality)
+        image = Image.open(BytesIO(buffer.getvalue()))
+    return np.array(image.resize(size).convert("RGB")) / 255.0
+
+
+def test_signature_of_flat_image():
+    """
+    Test that a flat image has an all-zero aHash.
+
+    Raises:
+    - AssertionError: If the hash has bits set.
+    """
+    gray = np.full((32, 32), 0.5)
+    assert average_hash(gray) == 0
+
+
+def test_reencoded_image_matches():
+    """
+    Test that a re-encoded and resized copy of an image is found in the index.
+
+    Raises:
+    - AssertionError: If the copy is not matched.
+    """
+    original = gradient_image()
+    index = HammingIndex(capacity=8, max_distance=2)
+    index.add(image_signature(model_input(original)), "original")
+
+    copy = model_input(gradient_image(size=512), quality=70)
+    assert index.search(image_signature(copy)) == "original"
+
+
+def test_different_images_do_not_match():
+    """
+    Test that a different picture and a recolored picture are not matched.
+
+    Raises:
+    - AssertionError: If an unrelated image is matched.
+    """
+    original = gradient_image()
+    index = HammingIndex(capacity=8, max_distance=2)
+    index.add(image_signature(model_input(original)), "original")
+
+    rotated = np.rot90(original).copy()
+    recolored = gradient_image(color=(0.2, 0.5, 1.0))
+    assert index.search(image_signature(model_input(rotated))) is None
+    assert index.search(image_signature(model_input(recolored))) is None
+
+
+def test_index_is_bounded():
+    """
+    Test that the index keeps at most `capacity` entries and drops the oldest ones.
+
+    Raises:
+    - AssertionError: If the index grows beyond its capacity.
+    """
+    index = HammingIndex(capacity=2, max_distance=0, color_tolerance=0.0)
+    signatures = [image_signature(np.full((32, 32, 3), value)) for value in (0.1, 0.5, 0.9)]
+    for i, signature in enumerate(signatures):
+        index.add(signature, i)
+
+    assert len(index) == 2
+    assert index.search(signatures[0]) is None
+    assert index.search(signatures[2]) == 2
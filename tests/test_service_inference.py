@@ -0,0 +1,202 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.services.inference import BatchPredictor, QueueFullError, InferenceTimeoutError
+
+
+class FakeModel:
+    """
+    A stand-in for the Keras model that records the size of every batch it receives.
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch):
+        self.batch_sizes.append(len(batch))
+        return batch.reshape(len(batch), -1)[:, :10]
+
+
+def make_image(value):
+    return np.full((32, 32, 3), value, dtype=np.float32)
+
+
+async def test_predict_returns_own_row():
+    """
+    Test that every caller receives the prediction computed for its own image.
+
+    Raises:
+    - AssertionError: If a result belongs to another request.
+    """
+    model = FakeModel()
+    predictor = BatchPredictor(model.predict, max_batch_size=8, max_wait_ms=20)
+    results = await asyncio.gather(*(predictor.predict(make_image(i)) for i in range(5)))
+    await predictor.stop()
+
+    for i, result in enumerate(results):
+        assert result.shape == (10,)
+        assert np.all(result == i)
+
+
+async def test_concurrent_requests_are_batched():
+    """
+    Test that concurrent requests are served by fewer forward passes, each not exceeding max_batch_size.
+
+    Raises:
+    - AssertionError: If the requests were not grouped into batches.
+    """
+    model = FakeModel()
+    predictor = BatchPredictor(model.predict, max_batch_size=4, max_wait_ms=50)
+    await asyncio.gather(*(predictor.predict(make_image(i)) for i in range(10)))
+    await predictor.stop()
+
+    assert sum(model.batch_sizes) == 10
+    assert max(model.batch_sizes) <= 4
+    assert len(model.batch_sizes) < 10
+
+
+async def test_queue_full():
+    """
+    Test that a request is rejected when the queue is full.
+
+    Raises:
+    - AssertionError: If QueueFullError is not raised.
+    """
+    model = FakeModel()
+    predictor = BatchPredictor(model.predict, max_batch_size=1, max_wait_ms=1, max_queue_size=1)
+    first = asyncio.ensure_future(predictor.predict(make_image(0)))
+    second = asyncio.ensure_future(predictor.predict(make_image(1)))
+    with pytest.raises(QueueFullError):
+        await asyncio.gather(first, second)
+    await predictor.stop()
+
+
+async def test_bounded_batch_rejected_when_overloaded():
+    """
+    Test that a bounded batch is rejected while other batches fill the queue, and that unbounded ones are not.
+
+    Raises:
+    - AssertionError: If the bounded batch is admitted or the unbounded one rejected.
+    """
+    import threading
+    release = threading.Event()
+
+    def blocking_predict(batch):
+        release.wait(5)
+        return batch.reshape(len(batch), -1)[:, :10]
+
+    predictor = BatchPredictor(blocking_predict, max_batch_size=4, max_queue_size=4)
+    images = np.stack([make_image(i) for i in range(4)])
+    running = asyncio.ensure_future(predictor.predict_batch(images))
+    await asyncio.sleep(0.01)
+    with pytest.raises(QueueFullError):
+        await predictor.predict_batch(images[:1], bounded=True)
+    unbounded = asyncio.ensure_future(predictor.predict_batch(images[:1]))
+    release.set()
+    assert len(await running) == 4 and len(await unbounded) == 1
+    assert len(await predictor.predict_batch(images, bounded=True)) == 4
+    await predictor.stop()
+
+
+async def test_model_error_is_propagated():
+    """
+    Test that an exception raised by the model reaches every request of the batch.
+
+    Raises:
+    - AssertionError: If the exception is not propagated.
+    """
+    def broken_predict(batch):
+        raise ValueError("broken model")
+
+    predictor = BatchPredictor(broken_predict, max_batch_size=4, max_wait_ms=5)
+    with pytest.raises(ValueError):
+        await predictor.predict(make_image(0))
+    await predictor.stop()
+
+
+async def test_predict_runs_off_event_loop():
+    """
+    Test that the forward pass runs in the executor, not in the event loop thread.
+
+    Raises:
+    - AssertionError: If the model is called from the event loop thread.
+    """
+    import threading
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def predict(batch):
+        threads.append(threading.get_ident())
+        return batch.reshape(len(batch), -1)[:, :10]
+
+    predictor = BatchPredictor(predict, max_batch_size=4, max_wait_ms=1)
+    await predictor.predict(make_image(1))
+    await predictor.stop()
+
+    assert threads and loop_thread not in threads
+
+
+async def test_predict_timeout():
+    """
+    Test that a slow forward pass results in InferenceTimeoutError instead of hanging.
+
+    Raises:
+    - AssertionError: If InferenceTimeoutError is not raised.
+    """
+    import time
+
+    def slow_predict(batch):
+        time.sleep(0.2)
+        return batch.reshape(len(batch), -1)[:, :10]
+
+    predictor = BatchPredictor(slow_predict, max_batch_size=1, max_wait_ms=1, timeout=0.05)
+    with pytest.raises(InferenceTimeoutError):
+        await predictor.predict(make_image(0))
+    await predictor.stop()
+
+
+async def test_predict_batch_is_chunked():
+    """
+    Test that predict_batch splits the images into chunks and keeps their order.
+
+    Raises:
+    - AssertionError: If the chunks are too large or the results are out of order.
+    """
+    model = FakeModel()
+    predictor = BatchPredictor(model.predict, max_batch_size=4)
+    images = np.stack([make_image(i) for i in range(10)])
+    results = await predictor.predict_batch(images)
+    await predictor.stop()
+
+    assert model.batch_sizes == [4, 4, 2]
+    assert [int(row[0]) for row in results] == list(range(10))
+
+
+def slow_process_init(seconds):
+    """
+    A pool initializer standing in for a model that takes a while to load.
+    """
+    import time
+    from src.services import inference
+
+    time.sleep(seconds)
+    inference._process_predict_fn = lambda batch: np.zeros((len(batch), 10), dtype=np.float32)
+
+
+async def test_warm_process_pool():
+    """
+    Test that the warmup waits for every worker, however long its model takes to load.
+
+    Raises:
+    - AssertionError: If a worker is not warmed up.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from src.services.inference import warm_process_pool
+
+    executor = ProcessPoolExecutor(max_workers=2, initializer=slow_process_init, initargs=(0.2,))
+    try:
+        assert len(await warm_process_pool(executor, 2)) == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,139 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from src.services import model_manager as model_manager_module
+from src.services.model_manager import ModelManager
+
+
+class FakeBackend:
+    """
+    Records the batches it receives in place of a real model.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch):
+        self.batches.append(batch.shape)
+        return np.zeros((len(batch), 10), dtype=np.float32)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend()
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", lambda backend, path, mmap=False: fake.predict)
+    return fake
+
+
+def test_model_is_not_loaded_on_creation(backend):
+    """
+    Test that creating a ModelManager does not load the model.
+
+    Raises:
+    - AssertionError: If the model is loaded eagerly.
+    """
+    manager = ModelManager("keras", "model.h5")
+    assert not manager.loaded
+    assert not manager.ready
+    assert backend.batches == []
+
+
+def test_first_predict_loads_and_warms_up(backend):
+    """
+    Test that the first prediction loads the model and runs the warmup batches before the real one.
+
+    Raises:
+    - AssertionError: If the warmup is skipped or the model is not ready afterwards.
+    """
+    manager = ModelManager("keras", "model.h5", warmup_batches=2, warmup_batch_sizes=(1, 4))
+    manager.predict(np.zeros((3, 32, 32, 3), dtype=np.float32))
+
+    assert manager.ready
+    assert backend.batches == [(1, 32, 32, 3)] * 2 + [(4, 32, 32, 3)] * 2 + [(3, 32, 32, 3)]
+
+    manager.load()
+    assert len(backend.batches) == 5
+
+
+def test_swap_keeps_serving_until_the_new_model_is_warm(monkeypatch):
+    """
+    Test that a swap warms up the new model before replacing the current one, and tags it with its version.
+
+    Raises:
+    - AssertionError: If the new model serves before its warmup or the version is not updated.
+    """
+    old, new = FakeBackend(), FakeBackend()
+    loaders = {"old.npz": old.predict, "new.npz": new.predict}
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", lambda backend, path, mmap=False: loaders[path])
+    manager = ModelManager("numpy", "old.npz", warmup_batches=1, warmup_batch_sizes=(1,), version="v1")
+    manager.predict(np.zeros((2, 32, 32, 3), dtype=np.float32))
+
+    manager.swap("numpy", "new.npz", "v2")
+    assert new.batches == [(1, 32, 32, 3)]
+    assert manager.version == "v2"
+    assert manager.model_path == "new.npz"
+
+    manager.predict(np.zeros((3, 32, 32, 3), dtype=np.float32))
+    assert old.batches[-1] == (2, 32, 32, 3)
+    assert new.batches[-1] == (3, 32, 32, 3)
+
+
+def test_failed_swap_keeps_the_current_model(monkeypatch):
+    """
+    Test that a model failing to load leaves the current one in place.
+
+    Raises:
+    - AssertionError: If the current model is replaced.
+    """
+    current = FakeBackend()
+
+    def load(backend, path, mmap=False):
+        if path == "broken.npz":
+            raise OSError("truncated file")
+        return current.predict
+
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", load)
+    manager = ModelManager("numpy", "old.npz", warmup_batches=1, version="v1")
+    manager.load()
+
+    with pytest.raises(OSError):
+        manager.swap("numpy", "broken.npz", "v2")
+    assert manager.version == "v1"
+    assert manager.ready
+    manager.predict(np.zeros((1, 32, 32, 3), dtype=np.float32))
+    assert current.batches[-1] == (1, 32, 32, 3)
+
+
+def test_load_error_is_reported(monkeypatch):
+    """
+    Test that a failed load leaves the model not ready and keeps the error message.
+
+    Raises:
+    - AssertionError: If the error is not reported.
+    """
+    def broken_loader(backend, path, mmap=False):
+        raise FileNotFoundError("model.h5 not found")
+
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", broken_loader)
+    manager = ModelManager("keras", "model.h5")
+    with pytest.raises(FileNotFoundError):
+        manager.load()
+
+    assert not manager.ready
+    assert "not found" in manager.error
+
+
+def test_import_main_does_not_load_tensorflow():
+    """
+    Test that importing the application does not import TensorFlow or Keras.
+
+    Raises:
+    - AssertionError: If TensorFlow is imported.
+    """
+    code = "import sys, main; print('tensorflow' in sys.modules or 'keras' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env={"MODEL_LOAD": "lazy", "PATH": ""}, check=True).stdout
+    assert output.strip().splitlines()[-1] == "False"
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from src.services.model_manager import ModelManager
+from src.services.model_registry import ModelNotFoundError, ModelRegistry
+from src.services.registry_follower import RegistryFollower
+
+
+@pytest.fixture
+def registry(tmp_path):
+    for name in ("first.npz", "second.tflite"):
+        (tmp_path / name).write_bytes(name.encode())
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+def test_register_and_activate(registry, tmp_path):
+    """
+    Test that registered versions are copied, described in the manifest and activated by name.
+
+    Raises:
+    - AssertionError: If a version is missing or the active one is wrong.
+    """
+    assert registry.active() is None
+    first = registry.register(str(tmp_path / "first.npz"), description="baseline")
+    second = registry.register(str(tmp_path / "second.tflite"), name="int8-2024")
+
+    assert (first.name, first.backend) == ("v1", "numpy")
+    assert (second.name, second.backend) == ("int8-2024", "tflite")
+    with open(first.path, "rb") as model_file:
+        assert model_file.read() == b"first.npz"
+    assert [version.name for version in registry.versions()] == ["v1", "int8-2024"]
+    assert registry.active() is None
+
+    registry.activate("int8-2024")
+    assert ModelRegistry(registry.directory).active() == second
+
+
+def test_invalid_versions(registry, tmp_path):
+    """
+    Test that taken or invalid names, unknown backends and unknown versions are rejected.
+
+    Raises:
+    - AssertionError: If no error is raised.
+    """
+    registry.register(str(tmp_path / "first.npz"), name="v1")
+    with pytest.raises(ValueError):
+        registry.register(str(tmp_path / "first.npz"), name="v1")
+    with pytest.raises(ValueError):
+        registry.register(str(tmp_path / "first.npz"), name="a name that is far too long")
+    with pytest.raises(ValueError):
+        registry.register(str(tmp_path / "first.npz").replace(".npz", ".bin"))
+    with pytest.raises(ModelNotFoundError):
+        registry.activate("v9")
+
+
+async def test_follower_swaps_to_the_active_version(registry, tmp_path):
+    """
+    Test that the follower swaps to the active version once, and does not retry a version that failed.
+
+    Raises:
+    - AssertionError: If the follower swaps too often or reports a wrong state.
+    """
+    registry.register(str(tmp_path / "first.npz"))
+    registry.register(str(tmp_path / "second.tflite"))
+    manager = ModelManager("numpy", "model.npz", version="v0")
+    swaps = []
+
+    async def swap(version):
+        await asyncio.sleep(0)
+        if version.backend == "tflite":
+            raise RuntimeError("cannot load")
+        swaps.append(version.name)
+        manager.use(version.backend, version.path, version.name)
+
+    follower = RegistryFollower(registry, manager, swap, interval=60)
+    await follower.sync()
+    assert swaps == []
+
+    registry.activate("v1")
+    await follower.trigger()
+    await follower.sync()
+    assert swaps == ["v1"]
+    assert follower.snapshot() == {"serving": "v1", "loading": None, "failed": None, "error": None}
+
+    registry.activate("v2")
+    await follower.sync()
+    await follower.sync()
+    assert manager.version == "v1"
+    assert follower.snapshot()["failed"] == "v2"
+    assert follower.snapshot()["error"] == "cannot load"
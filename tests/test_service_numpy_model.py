@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from src.services.numpy_model import NumpyModel
+
+keras = pytest.importorskip("keras")
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    """
+    Build a small model with every layer type of the CIFAR-10 CNN and non-trivial batch normalization statistics.
+    """
+    from keras import layers, models
+
+    keras.utils.set_random_seed(0)
+    model = models.Sequential([
+        layers.Input((32, 32, 3)),
+        layers.BatchNormalization(),
+        layers.Conv2D(8, (5, 5), padding="same", activation="elu"),
+        layers.MaxPooling2D(pool_size=(2, 2), strides=(2, 2)),
+        layers.Dropout(0.25),
+        layers.BatchNormalization(),
+        layers.Conv2D(16, (3, 3), padding="valid", activation="elu"),
+        layers.MaxPooling2D(pool_size=(2, 2)),
+        layers.Flatten(),
+        layers.Dense(32),
+        layers.Activation("elu"),
+        layers.Dropout(0.5),
+        layers.Dense(10),
+        layers.Activation("softmax"),
+    ])
+    rng = np.random.default_rng(0)
+    for layer in model.layers:
+        if isinstance(layer, layers.BatchNormalization):
+            layer.set_weights([rng.uniform(0.5, 1.5, w.shape).astype(np.float32) for w in layer.get_weights()])
+    return model
+
+
+def test_parity_with_keras(keras_model):
+    """
+    Test that the NumPy backend produces the same probabilities as Keras.
+
+    Raises:
+    - AssertionError: If the outputs differ by more than float32 rounding.
+    """
+    images = np.random.default_rng(1).random((6, 32, 32, 3), dtype=np.float32)
+    expected = keras_model.predict(images, verbose=0)
+    actual = NumpyModel.from_keras(keras_model).predict(images)
+
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+    assert np.array_equal(actual.argmax(axis=1), expected.argmax(axis=1))
+
+
+def test_save_and_load(keras_model, tmp_path):
+    """
+    Test that a model exported to .npz predicts the same as before saving.
+
+    Raises:
+    - AssertionError: If the loaded model differs.
+    """
+    model = NumpyModel.from_keras(keras_model)
+    path = tmp_path / "model.npz"
+    model.save(str(path))
+
+    images = np.random.default_rng(2).random((2, 32, 32, 3), dtype=np.float32)
+    np.testing.assert_array_equal(NumpyModel.load(str(path)).predict(images), model.predict(images))
+
+
+def test_memory_mapped_weights(keras_model, tmp_path):
+    """
+    Test that an .npz model is unpacked once into read-only memory-mapped weights that predict the same.
+
+    Raises:
+    - AssertionError: If the weights are not memory-mapped or the predictions differ.
+    """
+    model = NumpyModel.from_keras(keras_model)
+    path = tmp_path / "model.npz"
+    model.save(str(path))
+
+    mapped = NumpyModel.load(str(path), mmap=True)
+    kernels = [layer["kernel"] for layer in mapped.layers if "kernel" in layer]
+    assert (tmp_path / "model.weights").is_dir()
+    assert all(isinstance(kernel, np.memmap) and not kernel.flags.writeable for kernel in kernels)
+
+    images = np.random.default_rng(3).random((2, 32, 32, 3), dtype=np.float32)
+    np.testing.assert_array_equal(mapped.predict(images), model.predict(images))
+    np.testing.assert_array_equal(NumpyModel.load(str(tmp_path / "model.weights")).predict(images),
+                                  model.predict(images))
@@ -0,0 +1,129 @@
+import pytest
+
+from src.services.metrics import metrics
+from src.services.prediction_cache import PredictionCache
+
+
+class FakeRedis:
+    """
+    A minimal in-memory stand-in for the asynchronous Redis client.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+class BrokenRedis:
+    """
+    A Redis client whose every call fails, as if the server were unreachable.
+    """
+
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis is down")
+
+
+def prediction(label):
+    return {"label": label, "class_index": 0, "probabilities": [1.0] + [0.0] * 9}
+
+
+def test_key_depends_on_bytes_and_model_version():
+    """
+    Test that the cache key changes with the image bytes and with the model version.
+
+    Raises:
+    - AssertionError: If two different inputs share a key.
+    """
+    key = PredictionCache.key(b"image", "v1")
+    assert key == PredictionCache.key(b"image", "v1")
+    assert key != PredictionCache.key(b"image", "v2")
+    assert key != PredictionCache.key(b"other", "v1")
+
+
+async def test_get_after_set():
+    """
+    Test that a stored prediction is returned and counted as a memory hit.
+
+    Raises:
+    - AssertionError: If the prediction is not returned.
+    """
+    cache = PredictionCache()
+    hits = metrics.counter("prediction_cache_memory_hits_total").value
+    misses = metrics.counter("prediction_cache_misses_total").value
+
+    assert await cache.get("a") is None
+    await cache.set("a", prediction("Кіт"))
+    assert await cache.get("a") == prediction("Кіт")
+
+    assert metrics.counter("prediction_cache_memory_hits_total").value == hits + 1
+    assert metrics.counter("prediction_cache_misses_total").value == misses + 1
+
+
+async def test_lru_eviction_by_entries():
+    """
+    Test that the least recently used entry is evicted when the entry limit is reached.
+
+    Raises:
+    - AssertionError: If the wrong entry is evicted.
+    """
+    cache = PredictionCache(max_entries=2)
+    await cache.set("a", prediction("a"))
+    await cache.set("b", prediction("b"))
+    await cache.get("a")
+    await cache.set("c", prediction("c"))
+
+    assert await cache.get("a") is not None
+    assert await cache.get("b") is None
+    assert await cache.get("c") is not None
+
+
+async def test_lru_eviction_by_bytes():
+    """
+    Test that entries are evicted to keep the total size under max_bytes.
+
+    Raises:
+    - AssertionError: If the size limit is exceeded.
+    """
+    cache = PredictionCache(max_entries=100, max_bytes=200)
+    for name in "abcde":
+        await cache.set(name, prediction(name))
+
+    assert cache._bytes <= 200
+    assert await cache.get("e") is not None
+    assert await cache.get("a") is None
+
+
+async def test_redis_tier():
+    """
+    Test that a memory miss is served from Redis and promoted to the memory tier.
+
+    Raises:
+    - AssertionError: If the Redis tier is not used.
+    """
+    redis = FakeRedis()
+    await PredictionCache(redis_client=redis).set("a", prediction("a"))
+
+    cache = PredictionCache(redis_client=redis)
+    assert await cache.get("a") == prediction("a")
+    assert "a" in cache._entries
+
+
+async def test_redis_errors_are_misses():
+    """
+    Test that an unreachable Redis server degrades to the memory tier only.
+
+    Raises:
+    - AssertionError: If the Redis error is propagated.
+    """
+    cache = PredictionCache(redis_client=BrokenRedis())
+    await cache.set("a", prediction("a"))
+    assert await cache.get("a") == prediction("a")
+    assert await cache.get("b") is None
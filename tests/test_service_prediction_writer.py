@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+
+from sqlalchemy import select, func
+
+from src.database.models import Prediction
+from src.services.prediction_writer import PredictionWriter
+from tests.conftest import TestingSessionLocal
+
+
+@contextlib.asynccontextmanager
+async def sqlite_session():
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@contextlib.asynccontextmanager
+async def broken_session():
+    raise ConnectionError("database is down")
+    yield
+
+
+async def count_rows(session, label):
+    result = await session.execute(select(func.count()).select_from(Prediction)
+                                   .where(Prediction.predicted_label == label))
+    return result.scalar()
+
+
+async def test_rows_are_written_after_the_interval(session):
+    """
+    Test that queued rows are written in the background once the interval has passed.
+
+    Raises:
+    - AssertionError: If the rows are not in the database.
+    """
+    writer = PredictionWriter(sqlite_session, max_rows=100, max_wait_ms=20)
+    for i in range(3):
+        writer.add(f"cat{i}.png", "", "interval")
+    assert len(writer) == 3
+
+    await asyncio.sleep(0.2)
+    assert len(writer) == 0
+    assert await count_rows(session, "interval") == 3
+    await writer.stop()
+
+
+async def test_full_buffer_is_written_at_once(session):
+    """
+    Test that a full buffer is written without waiting for the interval, in a single flush.
+
+    Raises:
+    - AssertionError: If the rows wait for the interval.
+    """
+    writer = PredictionWriter(sqlite_session, max_rows=5, max_wait_ms=60000)
+    writer.add_many([{"filename": f"dog{i}.png", "url": "", "predicted_label": "full"} for i in range(5)])
+
+    await asyncio.sleep(0.1)
+    assert await count_rows(session, "full") == 5
+    await writer.stop()
+
+
+async def test_failed_flush_keeps_rows_up_to_the_limit(session):
+    """
+    Test that rows of a failed flush are kept for the next one, dropping the oldest beyond max_pending.
+
+    Raises:
+    - AssertionError: If rows are lost or the buffer grows beyond the limit.
+    """
+    writer = PredictionWriter(broken_session, max_rows=100, max_wait_ms=60000, max_pending=4)
+    writer.add_many([{"filename": f"frog{i}.png", "url": "", "predicted_label": "retry"} for i in range(6)])
+
+    assert await writer.flush() == 0
+    assert [row["filename"] for row in writer._rows] == ["frog2.png", "frog3.png", "frog4.png", "frog5.png"]
+
+    writer.session_factory = sqlite_session
+    await writer.stop()
+    assert await count_rows(session, "retry") == 4
@@ -0,0 +1,50 @@
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.services.preprocessing import decode_image, make_preview
+
+
+def photo_bytes(fmt, mode="RGB", size=(1600, 1200)):
+    rng = np.random.default_rng(0)
+    small = Image.fromarray((rng.random((12, 16, 3)) * 255).astype(np.uint8))
+    buffer = BytesIO()
+    small.resize(size, Image.BICUBIC).convert(mode).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def full_decode(f):
+    return np.array(Image.open(BytesIO(f)).resize((32, 32)).convert('RGB')) / 255.0
+
+
+@pytest.mark.parametrize("fmt, mode", [("JPEG", "RGB"), ("JPEG", "L"), ("PNG", "RGBA"), ("PNG", "P")])
+def test_reduced_decode_matches_full_decode(fmt, mode):
+    """
+    Test that the reduced-size decode stays within a few gray levels of decoding the full image.
+
+    Raises:
+    - AssertionError: If the shape, the range or the pixels differ.
+    """
+    f = photo_bytes(fmt, mode)
+    image = decode_image(f)
+
+    assert image.shape == (32, 32, 3)
+    assert 0 <= image.min() and image.max() <= 1
+    assert np.abs(image - full_decode(f)).mean() < 0.01
+
+
+def test_preview_is_small_and_keeps_transparency():
+    """
+    Test that the preview fits the maximum size, keeps the aspect ratio and uses PNG only for transparent images.
+
+    Raises:
+    - AssertionError: If the preview is too large or has the wrong type.
+    """
+    preview, image_type = make_preview(photo_bytes("JPEG"), max_size=200)
+    assert image_type == "image/jpeg"
+    assert Image.open(BytesIO(preview)).size == (200, 150)
+
+    _, image_type = make_preview(photo_bytes("PNG", "RGBA"), max_size=200)
+    assert image_type == "image/png"
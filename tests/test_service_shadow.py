@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.services import model_manager as model_manager_module
+from src.services.model_manager import ModelManager
+from src.services.model_registry import ModelNotFoundError, ModelRegistry
+from src.services.registry_follower import RegistryFollower
+from src.services.shadow import ShadowEvaluator
+
+
+def brightness_predict(batch):
+    """
+    Predict class 5 for bright images and class 3 for dark ones, as one-hot probability vectors.
+    """
+    probabilities = np.zeros((len(batch), 10), dtype=np.float32)
+    probabilities[np.arange(len(batch)), np.where(batch.mean(axis=(1, 2, 3)) > 0.5, 5, 3)] = 1.0
+    return probabilities
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", lambda backend, path, mmap=False: brightness_predict)
+    (tmp_path / "candidate.npz").write_bytes(b"weights")
+    registry = ModelRegistry(str(tmp_path / "registry"))
+    registry.register(str(tmp_path / "candidate.npz"), name="candidate")
+    return registry
+
+
+async def wait_ready(evaluator: ShadowEvaluator):
+    for _ in range(100):
+        if evaluator.candidate.ready:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("The candidate did not load")
+
+
+async def test_agreement_is_recorded(registry):
+    """
+    Test that the shadowed predictions are compared with the served ones.
+
+    Raises:
+    - AssertionError: If the agreement rate or the disagreements are wrong.
+    """
+    evaluator = ShadowEvaluator(sample_rate=1.0, max_concurrency=4)
+    evaluator.set_candidate(registry.get("candidate"))
+    await wait_ready(evaluator)
+
+    bright = np.ones((32, 32, 3), dtype=np.float32)
+    dark = np.zeros((32, 32, 3), dtype=np.float32)
+    for image_array, class_index in ((bright, 5), (bright, 5), (dark, 3), (dark, 7)):
+        evaluator.submit(image_array, class_index, 0.01)
+        await evaluator.stop()
+
+    snapshot = evaluator.snapshot()
+    assert snapshot["candidate"] == "candidate"
+    assert snapshot["compared"] == 4
+    assert snapshot["agreement_rate"] == 0.75
+    assert snapshot["disagreements"] == [[7, 3, 1]]
+    assert snapshot["primary_ms"] == 10.0
+    assert snapshot["candidate_ms"] > 0
+
+    evaluator.set_candidate(None)
+    assert evaluator.snapshot()["compared"] == 0
+    evaluator.submit(bright, 5, 0.01)
+    assert evaluator.snapshot()["compared"] == 0
+
+
+async def test_shadowing_never_waits(registry, monkeypatch):
+    """
+    Test that a slow candidate does not delay the caller and that samples beyond the cap are dropped.
+
+    Raises:
+    - AssertionError: If the caller waits or more images than the cap are shadowed.
+    """
+    release = threading.Event()
+
+    def slow_predict(batch):
+        if len(batch) == 1 and batch.any():
+            release.wait(5)
+        return brightness_predict(batch)
+
+    monkeypatch.setattr(model_manager_module, "load_predict_fn", lambda backend, path, mmap=False: slow_predict)
+    evaluator = ShadowEvaluator(sample_rate=1.0, max_concurrency=1)
+    evaluator.set_candidate(registry.get("candidate"))
+    await wait_ready(evaluator)
+
+    started = time.perf_counter()
+    for _ in range(3):
+        evaluator.submit(np.ones((32, 32, 3), dtype=np.float32), 5, 0.01)
+    assert time.perf_counter() - started < 0.1
+    assert evaluator._in_flight == 1
+
+    release.set()
+    await evaluator.stop()
+    assert evaluator.snapshot()["compared"] == 1
+    assert evaluator._in_flight == 0
+
+
+async def test_no_sampling_without_rate(registry):
+    """
+    Test that nothing is shadowed when the sample rate is zero.
+
+    Raises:
+    - AssertionError: If an image is shadowed.
+    """
+    evaluator = ShadowEvaluator(sample_rate=0.0)
+    evaluator.set_candidate(registry.get("candidate"))
+    await wait_ready(evaluator)
+    evaluator.submit(np.ones((32, 32, 3), dtype=np.float32), 5, 0.01)
+    assert not evaluator._tasks
+
+
+async def test_follower_sets_the_shadowed_version(registry):
+    """
+    Test that the follower hands the shadowed version of the manifest over to the evaluator.
+
+    Raises:
+    - AssertionError: If the evaluator does not follow the manifest.
+    """
+    evaluator = ShadowEvaluator(sample_rate=1.0)
+
+    async def swap(version):
+        pass
+
+    follower = RegistryFollower(registry, ModelManager("numpy", "model.npz", version="v0"), swap, 60, evaluator)
+    await follower.sync()
+    assert evaluator.version is None
+
+    registry.set_shadow("candidate")
+    assert ModelRegistry(registry.directory).shadow().name == "candidate"
+    await follower.sync()
+    assert evaluator.version == "candidate"
+    candidate = evaluator.candidate
+    await follower.sync()
+    assert evaluator.candidate is candidate
+
+    registry.set_shadow(None)
+    await follower.sync()
+    assert evaluator.version is None
+    with pytest.raises(ModelNotFoundError):
+        registry.set_shadow("missing")
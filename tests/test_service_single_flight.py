@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from src.services.metrics import metrics
+from src.services.single_flight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_computation():
+    """
+    Test that concurrent calls with the same key run the computation once and are counted as coalesced.
+
+    Raises:
+    - AssertionError: If the computation runs more than once.
+    """
+    flights = SingleFlight("test_shared")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+
+    assert results == ["result"] * 5
+    assert calls == [1]
+    assert metrics.counter("test_shared_single_flight_coalesced_total").value == 4
+    assert len(flights) == 0
+
+    assert await flights.do("key", compute) == "result"
+    assert calls == [1, 1]
+
+
+async def test_errors_reach_every_caller():
+    """
+    Test that an error of the computation is raised to every waiting caller.
+
+    Raises:
+    - AssertionError: If a caller does not see the error.
+    """
+    flights = SingleFlight("test_errors")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("broken image")
+
+    results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_cancelled_caller_does_not_cancel_the_others():
+    """
+    Test that a caller going away does not cancel the computation shared with the others.
+
+    Raises:
+    - AssertionError: If the remaining caller does not get the result.
+    """
+    flights = SingleFlight("test_cancel")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return 42
+
+    leader = asyncio.ensure_future(flights.do("key", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flights.do("key", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == 42
+    with pytest.raises(asyncio.CancelledError):
+        await leader
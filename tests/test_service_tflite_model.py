@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("tensorflow")
+keras = pytest.importorskip("keras")
+
+from src.services.tflite_model import TFLiteModel, quantize_keras_model
+
+
+@pytest.fixture(scope="module")
+def quantized(tmp_path_factory):
+    """
+    Build a small CNN and quantize it to int8 with random calibration images.
+    """
+    from keras import layers, models
+
+    keras.utils.set_random_seed(0)
+    model = models.Sequential([
+        layers.Input((32, 32, 3)),
+        layers.BatchNormalization(),
+        layers.Conv2D(8, (5, 5), padding="same", activation="elu"),
+        layers.MaxPooling2D(pool_size=(2, 2)),
+        layers.Flatten(),
+        layers.Dense(10),
+        layers.Activation("softmax"),
+    ])
+    calibration = np.random.default_rng(0).random((32, 32, 32, 3), dtype=np.float32)
+    path = tmp_path_factory.mktemp("models") / "model_int8.tflite"
+    size = quantize_keras_model(model, calibration, str(path))
+    return model, str(path), size
+
+
+def test_quantized_model_is_smaller(quantized):
+    """
+    Test that the int8 model is smaller than the float32 weights.
+
+    Raises:
+    - AssertionError: If the quantized file is not smaller.
+    """
+    model, _, size = quantized
+    assert size < model.count_params() * 4
+
+
+def test_quantized_model_predicts_close_to_float(quantized):
+    """
+    Test that the int8 model returns probabilities close to the float model for any batch size.
+
+    Raises:
+    - AssertionError: If the outputs differ too much.
+    """
+    model, path, _ = quantized
+    tflite_model = TFLiteModel(path)
+    images = np.random.default_rng(1).random((5, 32, 32, 3), dtype=np.float32)
+
+    expected = model.predict(images, verbose=0)
+    np.testing.assert_allclose(tflite_model.predict(images), expected, atol=0.05)
+    np.testing.assert_allclose(tflite_model.predict(images[:1]), expected[:1], atol=0.05)
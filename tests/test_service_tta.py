@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.services.tta import MAX_VIEWS, TestTimeAugmentation, augment_views
+
+
+def test_augment_views():
+    """
+    Test that the views are the image, its mirror and the mirrored shifted crops of the padded image.
+
+    Raises:
+    - AssertionError: If a view is wrong.
+    """
+    image = np.random.default_rng(0).random((32, 32, 3))
+    views = augment_views(image)
+
+    assert views.shape == (MAX_VIEWS, 32, 32, 3)
+    assert views.dtype == np.float32
+    assert np.allclose(views[0], image)
+    assert np.allclose(views[1], image[:, ::-1])
+    # Shifted down and right by two pixels, reflected on the top and left borders
+    assert np.allclose(views[2][2:, 2:], image[:30, :30])
+    assert np.allclose(views[2][0, 2:], image[2, :30])
+    assert np.allclose(views[9], views[8][:, ::-1])
+    assert augment_views(image, 2).shape[0] == 2
+
+    with pytest.raises(ValueError):
+        augment_views(image, 3)
+    with pytest.raises(ValueError):
+        augment_views(image, 12)
+
+
+async def test_predictions_are_averaged_in_one_pass():
+    """
+    Test that all the views go through the model together and that their probabilities are averaged.
+
+    Raises:
+    - AssertionError: If the views are split or the average is wrong.
+    """
+    calls = []
+
+    async def predict_batch(batch, chunk_size=None, bounded=False):
+        calls.append((len(batch), chunk_size, bounded))
+        probabilities = np.zeros((len(batch), 10), dtype=np.float32)
+        # The mirrored views vote for another class
+        probabilities[0::2, 1] = 1.0
+        probabilities[1::2, 2] = 1.0
+        return probabilities
+
+    tta = TestTimeAugmentation(views=4)
+    prediction = await tta.predict(np.zeros((32, 32, 3)), predict_batch)
+
+    assert calls == [(4, 4, True)]
+    assert prediction[1] == prediction[2] == 0.5
+    assert tta.estimate_ms is not None
+
+
+def test_latency_budget():
+    """
+    Test that requests fall back to a single view while over budget, and are augmented again later.
+
+    Raises:
+    - AssertionError: If the budget is not applied.
+    """
+    tta = TestTimeAugmentation(budget_ms=10.0, decay=0.5)
+    assert tta.admit()
+    tta.estimate_ms = 30.0
+    assert not tta.admit()
+    assert not tta.admit()
+    assert tta.estimate_ms == 7.5
+    assert tta.admit()
+
+    tta = TestTimeAugmentation(budget_ms=0.0)
+    tta.estimate_ms = 10 ** 6
+    assert tta.admit()
+
+
+def test_invalid_views_fail_on_creation():
+    """
+    Test that an unsupported number of views is rejected when the augmentation is configured.
+
+    Raises:
+    - AssertionError: If the number of views is accepted.
+    """
+    for views in (0, 3, 12):
+        with pytest.raises(ValueError):
+            TestTimeAugmentation(views=views)
@@ -0,0 +1,108 @@
+import time
+
+import pytest
+
+from src.services.image_fetcher import ImageFetcher
+from src.services.url_cache import UrlCache, freshness_lifetime
+
+
+@pytest.fixture
+async def fetcher():
+    fetcher = ImageFetcher()
+    yield fetcher
+    await fetcher.close()
+
+
+def test_freshness_lifetime():
+    """
+    Test that the freshness lifetime follows Cache-Control, Expires and Last-Modified.
+
+    Raises:
+    - AssertionError: If a lifetime is wrong.
+    """
+    now = 1_700_000_000
+    assert freshness_lifetime({"cache-control": "public, max-age=600", "age": "100"}, now) == 500
+    assert freshness_lifetime({"cache-control": "no-cache, max-age=600"}, now) == 0
+    assert freshness_lifetime({"cache-control": "no-store"}, now) is None
+    assert freshness_lifetime({"date": "Tue, 14 Nov 2023 22:13:20 GMT",
+                               "expires": "Tue, 14 Nov 2023 23:13:20 GMT"}, now) == 3600
+    assert freshness_lifetime({"last-modified": "Tue, 14 Nov 2023 12:13:20 GMT"}, now) == 3600
+    assert freshness_lifetime({}, now) == 0
+
+
+async def test_fresh_entry_skips_download(image_server, fetcher, tmp_path):
+    """
+    Test that a fresh entry is served from the disk, even by a new cache instance.
+
+    Raises:
+    - AssertionError: If the image is downloaded again.
+    """
+    url = image_server.add("/fresh.png", b"fresh", headers={"Cache-Control": "max-age=3600"})
+    cache = UrlCache(str(tmp_path))
+
+    entry, data = await cache.fetch(url, fetcher)
+    await cache.remember(entry, "v1", {"label": "cat"})
+    count = len(image_server.requests)
+
+    entry, data = await UrlCache(str(tmp_path)).fetch(url, fetcher)
+    assert data == b"fresh"
+    assert entry.predictions == {"v1": {"label": "cat"}}
+    assert len(image_server.requests) == count
+
+
+async def test_stale_entry_is_revalidated(image_server, fetcher, tmp_path):
+    """
+    Test that a stale entry is revalidated with its ETag and keeps its predictions on 304 Not Modified,
+    and that a changed image replaces it.
+
+    Raises:
+    - AssertionError: If the conditional request or its outcome is wrong.
+    """
+    versions = {"etag": '"v1"', "body": b"first"}
+
+    def handler(request):
+        if request.headers.get("If-None-Match") == versions["etag"]:
+            return 304, {"ETag": versions["etag"]}, b"", 0
+        return 200, {"ETag": versions["etag"], "Content-Length": str(len(versions["body"]))}, versions["body"], 0
+
+    image_server.routes["/etag.png"] = handler
+    url = image_server.url("/etag.png")
+    cache = UrlCache(str(tmp_path))
+
+    entry, _ = await cache.fetch(url, fetcher)
+    await cache.remember(entry, "v1", {"label": "cat"})
+
+    entry, data = await cache.fetch(url, fetcher)
+    assert image_server.requests[-1][1]["If-None-Match"] == '"v1"'
+    assert data == b"first"
+    assert entry.predictions == {"v1": {"label": "cat"}}
+
+    versions.update(etag='"v2"', body=b"second")
+    entry, data = await cache.fetch(url, fetcher)
+    assert data == b"second"
+    assert entry.predictions == {}
+
+
+async def test_lru_eviction_and_no_store(image_server, fetcher, tmp_path):
+    """
+    Test that the least recently used entries are evicted past the size limit and that no-store is honored.
+
+    Raises:
+    - AssertionError: If the wrong entries are kept.
+    """
+    cache = UrlCache(str(tmp_path), max_bytes=250)
+    urls = [image_server.add(f"/lru{i}.png", bytes(100), headers={"Cache-Control": "max-age=60"}) for i in range(3)]
+    private = image_server.add("/private.png", bytes(10), headers={"Cache-Control": "no-store"})
+
+    await cache.fetch(urls[0], fetcher)
+    await cache.fetch(urls[1], fetcher)
+    await cache.fetch(urls[0], fetcher)
+    await cache.fetch(urls[2], fetcher)
+    await cache.fetch(private, fetcher)
+
+    assert len(cache) == 2
+    count = len(image_server.requests)
+    await cache.fetch(urls[0], fetcher)
+    await cache.fetch(urls[2], fetcher)
+    assert len(image_server.requests) == count
+    assert not (tmp_path / (UrlCache.key(urls[1]) + ".body")).exists()